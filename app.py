@@ -1,7 +1,16 @@
+from tools.startupProfiler import StartupProfiler
+
+# Startup profiling (DASH_PROFILE=1 or --profile), started before the heavy imports
+profiler = StartupProfiler.from_environment()
+profiler.start()
+profiler.begin("import")
+
+import os
+
 import pandas as pd
 import dash
 import dash_bootstrap_components as dbc
-from dash import dcc, html, callback, Input, Output
+from dash import dcc, html, callback, Input, Output, State
 
 # Importing Section Components
 from htmlSections.release_decade_bar import ReleaseDecadeBar
@@ -15,81 +24,141 @@ from htmlSections.attributeCorrelationAnalysis import AttributeCorrelationScatte
 from htmlSections.adultContentAnalysis import AdultContentAnalysis
 from htmlSections.productionCompanyAnalysis import ProductionCompanyAnalysis
 from htmlSections.countryPerformanceAnalysis import CountryPerformanceAnalysis
+from htmlSections.titleSearch import TitleSearch
+from htmlSections.similarMovies import SimilarMovies
+from htmlSections.correlationMatrix import CorrelationMatrix
+from htmlSections.movieTable import MovieTable
+from dataProcessing.dataCache import cached_frame
+from dataProcessing.datasetRegistry import DatasetRegistry, discover_snapshots
+from dataProcessing.preprocessing import PreprocessingPipeline, Stage
+from server.aggregateApi import AggregateApi
+from server.exportEndpoint import ExportEndpoint
+from server.memoryPage import MemoryPage
+from server.pageCache import PageCache
+from server.responseCache import ResponseCache
+from server.sectionBuilder import build_sections
+from server.snapshotRouter import SNAPSHOT_STORE, SnapshotRouter
+from tools.loadTest import record_traffic
+
+profiler.end()
 
 # Initialize Dash app with Bootstrap theme
 app = dash.Dash(
     __name__, external_stylesheets=[dbc.themes.LUX], suppress_callback_exceptions=True
 )
 
-# Load and preprocess data
-data = pd.read_csv("./data/Imdb-Movie-Dataset.csv").drop_duplicates()
-data["release_date"] = pd.to_datetime(data["release_date"], errors="coerce")
-# print(data.info())
-# print(data.isna().sum())
-
-# print("Rows with null values in genres, production_companies, or production_countries")
-# exam = data[
-#     data[["genres", "production_companies", "production_countries"]].isna().any(axis=1)
-# ]
-# print(exam.shape)
-# print(exam.describe())
-# print("Rows with revenue = 0:" + str(exam[exam["revenue"] == 0].shape))
-# print("Rows with budget = 0:" + str(exam[exam["budget"] == 0].shape))
-
-# Filter out rows where revenue is <= 0
-# print("Rows with revenue <= 0")
-filtered_data = data[data["revenue"] > 0].copy()
-# print(filtered_data.shape)
-
-# print("Rows with runtime <= 0")
-filtered_data = filtered_data[filtered_data["runtime"] > 0].copy()
-# filtered_data = filtered_data[filtered_data["runtime"] < 500].copy()
-# print(filtered_data.shape)
-
-# print("Still Rows with small vote_count")
-# print(filtered_data.describe())
-filtered_data = filtered_data[filtered_data["vote_count"] >= 25].copy()
-# print("Films with more than 24 votes"+str(filtered_data.shape))
-# Convert release_date to datetime and filter for movies released before 2025
-filtered_data["release_date"] = pd.to_datetime(
-    filtered_data["release_date"], errors="coerce"
+# Record callback traffic for tools.loadTest (DASH_RECORD_TRAFFIC=traffic.jsonl),
+# registered first so cached responses are recorded too
+if os.environ.get("DASH_RECORD_TRAFFIC"):
+    record_traffic(app, os.environ["DASH_RECORD_TRAFFIC"])
+
+# Data cleaning, one named stage per filter. The stage report (rows in/out and
+# time per stage) is printed in profiling mode
+DATA_PATH = "./data/Imdb-Movie-Dataset.csv"
+DEFAULT_SNAPSHOT = "IMDb Movies"
+preprocessing = PreprocessingPipeline(
+    [
+        Stage("positive revenue", "revenue", ">", 0),
+        Stage("positive runtime", "runtime", ">", 0),
+        Stage("min vote count", "vote_count", ">=", 25),
+        Stage("released", "status", "==", "Released"),
+        Stage("has release date", "release_date", "notna"),
+        Stage("has companies", "production_companies", "notna"),
+        Stage("has countries", "production_countries", "notna"),
+    ],
+    drop_columns=("tagline",),
 )
-filtered_data = filtered_data[filtered_data["status"] == "Released"].copy()
-filtered_data = filtered_data.drop(columns=["tagline"])
-filtered_data = filtered_data.dropna(subset=["release_date"])
-filtered_data = filtered_data.dropna(subset=["production_companies"])
-filtered_data = filtered_data.dropna(subset=["production_countries"])
-
-# Add a decade column for analysis
-filtered_data["decade"] = (filtered_data["release_date"].dt.year // 10) * 10
-# print("Final Data")
-# print(filtered_data.shape)
-# print(filtered_data.describe())
-# print(filtered_data.isna().sum())
 
 # Section Components
-sections = {
-    "Overview": ItemAnalysis(app=app, data=filtered_data),
-    "Releases Per Decade": ReleaseDecadeBar(app=app, data=filtered_data),
-    "Biggest Genre over Decades": BiggestGenreChart(app=app, data=filtered_data),
-    "Genre Popularity over Decades": GenrePopularityOverDecades(
-        app=app, data=filtered_data
-    ),
-    "Genre Ranking over Decades": GenreVoteAverageOverDecades(
-        app=app, data=filtered_data
-    ),
-    "Attribute Correlation Analysis": AttributeCorrelationScatter(
-        app=app, data=filtered_data
-    ),
-    "Adult Content Analysis": AdultContentAnalysis(app=app, data=filtered_data),
-    "Production Company Analysis": ProductionCompanyAnalysis(
-        app=app, data=filtered_data
-    ),
-    "Country Performance Analysis": CountryPerformanceAnalysis(
-        app=app, data=filtered_data
-    ),
+section_classes = {
+    "Overview": ItemAnalysis,
+    "Releases Per Decade": ReleaseDecadeBar,
+    "Biggest Genre over Decades": BiggestGenreChart,
+    "Genre Popularity over Decades": GenrePopularityOverDecades,
+    "Genre Ranking over Decades": GenreVoteAverageOverDecades,
+    "Attribute Correlation Analysis": AttributeCorrelationScatter,
+    "Correlation Matrix": CorrelationMatrix,
+    "Adult Content Analysis": AdultContentAnalysis,
+    "Production Company Analysis": ProductionCompanyAnalysis,
+    "Country Performance Analysis": CountryPerformanceAnalysis,
+    "Title Search": TitleSearch,
+    "Similar Movies": SimilarMovies,
+    "Movie Table": MovieTable,
 }
 
+
+def read_dataset(path: str) -> pd.DataFrame:
+    data = pd.read_csv(path).drop_duplicates()
+    data["release_date"] = pd.to_datetime(data["release_date"], errors="coerce")
+    return data
+
+
+def build_section(target: dash.Dash, data: pd.DataFrame, name: str, section_class):
+    # register_callbacks runs inside the constructor but only records the
+    # callbacks, build_sections times their registration on the app
+    with profiler.phase(f"{name}: constructor"), profiler.instrument(
+        section_class, "register_callbacks", f"{name}: record callbacks"
+    ):
+        return section_class(app=target, data=data)
+
+
+def load_snapshot(name: str, path: str, version: str) -> tuple:
+    """(Dash app with the section callbacks, dataset, sections) of one snapshot.
+
+    The default snapshot registers its callbacks on the main app when it is
+    first loaded, every other snapshot and every reload gets its own Dash
+    instance that the SnapshotRouter dispatches to.
+    """
+    target = app
+    # Rebuilt default snapshots also get their own instance, the main app
+    # keeps serving the current one until the swap
+    if name != DEFAULT_SNAPSHOT or name in registry.snapshots:
+        target = dash.Dash(__name__, suppress_callback_exceptions=True)
+
+    # Load and preprocess data, the parsed CSV comes from the frame cache
+    with profiler.phase("read_csv"):
+        data = cached_frame(path, read_dataset)
+
+    with profiler.phase("preprocessing"):
+        filtered_data, reports = preprocessing.run(data)
+        for report in reports:
+            profiler.record(f"preprocessing: {report.name}", report.seconds)
+        if profiler.enabled:
+            print(PreprocessingPipeline.report(reports))
+
+    # Add a decade column for analysis
+    with profiler.phase("derive: decade"):
+        filtered_data["decade"] = (filtered_data["release_date"].dt.year // 10) * 10
+
+    # Sections are independent and mostly NumPy/pandas work, so they are built
+    # on a thread pool; the profiler's phases need a sequential build
+    sections = build_sections(
+        target,
+        filtered_data,
+        section_classes,
+        build_section,
+        max_workers=1 if profiler.enabled else None,
+        phase=profiler.phase,
+        # Every section callback names the snapshot of its tab
+        state=State(SNAPSHOT_STORE, "data"),
+    )
+    return target, filtered_data, sections
+
+
+# Dataset snapshots: the default CSV plus every CSV in ./data/snapshots, loaded
+# on demand and evicted least recently used. The default stays loaded because
+# its callbacks live on the main app
+registry = DatasetRegistry(
+    discover_snapshots(DEFAULT_SNAPSHOT, DATA_PATH),
+    load_snapshot,
+    max_snapshots=3,
+    pinned=(DEFAULT_SNAPSHOT,),
+)
+# Loaded up front; not kept in a global so that a reload can free it
+registry.get(DEFAULT_SNAPSHOT)
+
+profiler.finish()
+
 # Sidebar Layout
 sidebar = dbc.Card(
     dbc.CardBody(
@@ -99,11 +168,20 @@ sidebar = dbc.Card(
             dbc.Nav(
                 [
                     dbc.NavLink(name, href=f"/{name.replace(' ', '_')}", active="exact")
-                    for name in sections.keys()
+                    for name in section_classes
                 ],
                 vertical=True,
                 pills=True,
             ),
+            html.Hr(),
+            # Dataset snapshot the sections are computed from
+            html.Label("Dataset"),
+            dcc.Dropdown(
+                id="dataset-snapshot",
+                options=registry.names(),
+                value=DEFAULT_SNAPSHOT,
+                clearable=False,
+            ),
         ]
     ),
     className="shadow",
@@ -146,28 +224,128 @@ welcome_message = dbc.Card(
 app.layout = html.Div(
     [
         dcc.Location(id="url"),  # Used to keep track of the URL
+        dcc.Store(id=SNAPSHOT_STORE),  # Snapshot of this tab, set after the cookie
         sidebar,  # Sidebar for navigation
         content,  # Dynamic content area
     ]
 )
 
 
-# Callback to update content based on URL
-@callback(Output("page-content", "children"), Input("url", "pathname"))
-def display_page(pathname):
-    # Extract tab name from URL
-    page_key = pathname.strip("/").replace("_", " ")
+# The tab's snapshot store tells the SnapshotRouter which sections answer its
+# callbacks; the cookie is kept for exports and the aggregate API
+@callback(Output(SNAPSHOT_STORE, "data"), Input("dataset-snapshot", "value"))
+def select_snapshot(snapshot):
+    dash.ctx.response.set_cookie(snapshot_router.cookie, snapshot)
+    return snapshot
 
+
+def page_key(pathname: str, snapshot: str) -> tuple:
+    # Extract tab name from URL, None for the welcome page
+    key = pathname.strip("/").replace("_", " ")
+    if key not in section_classes:
+        return (None,)
+    return (snapshot, registry.version(snapshot), key)
+
+
+def page_layout(key: tuple):
     # Show corresponding content if tab name exists in sections
-    if page_key in sections:
+    if key[0] is not None:
+        snapshot, _, page = key
+        _, _, snapshot_sections = registry.get(snapshot)
         return dbc.Card(
-            dbc.CardBody(sections[page_key].get_html()), className="shadow p-4"
+            dbc.CardBody(snapshot_sections[page].get_html()), className="shadow p-4"
         )
 
     # If no page selected, show welcome message
     return welcome_message
 
 
+# Callback to update content based on URL and the selected snapshot
+@callback(
+    Output("page-content", "children"),
+    Input("url", "pathname"),
+    Input(SNAPSHOT_STORE, "data"),
+)
+def display_page(pathname, snapshot):
+    return page_layout(page_key(pathname, snapshot or DEFAULT_SNAPSHOT))
+
+
+# Navigations are answered with the page JSON serialized once per snapshot version
+page_cache = PageCache(app, page_key, page_layout)
+registry.retire_hooks.append(page_cache.release)
+
+# Cached (and gzipped) bodies for callbacks that only depend on their
+# inputs and the dataset version. The title search reports its own timing and
+# is therefore left out
+response_cache = ResponseCache(
+    app, version=lambda: snapshot_router.current_version()
+).enable(
+    "..statistical-summary2.children...histogram.figure..",
+    "release-count-chart.figure",
+    "most-popular-genre-chart.figure",
+    "genre-distribution-chart.figure",
+    "..decade-dropdown-genre-popularity.options...decade-dropdown-genre-popularity.value..",
+    "decade-genre-ranking-chart.figure",
+    "genre-vote-trend-chart.figure",
+    "..genre-vote-period-a.options...genre-vote-period-a.value...genre-vote-period-b.options...genre-vote-period-b.value..",
+    "genre-vote-significance.children",
+    "attribute-scatter-graph.figure",
+    "correlation-heatmap.figure",
+    "correlation-pair-scatter.figure",
+    "..adult-content-bar-chart.figure...adult-content-significance.children..",
+    "production-company-dropdown.options",
+    "production-company-against-dropdown.options",
+    "..production-company-chart.figure...production-company-significance.children..",
+    "top-companies-chart.figure",
+    "company-timeline-chart.figure",
+    "company-comparison-dropdown.options",
+    "company-comparison-chart.figure",
+    "production-country-dropdown.options",
+    "production-country-against-dropdown.options",
+    "..production-country-chart.figure...production-country-significance.children..",
+    "top-countries-chart.figure",
+    "country-timeline-chart.figure",
+    "country-comparison-dropdown.options",
+    "country-comparison-chart.figure",
+    "similar-movies-dropdown.options",
+    "similar-movies-results.children",
+    "..movie-table.data...movie-table.page_count...movie-table-count.children..",
+)
+
+# Registered last: cached responses are served before a snapshot is loaded
+snapshot_router = SnapshotRouter(app, registry, DEFAULT_SNAPSHOT)
+registry.swap_hooks.append(snapshot_router.release)
+
+# Changed data files are rebuilt in the background and swapped in
+# (DASH_RELOAD_INTERVAL seconds between checks, 0 disables)
+reload_interval = float(os.environ.get("DASH_RELOAD_INTERVAL", "5"))
+if reload_interval > 0:
+    registry.watch(reload_interval)
+
+# Memory accounting of every loaded snapshot: /debug/memory and
+# /debug/memory.json, unauthenticated and therefore only with DASH_DEBUG_MEMORY=1
+if os.environ.get("DASH_DEBUG_MEMORY", "") not in ("", "0"):
+    memory_page = MemoryPage(
+        app,
+        lambda: {
+            name: (dataset, snapshot_sections)
+            for name, (_, dataset, snapshot_sections) in registry.values().items()
+        },
+        version=lambda: [(name, version) for name, version, _ in registry.loaded()],
+    )
+
+# Streaming CSV/Parquet download of a selection of the request's snapshot,
+# e.g. /export/movies.csv?company=Pixar&columns=title,revenue
+export_endpoint = ExportEndpoint(
+    app, lambda: registry.get(snapshot_router.current())[1]
+)
+
+# JSON aggregates for other services, e.g.
+# /api/aggregate?dimension=company&metric=revenue&agg=mean&min_count=5&top=10
+aggregate_api = AggregateApi(app, registry, snapshot_router.current)
+registry.retire_hooks.append(aggregate_api.release)
+
+
 # Run Server
 if __name__ == "__main__":
     app.run_server(debug=True)
@@ -0,0 +1,142 @@
+import numpy as np
+import pandas as pd
+
+from dataProcessing.categoricalEncoding import EncodedRelation
+from dataProcessing.lruCache import LRUCache
+
+
+class AggregateQuery:
+    """Group-by aggregates of one dataset, the numbers behind the dashboard.
+
+    Every dimension is an EncodedRelation of (movie row, group code) pairs:
+    genres, companies and countries are multi-valued, decade, year and
+    adult have one group per movie. A query is one bincount over the pairs
+    of its dimension, restricted by filters on any other dimension, so
+    "genre popularity in the 1990s", "top companies by revenue" and "adult
+    vs non-adult means" are all the same operation. Encodings are built on
+    first use, aggregates are cached per query.
+    """
+
+    dimensions = {
+        "genre": "genres",
+        "company": "production_companies",
+        "country": "production_countries",
+        "decade": "release_date",
+        "year": "release_date",
+        "adult": "adult",
+    }
+    list_dimensions = ("genre", "company", "country")
+    metrics = (
+        "revenue",
+        "budget",
+        "popularity",
+        "vote_average",
+        "vote_count",
+        "runtime",
+    )
+    # count is the number of movies per group and needs no metric
+    aggregations = ("count", "sum", "mean")
+
+    def __init__(self, data: pd.DataFrame, max_entries: int = 256) -> None:
+        self.data = data
+        self.size = len(data)
+        self.values = {
+            metric: data[metric].to_numpy(dtype=float)
+            for metric in self.metrics
+            if metric in data
+        }
+        self._relations = LRUCache(max_entries=len(self.dimensions))
+        self._aggregates = LRUCache(max_entries=max_entries)
+
+    def relation(self, dimension: str) -> EncodedRelation:
+        """(movie, group) pairs of a dimension, encoded on first use."""
+
+        def compute() -> EncodedRelation:
+            if dimension in self.list_dimensions:
+                return EncodedRelation.shared(self.data, self.dimensions[dimension])
+            column = self.data[self.dimensions[dimension]]
+            if dimension == "decade":
+                labels = column.dt.year // 10 * 10
+            elif dimension == "year":
+                labels = column.dt.year
+            else:
+                labels = column.astype(bool).map({True: "Adult", False: "Non-Adult"})
+            # Groups are labelled as strings, movies without a value are left out
+            valid = labels.notna().to_numpy()
+            labels = labels[valid]
+            if labels.dtype != object:
+                labels = labels.astype(np.int64)
+            codes, dictionary = pd.factorize(labels.astype(str), sort=True)
+            return EncodedRelation(
+                np.flatnonzero(valid).astype(np.int32),
+                codes.astype(np.int32),
+                pd.Index(dictionary),
+            )
+
+        return self._relations.get_or_compute(dimension, compute)
+
+    def filter_rows(self, filters: tuple) -> np.ndarray | None:
+        """Boolean row mask of ((dimension, (group names)), ...), None for all."""
+        if not filters:
+            return None
+        keep = np.ones(self.size, dtype=bool)
+        for dimension, names in filters:
+            relation = self.relation(dimension)
+            matched = np.zeros(self.size, dtype=bool)
+            for code in relation.codes_of(list(names)):
+                matched[relation.group_rows(code)] = True
+            keep &= matched
+        return keep
+
+    def aggregate(
+        self, dimension: str, metric: str | None, how: str, filters: tuple = ()
+    ) -> tuple:
+        """(movies per group, aggregate per group), both indexed by code."""
+
+        def compute() -> tuple:
+            relation = self.relation(dimension)
+            rows = self.filter_rows(filters)
+            pairs = None if rows is None else rows[relation.rows]
+            movies = (
+                relation.counts
+                if pairs is None
+                else np.bincount(
+                    relation.codes[pairs], minlength=len(relation.dictionary)
+                )
+            )
+            if how == "count":
+                return movies, movies.astype(float)
+            return movies, relation.aggregate(self.values[metric], how, pairs)
+
+        return self._aggregates.get_or_compute(
+            (dimension, metric, how, filters), compute
+        )
+
+    def query(
+        self,
+        dimension: str,
+        metric: str | None = None,
+        how: str = "mean",
+        filters: tuple = (),
+        min_count: int = 1,
+        top: int | None = None,
+        descending: bool = True,
+    ) -> list:
+        """[{name, value, count}] of the groups with at least `min_count` movies.
+
+        Ordered by value (missing values last), cut to the `top` first.
+        """
+        movies, values = self.aggregate(dimension, metric, how, filters)
+        codes = np.flatnonzero(movies >= max(min_count, 1))
+        keys = values[codes]
+        order = np.argsort(-keys if descending else keys, kind="stable")
+        codes = codes[order][:top]
+        names = self.relation(dimension).names(codes)
+        return [
+            {
+                "name": str(name),
+                "value": None if np.isnan(value) else float(value),
+                "count": int(count),
+            }
+            for name, value, count in zip(names, values[codes], movies[codes])
+        ]
@@ -0,0 +1,114 @@
+import itertools
+
+import numpy as np
+import pandas as pd
+
+from dataProcessing.columns import split_list_column
+from dataProcessing.dataCache import frame_fingerprint
+from dataProcessing.lruCache import LRUCache
+
+# Relations of the list columns of loaded datasets, see EncodedRelation.shared
+_relations = LRUCache(max_entries=16)
+
+
+class EncodedRelation:
+    """A multi-valued string column (movie -> companies) as integer codes.
+
+    Every (movie, name) pair is stored as `rows[i]` (movie row position) and
+    `codes[i]` (int32 index into one shared `dictionary` of names), so
+    filters, `isin` and group-bys are integer operations and every distinct
+    name string exists exactly once.
+    """
+
+    def __init__(
+        self, rows: np.ndarray, codes: np.ndarray, dictionary: pd.Index
+    ) -> None:
+        self.rows = rows
+        self.codes = codes
+        self.dictionary = dictionary
+        # Number of movies per name
+        self.counts = np.bincount(codes, minlength=len(dictionary))
+
+        # Pair positions grouped by code (CSR layout) for O(group) lookups
+        self.order = np.argsort(codes, kind="stable").astype(np.int32)
+        self.offsets = np.concatenate([[0], np.cumsum(self.counts)])
+
+    @classmethod
+    def from_column(cls, column: pd.Series) -> "EncodedRelation":
+        names = split_list_column(column)
+        rows = np.repeat(np.arange(len(column), dtype=np.int32), names.str.len())
+        codes, dictionary = pd.factorize(
+            pd.Series(list(itertools.chain.from_iterable(names)), dtype=object),
+            sort=True,
+        )
+        return cls(rows, codes.astype(np.int32), dictionary)
+
+    @classmethod
+    def shared(cls, data: pd.DataFrame, column: str) -> "EncodedRelation":
+        """The relation of `data[column]`, encoded once per dataset and column."""
+        key = (column, frame_fingerprint(data, [column]))
+        return _relations.get_or_compute(key, lambda: cls.from_column(data[column]))
+
+    def select(self, keep: np.ndarray) -> "EncodedRelation":
+        """Relation restricted to the names where the boolean `keep[code]` is set.
+
+        The dictionary is shared, codes keep their meaning.
+        """
+        pairs = keep[self.codes]
+        return EncodedRelation(self.rows[pairs], self.codes[pairs], self.dictionary)
+
+    def code(self, name: str) -> int:
+        """Code of `name`, or -1 if it is not in the dictionary."""
+        return int(self.dictionary.get_indexer([name])[0])
+
+    def codes_of(self, names: list) -> np.ndarray:
+        return self.dictionary.get_indexer(names).astype(np.int32)
+
+    def names(self, codes: np.ndarray) -> np.ndarray:
+        return self.dictionary.to_numpy()[codes]
+
+    def present_codes(self) -> np.ndarray:
+        return np.flatnonzero(self.counts)
+
+    def group_rows(self, code: int) -> np.ndarray:
+        """Movie row positions of one name."""
+        if code < 0:
+            return self.rows[:0]
+        return self.rows[self.order[self.offsets[code] : self.offsets[code + 1]]]
+
+    def exclusive_rows(self, code_a: int, code_b: int) -> tuple:
+        """Distinct movie rows of two names, without the movies they share.
+
+        The two samples are disjoint, so they can be tested as independent.
+        """
+        rows_a = np.unique(self.group_rows(code_a))
+        rows_b = np.unique(self.group_rows(code_b))
+        shared = np.intersect1d(rows_a, rows_b, assume_unique=True)
+        return (
+            np.setdiff1d(rows_a, shared, assume_unique=True),
+            np.setdiff1d(rows_b, shared, assume_unique=True),
+        )
+
+    def aggregate(
+        self, values: np.ndarray, how: str = "mean", pairs: np.ndarray | None = None
+    ) -> np.ndarray:
+        """Aggregate a per-movie value for every name at once (NaN values skipped).
+
+        Returns an array indexed by code; names without values get NaN.
+        `pairs` (a boolean mask over the pairs) restricts the movies counted.
+        """
+        rows, codes, movies = self.rows, self.codes, self.counts
+        n = len(self.dictionary)
+        if pairs is not None:
+            rows, codes = rows[pairs], codes[pairs]
+            movies = np.bincount(codes, minlength=n)
+        pair_values = values[rows]
+        finite = np.isfinite(pair_values)
+        counts = np.bincount(codes, weights=finite, minlength=n)
+        if how == "count":
+            return counts
+        sums = np.bincount(codes, weights=np.where(finite, pair_values, 0), minlength=n)
+        if how == "sum":
+            return np.where(movies > 0, sums, np.nan)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return sums / counts
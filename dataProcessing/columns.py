@@ -0,0 +1,22 @@
+import pandas as pd
+
+
+def split_list_column(series: pd.Series) -> pd.Series:
+    """Turn a comma separated column ("Action, Drama") into lists of names.
+
+    Values that were already split into lists by another section, or stored
+    as their string representation ("['Action', 'Drama']"), are accepted too.
+    """
+
+    def split(value) -> list:
+        if isinstance(value, list):
+            names = value
+        elif isinstance(value, str) and value.startswith("["):
+            names = value.strip("[]").replace("'", "").split(",")
+        elif isinstance(value, str):
+            names = value.split(",")
+        else:
+            return []
+        return [name.strip() for name in names if name and name.strip()]
+
+    return series.map(split)
@@ -0,0 +1,49 @@
+import hashlib
+import os
+
+import numpy as np
+import pandas as pd
+
+# Derived artifacts live next to the dataset so they survive restarts
+CACHE_DIR = "./data/cache"
+
+
+def array_fingerprint(*arrays: np.ndarray) -> str:
+    """Short content hash of one or more arrays, used as a cache key."""
+    digest = hashlib.blake2b(digest_size=12)
+    for array in arrays:
+        array = np.ascontiguousarray(array)
+        digest.update(str((array.dtype, array.shape)).encode())
+        digest.update(array.tobytes())
+    return digest.hexdigest()
+
+
+def file_fingerprint(path: str) -> str:
+    """Version of a file on disk, cheap enough to check on every start."""
+    stat = os.stat(path)
+    key = f"{os.path.abspath(path)}:{stat.st_size}:{stat.st_mtime_ns}"
+    return hashlib.blake2b(key.encode(), digest_size=12).hexdigest()
+
+
+def cache_path(name: str, key: str, suffix: str) -> str:
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    return os.path.join(CACHE_DIR, f"{name}-{key}{suffix}")
+
+
+def frame_fingerprint(data: pd.DataFrame, columns: list) -> str:
+    """Dataset version of `columns`, changes whenever one of their values does."""
+    hashes = pd.util.hash_pandas_object(data[columns], index=False)
+    return array_fingerprint(hashes.to_numpy())
+
+
+def cached_frame(path: str, parse) -> pd.DataFrame:
+    """`parse(path)`, cached as a pickled frame (column blocks) per file version.
+
+    Loading the pickle skips CSV parsing and date conversion entirely.
+    """
+    cached = cache_path("frame", file_fingerprint(path), ".pkl")
+    if os.path.exists(cached):
+        return pd.read_pickle(cached)
+    data = parse(path)
+    data.to_pickle(cached)
+    return data
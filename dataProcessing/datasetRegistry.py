@@ -0,0 +1,231 @@
+import glob
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from dataProcessing.dataCache import file_fingerprint
+from dataProcessing.memoryUsage import deep_size
+
+# Additional snapshots (other export dates, regional subsets) are CSV files here
+SNAPSHOT_DIR = "./data/snapshots"
+
+
+def discover_snapshots(
+    default_name: str, default_path: str, directory: str = SNAPSHOT_DIR
+) -> dict:
+    """{snapshot name: CSV path}, the default snapshot first."""
+    snapshots = {default_name: default_path}
+    for path in sorted(glob.glob(os.path.join(directory, "*.csv"))):
+        name = os.path.splitext(os.path.basename(path))[0].replace("_", " ")
+        snapshots.setdefault(name, path)
+    return snapshots
+
+
+class Snapshot:
+    def __init__(self, name: str, version: str, value, nbytes: int) -> None:
+        self.name = name
+        self.version = version
+        self.value = value
+        self.nbytes = nbytes
+
+
+class DatasetRegistry:
+    """Named dataset snapshots, loaded on demand and kept in an LRU.
+
+    `load(name, path, version)` builds whatever a snapshot needs (data and
+    derived aggregates); its measured footprint counts towards `max_bytes`.
+    At most `max_snapshots` are kept, least recently used ones are evicted
+    first, pinned snapshots never.
+
+    With `watch()` running, changed files are rebuilt in the background and
+    the loaded snapshot is swapped in one step: requests that already hold
+    the old value finish on it, later ones get the new one, and the old
+    value is freed once nothing references it anymore.
+    """
+
+    def __init__(
+        self,
+        paths: dict,
+        load,
+        max_snapshots: int = 3,
+        max_bytes: int = 2 * 2**30,
+        pinned: tuple = (),
+    ) -> None:
+        self.paths = paths
+        self.load = load
+        self.max_snapshots = max_snapshots
+        self.max_bytes = max_bytes
+        self.pinned = pinned
+        self.snapshots = OrderedDict()
+        self.swap_hooks = []  # hook(name, old value, new value) after a swap
+        # hook(name, version) once a loaded version is evicted or replaced
+        self.retire_hooks = []
+        # Guards `snapshots`, never held while a snapshot loads
+        self._lock = threading.Lock()
+        # One load per snapshot at a time; other snapshots keep being served
+        self._load_locks = {}
+        self._watcher = None
+
+    def names(self) -> list:
+        return list(self.paths)
+
+    def version(self, name: str) -> str:
+        """Version requests are answered from: the loaded one, else the file's.
+
+        Caches key on this, so they never store old content under the
+        version of a file that is still being rebuilt.
+        """
+        snapshot = self.snapshots.get(name)
+        if snapshot is not None:
+            return snapshot.version
+        return file_fingerprint(self.paths[name])
+
+    def load_lock(self, name: str) -> threading.Lock:
+        with self._lock:
+            return self._load_locks.setdefault(name, threading.Lock())
+
+    def _serving(self, name: str) -> Snapshot | None:
+        """The loaded snapshot if requests may be answered from it.
+
+        Without a watcher, a snapshot whose file changed is stale; with one,
+        it is served until the rebuilt one is swapped in.
+        """
+        snapshot = self.snapshots.get(name)
+        if snapshot is not None and (
+            self._watcher is not None
+            or snapshot.version == file_fingerprint(self.paths[name])
+        ):
+            return snapshot
+        return None
+
+    def get(self, name: str):
+        """The loaded value of a snapshot, loading (and evicting) if needed.
+
+        The registry lock is only held for lookups and bookkeeping, so a
+        load never blocks requests on snapshots that are already loaded.
+        """
+        with self._lock:
+            snapshot = self._serving(name)
+            if snapshot is not None:
+                self.snapshots.move_to_end(name)
+                return snapshot.value
+
+        with self.load_lock(name):
+            # Another request may have loaded it while this one waited
+            with self._lock:
+                snapshot = self._serving(name)
+                if snapshot is not None:
+                    self.snapshots.move_to_end(name)
+                    return snapshot.value
+
+            version = file_fingerprint(self.paths[name])
+            value = self.load(name, self.paths[name], version)
+            replacement = Snapshot(name, version, value, deep_size(value))
+            with self._lock:
+                previous = self.snapshots.get(name)
+                self.snapshots[name] = replacement
+                self.snapshots.move_to_end(name)
+                evicted = self.evict(keep=name)
+        if previous is not None:
+            self.swapped(name, previous.value, value)
+            evicted.append(previous)
+        self.retired(evicted)
+        return value
+
+    def refresh(self, name: str) -> bool:
+        """Rebuild a loaded snapshot whose file changed and swap it in.
+
+        The rebuild runs without blocking requests, they keep being served
+        from the current snapshot until the swap.
+        """
+        with self.load_lock(name):
+            current = self.snapshots.get(name)
+            if current is None:
+                return False
+            version = file_fingerprint(self.paths[name])
+            if version == current.version:
+                return False
+
+            value = self.load(name, self.paths[name], version)
+            replacement = Snapshot(name, version, value, deep_size(value))
+            with self._lock:
+                # Evicted while rebuilding: the next request loads it again
+                if self.snapshots.get(name) is not current:
+                    return False
+                self.snapshots[name] = replacement
+                evicted = self.evict(keep=name)
+        self.swapped(name, current.value, value)
+        self.retired([*evicted, current])
+        return True
+
+    def swapped(self, name: str, old, new) -> None:
+        for hook in self.swap_hooks:
+            hook(name, old, new)
+
+    def retired(self, snapshots: list) -> None:
+        for snapshot in snapshots:
+            for hook in self.retire_hooks:
+                hook(snapshot.name, snapshot.version)
+
+    def watch(self, interval: float = 5.0) -> threading.Thread:
+        """Poll the files of the loaded snapshots every `interval` seconds."""
+
+        def poll() -> None:
+            failed = {}  # name -> file version whose rebuild failed
+            while True:
+                time.sleep(interval)
+                with self._lock:
+                    names = list(self.snapshots)
+                for name in names:
+                    version = None
+                    try:
+                        version = file_fingerprint(self.paths[name])
+                        if name in failed and failed[name] == version:
+                            continue
+                        self.refresh(name)
+                    except Exception:
+                        # E.g. a file caught mid-write or missing, retried once
+                        # it changes; every failure is logged once
+                        if name not in failed or failed[name] != version:
+                            logging.getLogger(__name__).exception(
+                                "Reloading snapshot %s failed", name
+                            )
+                        failed[name] = version
+
+        self._watcher = threading.Thread(
+            target=poll, name="snapshot-watcher", daemon=True
+        )
+        self._watcher.start()
+        return self._watcher
+
+    def evict(self, keep: str) -> list:
+        """Drop least recently used snapshots over the limits, return them."""
+        evicted = []
+        evictable = [
+            name for name in self.snapshots if name not in (*self.pinned, keep)
+        ]
+        for name in evictable:
+            if (
+                len(self.snapshots) <= self.max_snapshots
+                and self.memory() <= self.max_bytes
+            ):
+                break
+            evicted.append(self.snapshots.pop(name))
+        return evicted
+
+    def memory(self) -> int:
+        return sum(snapshot.nbytes for snapshot in self.snapshots.values())
+
+    def values(self) -> dict:
+        """{name: loaded value} of the snapshots in memory."""
+        with self._lock:
+            return {name: snapshot.value for name, snapshot in self.snapshots.items()}
+
+    def loaded(self) -> list:
+        """(name, version, bytes) of the snapshots in memory, oldest use first."""
+        return [
+            (snapshot.name, snapshot.version, snapshot.nbytes)
+            for snapshot in self.snapshots.values()
+        ]
@@ -0,0 +1,78 @@
+import numpy as np
+
+
+def silverman_bandwidth(values: np.ndarray) -> float:
+    """Silverman's rule of thumb, robust to heavy tails through the IQR."""
+    n = len(values)
+    if n < 2:
+        return 1.0
+    q75, q25 = np.percentile(values, [75, 25])
+    spread = min(np.std(values, ddof=1), (q75 - q25) / 1.34)
+    if spread <= 0:
+        spread = np.std(values, ddof=1) or 1.0
+    return 0.9 * spread * n ** (-1 / 5)
+
+
+def binned_kde(values, grid_size: int = 512, bandwidth: float | None = None) -> tuple:
+    """Gaussian kernel density estimate on a regular grid: (grid, density).
+
+    The values are linearly binned onto `grid_size` points (each value split
+    between its two neighbouring grid points) and the bin weights are
+    convolved with the sampled kernel through the FFT, so the cost is
+    O(n + grid log grid) instead of O(n * grid). Non-finite values are
+    dropped. The sampled kernel is renormalized to unit mass, so the density
+    integrates to one over the grid even when the bandwidth is narrower
+    than the grid spacing (heavy tails spread the grid thin):
+
+    >>> values = np.random.default_rng(0).lognormal(0, 3, 100_000)
+    >>> grid, density = binned_kde(values)
+    >>> round(float(np.trapezoid(density, grid)), 2)
+    1.0
+    """
+    values = np.asarray(values, dtype=float)
+    values = values[np.isfinite(values)]
+    if len(values) == 0:
+        return np.array([]), np.array([])
+    h = bandwidth or silverman_bandwidth(values)
+
+    # Grid reaching 3 bandwidths past the data, and at least 2 grid steps so
+    # no mass sits on the end points
+    margin = max(3 * h, 2 * np.ptp(values) / max(grid_size - 5, 1))
+    low, high = values.min() - margin, values.max() + margin
+    grid = np.linspace(low, high, grid_size)
+    delta = grid[1] - grid[0]
+
+    # Linear binning
+    position = (values - low) / delta
+    left = np.clip(np.floor(position).astype(np.int64), 0, grid_size - 2)
+    right_weight = position - left
+    weights = np.bincount(left, weights=1 - right_weight, minlength=grid_size)
+    weights += np.bincount(left + 1, weights=right_weight, minlength=grid_size)
+
+    # Kernel sampled at the grid spacing, truncated at 4 bandwidths
+    reach = min(grid_size - 1, int(np.ceil(4 * h / delta)))
+    offsets = np.arange(-reach, reach + 1) * delta
+    kernel = np.exp(-0.5 * (offsets / h) ** 2)
+    kernel /= kernel.sum() * delta
+
+    # Linear convolution through zero-padded FFTs
+    size = 1 << int(np.ceil(np.log2(grid_size + 2 * reach + 1)))
+    density = np.fft.irfft(
+        np.fft.rfft(weights, size) * np.fft.rfft(kernel, size), size
+    )[reach : reach + grid_size]
+    density = np.maximum(density, 0) / len(values)
+    return grid, density
+
+
+def density_curve(values, space: str = "linear", grid_size: int = 512) -> tuple:
+    """KDE of `values` in linear space, or of log10 of the positive values.
+
+    Returns (grid, density, values used), all in the chosen space, so the
+    caller can draw the matching histogram.
+    """
+    values = np.asarray(values, dtype=float)
+    values = values[np.isfinite(values)]
+    if space == "log":
+        values = np.log10(values[values > 0])
+    grid, density = binned_kde(values, grid_size)
+    return grid, density, values
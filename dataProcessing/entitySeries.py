@@ -0,0 +1,95 @@
+import numpy as np
+import pandas as pd
+
+from dataProcessing.categoricalEncoding import EncodedRelation
+
+
+class EntitySeries:
+    """Per-name x release period series of an encoded relation.
+
+    One bincount per measure over the (movie, name) pairs fills dense
+    (name, period) matrices of movie counts, revenue sums and means, rating
+    means and the cumulative counts and revenue. Periods span the first to
+    the last release without gaps, so the series of a name is a row slice
+    and the series of several names a fancy-indexed block.
+    """
+
+    granularities = ["year", "decade"]
+    measures = {
+        "count": "Movies",
+        "revenue_sum": "Total Revenue",
+        "revenue_mean": "Average Revenue",
+        "vote_average_mean": "Average Vote",
+        "cumulative_count": "Movies (cumulative)",
+        "cumulative_revenue": "Total Revenue (cumulative)",
+    }
+
+    def __init__(self, relation: EncodedRelation, data: pd.DataFrame) -> None:
+        # Matrix row of every name with movies, -1 for the others
+        self.codes = relation.present_codes()
+        position = np.full(len(relation.dictionary), -1)
+        position[self.codes] = np.arange(len(self.codes))
+        self.names = pd.Index(relation.names(self.codes))
+
+        release_year = data["release_date"].dt.year
+        valid = release_year.notna().to_numpy()[relation.rows]
+        rows = relation.rows[valid]
+        name_index = position[relation.codes[valid]]
+        year = release_year.to_numpy(dtype=float)[rows].astype(np.int64)
+        revenue = data["revenue"].to_numpy(dtype=float)[rows]
+        vote_average = data["vote_average"].to_numpy(dtype=float)[rows]
+
+        self.periods = {}
+        self.matrices = {}
+        for granularity in self.granularities:
+            step = 10 if granularity == "decade" else 1
+            bucket = year // step * step
+            periods = (
+                np.arange(bucket.min(), bucket.max() + 1, step)
+                if len(bucket)
+                else np.array([], dtype=np.int64)
+            )
+            shape = (len(self.codes), len(periods))
+            start = periods[0] if len(periods) else 0
+            cells = name_index * len(periods) + (bucket - start) // step
+
+            def total(weights=None) -> np.ndarray:
+                return np.bincount(
+                    cells, weights=weights, minlength=shape[0] * shape[1]
+                ).reshape(shape)
+
+            def mean(values: np.ndarray) -> np.ndarray:
+                finite = np.isfinite(values)
+                with np.errstate(invalid="ignore", divide="ignore"):
+                    return total(np.where(finite, values, 0)) / total(finite)
+
+            count = total()
+            revenue_sum = total(np.nan_to_num(revenue))
+            self.periods[granularity] = periods
+            self.matrices[granularity] = {
+                "count": count,
+                "revenue_sum": revenue_sum,
+                "revenue_mean": mean(revenue),
+                "vote_average_mean": mean(vote_average),
+                "cumulative_count": np.cumsum(count, axis=1),
+                "cumulative_revenue": np.cumsum(revenue_sum, axis=1),
+            }
+
+    def series(self, names: list, granularity: str, measure: str) -> np.ndarray:
+        """(name, period) block of `measure`; unknown names get NaN rows."""
+        positions = self.names.get_indexer(names)
+        block = self.matrices[granularity][measure][positions].astype(float)
+        block[positions < 0] = np.nan
+        return block
+
+    def frame(self, names: list, granularity: str, measure: str) -> pd.DataFrame:
+        """Long table (name, period, value) of the series of `names`."""
+        block = self.series(names, granularity, measure)
+        periods = self.periods[granularity]
+        return pd.DataFrame(
+            {
+                "name": np.repeat(np.asarray(names, dtype=object), len(periods)),
+                "period": np.tile(periods, len(names)),
+                measure: block.ravel(),
+            }
+        )
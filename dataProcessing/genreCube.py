@@ -0,0 +1,224 @@
+import numpy as np
+import pandas as pd
+
+from dataProcessing.categoricalEncoding import EncodedRelation
+from dataProcessing.dataCache import frame_fingerprint
+from dataProcessing.lruCache import LRUCache
+from dataProcessing.timeRollups import TimeRollup
+
+# Cubes are shared by all genre sections built from the same dataset
+_cubes = LRUCache(max_entries=4)
+
+
+def bucket_of(granularity: str, months: np.ndarray) -> np.ndarray:
+    """Period code (as in TimeRollup) of month codes `year * 12 + month - 1`."""
+    years = months // 12
+    if granularity == "month":
+        return months
+    if granularity == "quarter":
+        return years * 4 + months % 12 // 3
+    if granularity == "year":
+        return years
+    if granularity == "5 years":
+        return years // 5 * 5
+    return years // 10 * 10
+
+
+class GenreCube:
+    """Genre x release month cube of count, sum and sum of squares per measure.
+
+    Built in one pass over the (movie, genre) pairs. Every coarser period
+    (quarter up to decade) and any release year cutoff is a roll-up of the
+    month cells, so views read counts, totals, means and standard deviations
+    without touching the movies again. The pairs are kept sorted by (genre,
+    month), so the movies of any rolled-up cell are one contiguous range,
+    which is what medians and bootstrap intervals use.
+    """
+
+    measures = ("popularity", "vote_average", "revenue", "budget", "vote_count")
+    # Products of two measures, summed per cell like the measures themselves
+    products = {"vote_points": ("vote_count", "vote_average")}
+    granularities = TimeRollup.granularities
+
+    def __init__(self, data: pd.DataFrame, genre_column: str = "genres") -> None:
+        release_date = data["release_date"]
+        valid = release_date.notna().to_numpy()
+        year = release_date.dt.year.fillna(0).to_numpy(dtype=np.int64)
+        month = release_date.dt.month.fillna(1).to_numpy(dtype=np.int64)
+        month_codes = year * 12 + month - 1
+
+        # Months with at least one movie, also those without genres
+        self.months = np.unique(month_codes[valid])
+        month_index = np.searchsorted(self.months, month_codes)
+
+        self.genres = EncodedRelation.shared(data, genre_column)
+        self.genre_names = self.genres.dictionary
+        pairs = valid[self.genres.rows]
+        rows = self.genres.rows[pairs]
+        n_genres, n_months = len(self.genre_names), len(self.months)
+
+        # Genre-major cell code: a genre's months are adjacent
+        cells = self.genres.codes[pairs].astype(np.int64) * n_months + month_index[rows]
+        order = np.argsort(cells, kind="stable")
+        self.rows = rows[order]
+        self.cells = cells[order]
+        counts = np.bincount(cells, minlength=n_genres * n_months)
+        self.offsets = np.concatenate([[0], np.cumsum(counts)])
+
+        # (genre, month) matrices of count, sum and sum of squares
+        shape = (n_genres, n_months)
+        self.count = counts.reshape(shape)
+        self.values = {}
+        self.sums = {}
+        self.sumsq = {}
+        for measure in self.measures:
+            self.values[measure] = np.nan_to_num(data[measure].to_numpy(dtype=float))
+        for product, (left, right) in self.products.items():
+            self.values[product] = self.values[left] * self.values[right]
+        for measure, values in self.values.items():
+            pair_values = values[self.rows]
+            self.sums[measure] = np.bincount(
+                self.cells, weights=pair_values, minlength=counts.size
+            ).reshape(shape)
+            self.sumsq[measure] = np.bincount(
+                self.cells, weights=pair_values**2, minlength=counts.size
+            ).reshape(shape)
+
+        self._rollups = LRUCache(max_entries=32)
+        self._medians = LRUCache(max_entries=32)
+
+    @classmethod
+    def shared(cls, data: pd.DataFrame, genre_column: str = "genres") -> "GenreCube":
+        """The cube of `data`, built once and reused by every section."""
+        key = frame_fingerprint(data, ["release_date", genre_column, *cls.measures])
+        return _cubes.get_or_compute(key, lambda: cls(data, genre_column))
+
+    def month_ranges(self, granularity: str, before_year: int | None = None) -> tuple:
+        """(period codes, first month index, end month index) of every period."""
+        months = self.months
+        if before_year is not None:
+            months = months[months < before_year * 12]
+        buckets = bucket_of(granularity, months)
+        starts = np.flatnonzero(np.r_[True, buckets[1:] != buckets[:-1]])
+        ends = np.r_[starts[1:], len(months)]
+        return buckets[starts], starts, ends
+
+    def rollup(self, granularity: str, before_year: int | None = None) -> dict:
+        """Period codes and (genre, period) count/sum/sumsq matrices."""
+
+        def compute() -> dict:
+            buckets, starts, ends = self.month_ranges(granularity, before_year)
+
+            def roll(matrix: np.ndarray) -> np.ndarray:
+                if len(starts) == 0:
+                    return matrix[:, :0]
+                return np.add.reduceat(matrix[:, : ends[-1]], starts, axis=1)
+
+            return {
+                "buckets": buckets,
+                "count": roll(self.count),
+                "sums": {measure: roll(sums) for measure, sums in self.sums.items()},
+                "sumsq": {
+                    measure: roll(sumsq) for measure, sumsq in self.sumsq.items()
+                },
+            }
+
+        return self._rollups.get_or_compute((granularity, before_year), compute)
+
+    def periods(self, granularity: str, before_year: int | None = None) -> pd.DataFrame:
+        """bucket and label of every period with at least one movie."""
+        buckets = self.rollup(granularity, before_year)["buckets"]
+        return pd.DataFrame(
+            {"bucket": buckets, "label": TimeRollup.labels(granularity, buckets)}
+        )
+
+    def table(
+        self,
+        granularity: str,
+        before_year: int | None = None,
+        medians: tuple = (),
+    ) -> pd.DataFrame:
+        """One row per (period, genre) with movies.
+
+        Columns: bucket, label, genres, count and per measure `_sum`,
+        `_mean` and `_std` (sample standard deviation), plus `_median` for
+        the measures in `medians`.
+        """
+        rollup = self.rollup(granularity, before_year)
+        count = rollup["count"]
+        # Period-major order, like a groupby on (period, genre)
+        periods, genre_codes = np.nonzero(count.T)
+        n = count[genre_codes, periods]
+        buckets = rollup["buckets"][periods]
+        table = pd.DataFrame(
+            {
+                "bucket": buckets,
+                "label": TimeRollup.labels(granularity, buckets),
+                "genres": self.genre_names[genre_codes],
+                "count": n,
+            }
+        )
+        for measure in self.measures:
+            sums = rollup["sums"][measure][genre_codes, periods]
+            sumsq = rollup["sumsq"][measure][genre_codes, periods]
+            mean = sums / n
+            with np.errstate(invalid="ignore", divide="ignore"):
+                variance = np.maximum(sumsq - n * mean**2, 0) / (n - 1)
+            table[f"{measure}_sum"] = sums
+            table[f"{measure}_mean"] = mean
+            table[f"{measure}_std"] = np.where(n > 1, np.sqrt(variance), np.nan)
+        for measure in medians:
+            table[f"{measure}_median"] = self.medians(
+                granularity, measure, before_year
+            )[genre_codes, periods]
+        return table
+
+    def cell_rows(
+        self, granularity: str, genre: str, bucket: int, before_year=None
+    ) -> np.ndarray:
+        """Row positions of the movies of `genre` released in period `bucket`."""
+        buckets, starts, ends = self.month_ranges(granularity, before_year)
+        period = np.searchsorted(buckets, bucket)
+        genre_code = self.genres.code(genre)
+        if period == len(buckets) or buckets[period] != bucket or genre_code < 0:
+            return self.rows[:0]
+        base = genre_code * len(self.months)
+        return self.rows[
+            self.offsets[base + starts[period]] : self.offsets[base + ends[period]]
+        ]
+
+    def medians(
+        self, granularity: str, measure: str, before_year: int | None = None
+    ) -> np.ndarray:
+        """(genre, period) matrix of medians, from one sort of the pairs."""
+
+        def compute() -> np.ndarray:
+            count = self.rollup(granularity, before_year)["count"]
+            n_genres, n_periods = count.shape
+            _, starts, ends = self.month_ranges(granularity, before_year)
+
+            # Rolled-up cell of every pair (-1 if cut off), pairs sorted by
+            # (cell, value) so each cell's values are an ordered range
+            period_of_month = np.full(len(self.months), -1)
+            period_of_month[: len(starts) and ends[-1]] = np.repeat(
+                np.arange(n_periods), ends - starts
+            )
+            genre_codes, month_index = np.divmod(self.cells, len(self.months))
+            periods = period_of_month[month_index]
+            keep = periods >= 0
+            cells = genre_codes[keep] * n_periods + periods[keep]
+            values = self.values[measure][self.rows[keep]]
+            values = values[np.lexsort((values, cells))]
+
+            n = count.ravel()
+            offsets = np.concatenate([[0], np.cumsum(n)])[:-1]
+            low = offsets + np.maximum(n - 1, 0) // 2
+            high = offsets + n // 2
+            medians = np.full(n.size, np.nan)
+            occupied = n > 0
+            medians[occupied] = (values[low[occupied]] + values[high[occupied]]) / 2
+            return medians.reshape(n_genres, n_periods)
+
+        return self._medians.get_or_compute(
+            (granularity, measure, before_year), compute
+        )
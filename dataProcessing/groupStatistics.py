@@ -0,0 +1,116 @@
+import numpy as np
+from scipy import stats
+
+from dataProcessing.lruCache import LRUCache
+
+
+def finite_values(values) -> np.ndarray:
+    values = np.asarray(values, dtype=float)
+    return values[np.isfinite(values)]
+
+
+def bootstrap_mean_ci(
+    values,
+    n_resamples: int = 1000,
+    confidence: float = 0.95,
+    seed: int = 0,
+    max_sample: int = 2000,
+) -> tuple:
+    """Percentile bootstrap confidence interval of the mean.
+
+    Resamples are drawn as one index matrix (resamples x n) and averaged
+    row wise. Groups larger than `max_sample` are bootstrapped on a random
+    subsample whose resampled means are scaled around the full mean by
+    sqrt(sample / n), since the spread of a mean shrinks with the square
+    root of the group size. So the cost stays bounded for large groups.
+    """
+    values = finite_values(values)
+    n = len(values)
+    if n == 0:
+        return np.nan, np.nan
+    if n == 1:
+        return values[0], values[0]
+
+    rng = np.random.default_rng(seed)
+    sample = values
+    if n > max_sample:
+        sample = rng.choice(values, max_sample, replace=False)
+    means = sample[rng.integers(0, len(sample), size=(n_resamples, len(sample)))].mean(
+        axis=1
+    )
+    means = values.mean() + (means - sample.mean()) * np.sqrt(len(sample) / n)
+    alpha = (1 - confidence) / 2
+    low, high = np.quantile(means, [alpha, 1 - alpha])
+    return low, high
+
+
+def welch_ttest(a, b) -> tuple:
+    """(t statistic, p-value) of Welch's unequal-variance t-test."""
+    a, b = finite_values(a), finite_values(b)
+    if len(a) < 2 or len(b) < 2:
+        return np.nan, np.nan
+    result = stats.ttest_ind(a, b, equal_var=False)
+    return result.statistic, result.pvalue
+
+
+def mann_whitney(a, b) -> tuple:
+    """(U statistic, p-value) of the two-sided Mann-Whitney U test."""
+    a, b = finite_values(a), finite_values(b)
+    if len(a) == 0 or len(b) == 0:
+        return np.nan, np.nan
+    result = stats.mannwhitneyu(a, b, alternative="two-sided")
+    return result.statistic, result.pvalue
+
+
+class GroupStatistics:
+    """Cached confidence intervals and significance tests for groups.
+
+    Groups are identified by hashable keys chosen by the caller; values are
+    passed as zero-argument callables so cache hits never touch the data.
+    """
+
+    def __init__(
+        self, n_resamples: int = 1000, confidence: float = 0.95, max_entries: int = 4096
+    ) -> None:
+        self.n_resamples = n_resamples
+        self.confidence = confidence
+        self.cache = LRUCache(max_entries=max_entries)
+
+    def mean_ci(self, key, get_values) -> dict:
+        def compute() -> dict:
+            values = finite_values(get_values())
+            low, high = bootstrap_mean_ci(values, self.n_resamples, self.confidence)
+            mean = values.mean() if len(values) else np.nan
+            return {"mean": mean, "low": low, "high": high, "n": len(values)}
+
+        return self.cache.get_or_compute(("ci", key), compute)
+
+    def compare(self, key_a, get_a, key_b, get_b) -> dict:
+        def compute() -> dict:
+            a, b = get_a(), get_b()
+            t_statistic, t_pvalue = welch_ttest(a, b)
+            u_statistic, u_pvalue = mann_whitney(a, b)
+            return {
+                "t": t_statistic,
+                "t_pvalue": t_pvalue,
+                "u": u_statistic,
+                "u_pvalue": u_pvalue,
+            }
+
+        return self.cache.get_or_compute(("compare", key_a, key_b), compute)
+
+    def error_bars(self, keys_and_getters) -> tuple:
+        """Means and (upper, lower) error bar lengths for several groups."""
+        intervals = [self.mean_ci(key, get) for key, get in keys_and_getters]
+        means = np.array([ci["mean"] for ci in intervals])
+        upper = np.array([ci["high"] for ci in intervals]) - means
+        lower = means - np.array([ci["low"] for ci in intervals])
+        return means, upper, lower
+
+
+def describe_comparison(result: dict, label_a: str, label_b: str) -> str:
+    return (
+        f"{label_a} vs. {label_b}: Welch t = {result['t']:.2f} "
+        f"(p = {result['t_pvalue']:.3g}), Mann-Whitney U = {result['u']:.0f} "
+        f"(p = {result['u_pvalue']:.3g})"
+    )
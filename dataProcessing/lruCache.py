@@ -0,0 +1,73 @@
+import threading
+from collections import OrderedDict
+
+
+class LRUCache:
+    """Small thread-safe least-recently-used cache keyed by hashable tuples.
+
+    With `max_bytes`, the entries' total `sizeof(value)` is bounded too;
+    a value larger than the whole budget is not stored.
+    """
+
+    def __init__(
+        self, max_entries: int = 128, max_bytes: int | None = None, sizeof=None
+    ) -> None:
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.sizeof = sizeof
+        self.nbytes = 0
+        self._entries = OrderedDict()
+        self._sizes = {}
+        self._lock = threading.Lock()
+
+    def get_or_compute(self, key, compute):
+        """Return the cached value for `key`, computing and storing it if missing."""
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                return self._entries[key]
+
+        # Compute outside the lock, concurrent misses just compute twice
+        value = compute()
+        self.put(key, value)
+        return value
+
+    def get(self, key, default=None):
+        with self._lock:
+            if key not in self._entries:
+                return default
+            self._entries.move_to_end(key)
+            return self._entries[key]
+
+    def put(self, key, value) -> None:
+        size = self.sizeof(value) if self.max_bytes is not None else 0
+        with self._lock:
+            if key in self._entries:
+                del self._entries[key]
+                self.nbytes -= self._sizes.pop(key)
+            if self.max_bytes is not None and size > self.max_bytes:
+                return
+            self._entries[key] = value
+            self._sizes[key] = size
+            self.nbytes += size
+            while len(self._entries) > self.max_entries or (
+                self.max_bytes is not None and self.nbytes > self.max_bytes
+            ):
+                evicted, _ = self._entries.popitem(last=False)
+                self.nbytes -= self._sizes.pop(evicted)
+
+    def discard(self, match) -> None:
+        """Drop every entry whose key satisfies `match(key)`."""
+        with self._lock:
+            for key in [key for key in self._entries if match(key)]:
+                del self._entries[key]
+                self.nbytes -= self._sizes.pop(key)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._sizes.clear()
+            self.nbytes = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
@@ -0,0 +1,199 @@
+import hashlib
+import os
+import sys
+import types
+
+import dash
+import numpy as np
+import pandas as pd
+
+# Arrays at least this large are hashed to find duplicated content
+DUPLICATE_MIN_BYTES = 64 * 2**10
+
+
+def root_array(array: np.ndarray) -> np.ndarray:
+    """The array owning the buffer a view points into."""
+    while isinstance(array.base, np.ndarray):
+        array = array.base
+    return array
+
+
+def frame_arrays(value) -> list:
+    """Root arrays backing the columns (and index) of a frame, series or index."""
+    if isinstance(value, pd.DataFrame):
+        columns = [value[column] for column in value.columns]
+        columns = [column for column in columns if isinstance(column, pd.Series)]
+        return [*frame_arrays(value.index)] + [
+            array for column in columns for array in frame_arrays(column)
+        ]
+    if isinstance(value, pd.RangeIndex):
+        return []
+    values = value.values
+    return [root_array(values)] if isinstance(values, np.ndarray) else []
+
+
+def deep_size(value, seen: set | None = None) -> int:
+    """Approximate bytes held by `value` and everything it references.
+
+    Objects already in `seen` (ids) are not counted again, so shared frames
+    and arrays are only counted once across several calls.
+    """
+    seen = set() if seen is None else seen
+    if id(value) in seen or isinstance(
+        value, (type, types.ModuleType, types.FunctionType, dash.Dash)
+    ):
+        return 0
+    seen.add(id(value))
+
+    if isinstance(value, np.ndarray):
+        # Views share the buffer of their base array
+        base = root_array(value)
+        if base is not value:
+            return deep_size(base, seen)
+        if value.dtype == object:
+            return value.nbytes + sum(deep_size(item, seen) for item in value.ravel())
+        return value.nbytes
+    if isinstance(value, (pd.DataFrame, pd.Series, pd.Index)):
+        # Arrays taken from the frame later on are views of these buffers
+        seen.update(id(array) for array in frame_arrays(value))
+        return int(np.sum(value.memory_usage(deep=True)))
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(
+            deep_size(key, seen) + deep_size(item, seen) for key, item in value.items()
+        )
+    if isinstance(value, (list, tuple, set, frozenset)):
+        return sys.getsizeof(value) + sum(deep_size(item, seen) for item in value)
+    if hasattr(value, "__dict__"):
+        return sys.getsizeof(value) + deep_size(vars(value), seen)
+    return sys.getsizeof(value)
+
+
+def iter_arrays(value, seen: set | None = None):
+    """Root numpy arrays reachable from `value`, each yielded once."""
+    seen = set() if seen is None else seen
+    if id(value) in seen or isinstance(
+        value, (type, types.ModuleType, types.FunctionType, dash.Dash)
+    ):
+        return
+    seen.add(id(value))
+
+    if isinstance(value, np.ndarray):
+        arrays = [root_array(value)]
+    elif isinstance(value, (pd.DataFrame, pd.Series, pd.Index)):
+        arrays = frame_arrays(value)
+    elif isinstance(value, dict):
+        for item in value.values():
+            yield from iter_arrays(item, seen)
+        return
+    elif isinstance(value, (list, tuple, set, frozenset)):
+        for item in value:
+            yield from iter_arrays(item, seen)
+        return
+    elif hasattr(value, "__dict__"):
+        yield from iter_arrays(vars(value), seen)
+        return
+    else:
+        return
+
+    for array in arrays:
+        if id(array) not in seen:
+            seen.add(id(array))
+            yield array
+
+
+def process_rss() -> int:
+    """Resident set size of this process in bytes (0 where unavailable)."""
+    try:
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return 0
+
+
+def memory_report(snapshots: dict) -> dict:
+    """Deep memory per shared dataset, section and section attribute.
+
+    `snapshots` maps a snapshot name to (shared dataset, {section name:
+    section}). Attributes are measured after the shared dataset, so they
+    only count memory of their own. Buffers reachable from several owners
+    are listed as shared, equal content in separate buffers as duplicated.
+    """
+    owners_by_buffer = {}
+    arrays_by_buffer = {}
+    report = {"rss_bytes": process_rss(), "snapshots": []}
+
+    def track(owner: str, value) -> None:
+        for array in iter_arrays(value):
+            if array.nbytes == 0:
+                continue
+            address = array.__array_interface__["data"][0]
+            arrays_by_buffer[address] = array
+            owners_by_buffer.setdefault(address, set()).add(owner)
+
+    for snapshot, (dataset, sections) in snapshots.items():
+        dataset_seen = set()
+        dataset_bytes = deep_size(dataset, dataset_seen)
+        track(f"{snapshot}/dataset", dataset)
+
+        section_reports = []
+        for section_name, section in sections.items():
+            attributes = []
+            for attribute, value in vars(section).items():
+                owner = f"{snapshot}/{section_name}.{attribute}"
+                attributes.append(
+                    {"name": attribute, "bytes": deep_size(value, set(dataset_seen))}
+                )
+                track(owner, value)
+            attributes.sort(key=lambda attribute: attribute["bytes"], reverse=True)
+            section_reports.append(
+                {
+                    "name": section_name,
+                    "bytes": sum(attribute["bytes"] for attribute in attributes),
+                    "attributes": attributes,
+                }
+            )
+        section_reports.sort(key=lambda section: section["bytes"], reverse=True)
+        report["snapshots"].append(
+            {
+                "name": snapshot,
+                "dataset_bytes": dataset_bytes,
+                "sections": section_reports,
+            }
+        )
+
+    # Buffers reachable from several owners, summed per group of owners
+    shared = {}
+    for address, owners in owners_by_buffer.items():
+        if len(owners) > 1:
+            group = shared.setdefault(tuple(sorted(owners)), [0, 0])
+            group[0] += arrays_by_buffer[address].nbytes
+            group[1] += 1
+    report["shared_buffers"] = [
+        {"bytes": int(nbytes), "buffers": count, "owners": list(owners)}
+        for owners, (nbytes, count) in shared.items()
+    ]
+
+    # Separate buffers with identical content are copies that could be shared
+    buffers_by_content = {}
+    for address, array in arrays_by_buffer.items():
+        if array.nbytes < DUPLICATE_MIN_BYTES or array.dtype == object:
+            continue
+        digest = hashlib.blake2b(
+            np.ascontiguousarray(array).tobytes(), digest_size=16
+        ).hexdigest()
+        key = (array.dtype.str, array.shape, digest)
+        buffers_by_content.setdefault(key, []).append(address)
+    report["duplicated_buffers"] = [
+        {
+            "bytes": int(arrays_by_buffer[addresses[0]].nbytes),
+            "copies": len(addresses),
+            "owners": sorted(
+                {owner for address in addresses for owner in owners_by_buffer[address]}
+            ),
+        }
+        for addresses in buffers_by_content.values()
+        if len(addresses) > 1
+    ]
+    for key in ("shared_buffers", "duplicated_buffers"):
+        report[key].sort(key=lambda buffer: buffer["bytes"], reverse=True)
+    return report
@@ -0,0 +1,85 @@
+import operator
+import time
+
+import numpy as np
+import pandas as pd
+
+
+class Stage:
+    """A named row filter `column <op> value`, e.g. Stage("min votes", "vote_count", ">=", 25)."""
+
+    operators = {
+        ">": operator.gt,
+        ">=": operator.ge,
+        "<": operator.lt,
+        "<=": operator.le,
+        "==": operator.eq,
+        "!=": operator.ne,
+        "notna": None,
+    }
+
+    def __init__(self, name: str, column: str, op: str, value=None) -> None:
+        if op not in self.operators:
+            raise ValueError(f"Unknown operator '{op}' in stage '{name}'")
+        self.name = name
+        self.column = column
+        self.op = op
+        self.value = value
+
+    def mask(self, data: pd.DataFrame) -> np.ndarray:
+        column = data[self.column]
+        if self.op == "notna":
+            return column.notna().to_numpy()
+        return self.operators[self.op](column, self.value).to_numpy(dtype=bool)
+
+
+class StageReport:
+    def __init__(self, name: str, rows_in: int, rows_out: int, seconds: float) -> None:
+        self.name = name
+        self.rows_in = rows_in
+        self.rows_out = rows_out
+        self.seconds = seconds
+
+    def __str__(self) -> str:
+        return (
+            f"{self.name:<30} {self.rows_in:>9} -> {self.rows_out:>9} rows "
+            f"{self.seconds * 1000:>8.2f} ms"
+        )
+
+
+class PreprocessingPipeline:
+    """Applies a list of stages as boolean masks over one input frame.
+
+    Every stage mask is computed on the full input, the masks are combined
+    with `&` and the frame is materialized once at the end.
+    """
+
+    def __init__(self, stages: list, drop_columns: tuple = ()) -> None:
+        self.stages = stages
+        self.drop_columns = drop_columns
+
+    def run(self, data: pd.DataFrame) -> tuple:
+        """(filtered frame, one StageReport per stage) of one input frame.
+
+        The reports are returned rather than kept on the pipeline, which is
+        shared by snapshots loaded at the same time.
+        """
+        mask = np.ones(len(data), dtype=bool)
+        rows_in = len(data)
+        reports = []
+
+        for stage in self.stages:
+            start = time.perf_counter()
+            mask &= stage.mask(data)
+            rows_out = int(mask.sum())
+            reports.append(
+                StageReport(stage.name, rows_in, rows_out, time.perf_counter() - start)
+            )
+            rows_in = rows_out
+
+        columns = [column for column in data.columns if column not in self.drop_columns]
+        return data.loc[mask, columns], reports
+
+    @staticmethod
+    def report(reports: list) -> str:
+        return "\n".join(str(report) for report in reports)
@@ -0,0 +1,69 @@
+import os
+
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.neighbors import BallTree, KDTree
+from sklearn.preprocessing import MultiLabelBinarizer, StandardScaler
+
+from dataProcessing.columns import split_list_column
+from dataProcessing.dataCache import array_fingerprint, cache_path
+
+
+class SimilarityIndex:
+    """k-nearest-neighbour index over standardized movie features."""
+
+    numeric_features = [
+        "budget",
+        "revenue",
+        "runtime",
+        "popularity",
+        "vote_average",
+        "vote_count",
+        "decade",
+    ]
+    # Heavy-tailed columns are compared on a log scale
+    log_features = ["budget", "revenue", "popularity", "vote_count"]
+
+    def __init__(self, data: pd.DataFrame, leaf_size: int = 40) -> None:
+        self.features = self.build_features(data)
+
+        # The tree is persisted next to the data cache, keyed by its input
+        key = array_fingerprint(self.features, np.array([leaf_size]))
+        path = cache_path("similarity", key, ".joblib")
+        if os.path.exists(path):
+            self.tree = joblib.load(path)
+        else:
+            # KD-trees degrade in high dimensions, ball trees do not
+            tree_class = KDTree if self.features.shape[1] <= 20 else BallTree
+            self.tree = tree_class(self.features, leaf_size=leaf_size)
+            joblib.dump(self.tree, path)
+
+    def build_features(self, data: pd.DataFrame) -> np.ndarray:
+        numeric = data[self.numeric_features].astype(float).copy()
+        numeric[self.log_features] = np.log1p(numeric[self.log_features].clip(lower=0))
+        numeric = numeric.fillna(numeric.median())
+        scaled = StandardScaler().fit_transform(numeric)
+
+        # Multi-hot genres, one 0/1 column per genre
+        genres = MultiLabelBinarizer().fit_transform(split_list_column(data["genres"]))
+        return np.hstack([scaled, genres]).astype(np.float64)
+
+    def query(self, positions, k: int = 10) -> tuple:
+        """Neighbours of the movies at `positions`, all answered in one batch.
+
+        Returns (distances, neighbour positions), each of shape (len(positions), k),
+        without the queried movie itself.
+        """
+        positions = np.atleast_1d(np.asarray(positions, dtype=np.intp))
+        k = min(k, len(self.features) - 1)
+        distances, neighbours = self.tree.query(self.features[positions], k=k + 1)
+
+        # Drop the query movie (usually, but not always, the first hit)
+        is_self = neighbours == positions[:, None]
+        is_self[~is_self.any(axis=1), -1] = True
+        keep = ~is_self
+        return (
+            distances[keep].reshape(len(positions), k),
+            neighbours[keep].reshape(len(positions), k),
+        )
@@ -0,0 +1,208 @@
+import re
+
+import numpy as np
+import pandas as pd
+from pandas.api.types import is_datetime64_any_dtype, is_numeric_dtype
+
+from dataProcessing.categoricalEncoding import EncodedRelation
+from dataProcessing.lruCache import LRUCache
+from dataProcessing.textIndex import NGramIndex, normalize_text, normalize_texts
+
+# One condition of a DataTable filter_query, e.g. `{vote_average} s>= 7`; the
+# optional s/i prefix marks case (in)sensitive operators
+CONDITION = re.compile(
+    r"^\{(?P<column>[^}]+)\}\s*[si]?"
+    r"(?P<operator>>=|<=|!=|<|>|=|ge|le|ne|lt|gt|eq|contains|datestartswith)"
+    r"\s*(?P<value>.*)$"
+)
+OPERATOR_NAMES = {">=": "ge", "<=": "le", "!=": "ne", "<": "lt", ">": "gt", "=": "eq"}
+
+
+def parse_filter(query: str | None) -> list:
+    """[(column, operator, value)] of a DataTable filter_query.
+
+    Handles the expressions the table's filter row writes, e.g.
+    `{vote_average} >= 7 && {title} contains "night"`.
+    """
+    conditions = []
+    for part in (query or "").split(" && "):
+        match = CONDITION.match(part.strip())
+        if match is None:
+            continue
+        column, operator, value = match.groups()
+        value = value.strip()
+        if len(value) >= 2 and value[0] == value[-1] and value[0] in "\"'`":
+            value = value[1:-1]
+        conditions.append((column, OPERATOR_NAMES.get(operator, operator), value))
+    return conditions
+
+
+class TableIndex:
+    """Sort permutations and filter indexes over the rows of a table.
+
+    Every numeric or date column is argsorted once (missing values last);
+    the permutation orders pages and, with the sorted values, answers range
+    and equality filters by binary search. Titles are filtered through a
+    trigram index, list columns (genres, companies) through their
+    dictionary encoding, so no filter scans the frame's strings. A page is
+    the filtered permutation sliced to its rows. `text_indexes` passes
+    prebuilt {column: (normalized texts, NGramIndex)}, e.g. of the shared
+    TitleIndex, instead of indexing those columns again.
+    """
+
+    def __init__(
+        self,
+        data: pd.DataFrame,
+        columns: list,
+        text_columns: tuple = ("title",),
+        list_columns: tuple = (),
+        text_indexes: dict | None = None,
+    ) -> None:
+        self.size = len(data)
+        self.results = LRUCache(max_entries=32)
+        self.order = {}  # column -> ascending permutation, missing values last
+        self.sorted_values = {}  # column -> values in that order (numeric, date)
+        self.valid = {}  # column -> number of non-missing values
+        self.date_columns = set()
+
+        # Normalized texts and their trigram index
+        text_indexes = text_indexes or {}
+        self.text_values, self.texts = {}, {}
+        for column in text_columns:
+            if column in text_indexes:
+                texts, ngrams = text_indexes[column]
+            else:
+                texts = normalize_texts(data[column])
+                ngrams = NGramIndex(texts)
+            self.text_values[column], self.texts[column] = texts, ngrams
+
+        for column in columns:
+            values = data[column]
+            if is_datetime64_any_dtype(values):
+                self.date_columns.add(column)
+                # Exact int64 nanoseconds since the epoch, NaT sorted last
+                missing = values.isna().to_numpy()
+                keys = values.to_numpy(dtype="datetime64[ns]").astype(np.int64)
+                keys[missing] = np.iinfo(np.int64).max
+            elif is_numeric_dtype(values):
+                keys = values.to_numpy(dtype=float)
+                missing = np.isnan(keys)
+            else:
+                keys = None
+
+            if keys is not None:
+                order = np.argsort(keys, kind="stable")
+                self.sorted_values[column] = keys[order]
+                self.valid[column] = int(len(keys) - missing.sum())
+            else:
+                if column in self.text_values:
+                    names = self.text_values[column].to_numpy(dtype=object)
+                else:
+                    names = values.astype(str).str.casefold().to_numpy(dtype=object)
+                order = np.argsort(names, kind="stable")
+                self.valid[column] = len(order)
+            self.order[column] = order.astype(np.int32)
+
+        # List columns as (relation, normalized dictionary names)
+        self.relations = {}
+        for column in list_columns:
+            relation = EncodedRelation.shared(data, column)
+            names = pd.Series(relation.dictionary.map(normalize_text), dtype=object)
+            self.relations[column] = relation, names
+
+    def sorted_rows(self, column: str | None, descending: bool = False) -> np.ndarray:
+        """Row positions ordered by `column`, missing values last."""
+        if column not in self.order:
+            return np.arange(self.size, dtype=np.int32)
+        order = self.order[column]
+        if not descending:
+            return order
+        valid = self.valid[column]
+        return np.concatenate([order[:valid][::-1], order[valid:]])
+
+    def value_range(self, column: str, low, high, inclusive: tuple) -> np.ndarray:
+        """Rows whose value lies between `low` and `high` (None: unbounded)."""
+        values = self.sorted_values[column][: self.valid[column]]
+        start = (
+            0
+            if low is None
+            else np.searchsorted(values, low, "left" if inclusive[0] else "right")
+        )
+        stop = (
+            len(values)
+            if high is None
+            else np.searchsorted(values, high, "right" if inclusive[1] else "left")
+        )
+        return self.order[column][start:stop]
+
+    def condition_rows(self, column: str, operator: str, value: str) -> np.ndarray:
+        """Rows matching one filter condition (all rows if it cannot apply)."""
+        if column in self.relations:
+            relation, names = self.relations[column]
+            codes = np.flatnonzero(
+                names.str.contains(normalize_text(value), regex=False)
+            )
+            return np.unique(relation.rows[np.isin(relation.codes, codes)])
+
+        if column in self.texts:
+            query = normalize_text(value)
+            texts = self.text_values[column]
+            # Queries shorter than a trigram have no postings to intersect
+            if len(query) < self.texts[column].n:
+                return np.flatnonzero(texts.str.contains(query, regex=False))
+            candidates = self.texts[column].candidates(query)
+            return candidates[
+                texts.iloc[candidates].str.contains(query, regex=False).to_numpy()
+            ]
+
+        if column not in self.sorted_values:
+            return np.arange(self.size, dtype=np.int32)
+
+        # The value as an interval: a number, or a whole year/month/day in
+        # integer nanoseconds
+        try:
+            if column in self.date_columns:
+                period = pd.Period(value)
+                low = period.start_time.value
+                high = period.end_time.value
+            else:
+                low = high = float(value)
+        except (ValueError, TypeError):
+            return np.arange(self.size, dtype=np.int32)
+
+        if operator == "lt":
+            return self.value_range(column, None, low, (True, False))
+        if operator == "le":
+            return self.value_range(column, None, high, (True, True))
+        if operator == "gt":
+            return self.value_range(column, high, None, (False, True))
+        if operator == "ge":
+            return self.value_range(column, low, None, (True, True))
+        rows = self.value_range(column, low, high, (True, True))
+        if operator == "ne":
+            return np.setdiff1d(np.arange(self.size, dtype=np.int32), rows)
+        return rows
+
+    def query(
+        self, filter_query: str | None, sort_column: str | None, descending: bool
+    ) -> np.ndarray:
+        """Row positions passing the filter, in display order.
+
+        Filtered orders are cached, so paging through them only slices.
+        """
+        order = self.sorted_rows(sort_column, descending)
+        conditions = parse_filter(filter_query)
+        if not conditions:
+            return order
+
+        def compute() -> np.ndarray:
+            keep = np.ones(self.size, dtype=bool)
+            for column, operator, value in conditions:
+                matched = np.zeros(self.size, dtype=bool)
+                matched[self.condition_rows(column, operator, value)] = True
+                keep &= matched
+            return order[keep[order]]
+
+        return self.results.get_or_compute(
+            (tuple(conditions), sort_column, descending), compute
+        )
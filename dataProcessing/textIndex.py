@@ -0,0 +1,277 @@
+import bisect
+import re
+import unicodedata
+from typing import Iterable
+
+import numpy as np
+import pandas as pd
+
+from dataProcessing.dataCache import frame_fingerprint
+from dataProcessing.lruCache import LRUCache
+
+# Match quality tiers, lower is better
+EXACT, PREFIX, WORD_PREFIX, SUBSTRING = range(4)
+
+_title_indexes = LRUCache(max_entries=4)
+
+
+def normalize_text(text) -> str:
+    """Lowercase, strip accents and collapse whitespace for matching."""
+    text = unicodedata.normalize("NFKD", str(text))
+    text = "".join(char for char in text if not unicodedata.combining(char))
+    return " ".join(text.casefold().split())
+
+
+def normalize_texts(texts: Iterable) -> pd.Series:
+    """`normalize_text` of every text, vectorized for the ASCII ones.
+
+    ASCII texts have no accents and casefold like `lower`, so they are
+    joined into one string and lowercased and whitespace-collapsed in one
+    pass; the others go through `normalize_text`.
+    """
+    texts = pd.Series(texts, dtype=object).reset_index(drop=True).astype(str)
+    normalized = np.empty(len(texts), dtype=object)
+    fast = (texts.map(str.isascii) & ~texts.str.contains("\x00", regex=False)).to_numpy(
+        dtype=bool
+    )
+    if fast.any():
+        joined = re.sub(r"\s+", " ", "\x00".join(texts[fast]).lower())
+        normalized[fast] = re.sub(r" ?\x00 ?", "\x00", joined).strip().split("\x00")
+    if not fast.all():
+        normalized[~fast] = texts[~fast].map(normalize_text).to_numpy()
+    return pd.Series(normalized, dtype=object)
+
+
+def ngrams(text: str, n: int = 3) -> list:
+    return [text[i : i + n] for i in range(len(text) - n + 1)]
+
+
+def gram_keys(texts: list, n: int = 3) -> tuple:
+    """(int64 key of every n-gram occurrence, position of its text).
+
+    The texts are laid out as a UTF-32 code point matrix, an n-gram key packs
+    its n code points (21 bits each). Texts are handled in chunks so one long
+    text does not widen the matrix of all the others.
+    """
+    keys, positions = [], []
+    for start in range(0, len(texts), 8192):
+        chunk = np.array(texts[start : start + 8192], dtype=str)
+        width = chunk.dtype.itemsize // 4
+        if width < n:
+            continue
+        points = chunk.view(np.uint32).reshape(len(chunk), width).astype(np.int64)
+        lengths = np.char.str_len(chunk)
+        chunk_keys = points[:, : width - n + 1]
+        for offset in range(1, n):
+            chunk_keys = chunk_keys << 21 | points[:, offset : width - n + 1 + offset]
+        valid = np.arange(width - n + 1) < (lengths - n + 1)[:, None]
+        keys.append(chunk_keys[valid])
+        positions.append(np.nonzero(valid)[0].astype(np.int32) + start)
+    if not keys:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int32)
+    return np.concatenate(keys), np.concatenate(positions)
+
+
+class PrefixIndex:
+    """Sorted keys of every name and every word suffix inside a name.
+
+    A prefix query is a binary search for the range of keys starting with
+    the query, so "disney" finds "walt disney pictures" as well.
+    """
+
+    def __init__(
+        self, names: Iterable[str], word_prefixes: bool = True, normalized=False
+    ) -> None:
+        whole_keys = list(names) if normalized else normalize_texts(names).tolist()
+        keys = np.array(whole_keys, dtype=object)
+        positions = np.arange(len(whole_keys), dtype=np.int32)
+        if word_prefixes and whole_keys:
+            # The suffix after every space, cut from the names joined by
+            # newlines (never inside a normalized name)
+            joined = "\n".join(whole_keys)
+            points = np.frombuffer(joined.encode("utf-32-le"), dtype=np.uint32)
+            lengths = np.fromiter(map(len, whole_keys), np.int64, len(whole_keys))
+            ends = np.cumsum(lengths + 1) - 1
+            spaces = np.flatnonzero(points == ord(" "))
+            owners = np.searchsorted(ends, spaces).astype(np.int32)
+            suffixes = [
+                joined[start:end]
+                for start, end in zip((spaces + 1).tolist(), ends[owners].tolist())
+            ]
+            keys = np.concatenate([keys, np.array(suffixes, dtype=object)])
+            positions = np.concatenate([positions, owners])
+
+        # Sorted by (key, position, is whole name)
+        whole = np.zeros(len(keys), dtype=bool)
+        whole[: len(whole_keys)] = True
+        codes, dictionary = pd.factorize(keys, sort=True)
+        order = np.lexsort((whole, positions, codes))
+
+        self.keys = dictionary[codes[order]].tolist()
+        self.positions = positions[order]
+        self.whole = whole[order]
+        # Number of names, one whole-name key each
+        self.size = len(whole_keys)
+
+    def match(self, prefix: str) -> tuple:
+        """Positions of names with a word starting with `prefix` and their tiers."""
+        prefix = normalize_text(prefix)
+        start = bisect.bisect_left(self.keys, prefix)
+        stop = bisect.bisect_left(self.keys, prefix + "\U0010ffff")
+
+        # Keys equal to the prefix lead the range; word suffix entries with
+        # the same key sort between them, so every whole name among them counts
+        equal = bisect.bisect_right(self.keys, prefix, start, stop)
+
+        positions = self.positions[start:stop]
+        whole = self.whole[start:stop]
+        tiers = np.where(whole, PREFIX, WORD_PREFIX)
+        tiers[(np.arange(stop - start) < equal - start) & whole] = EXACT
+
+        # A name can match through several of its words, keep its best tier.
+        # Large ranges write the tiers worst first into one slot per name
+        # instead of sorting
+        if len(positions) > self.size // 8:
+            best = np.full(self.size, SUBSTRING, dtype=np.int8)
+            for tier in (WORD_PREFIX, PREFIX, EXACT):
+                best[positions[tiers == tier]] = tier
+            matched = np.flatnonzero(best < SUBSTRING).astype(np.int32)
+            return matched, best[matched].astype(int)
+
+        order = np.lexsort((tiers, positions))
+        positions, tiers = positions[order], tiers[order]
+        first = np.ones(len(positions), dtype=bool)
+        first[1:] = positions[1:] != positions[:-1]
+        return positions[first], tiers[first]
+
+    def lookup(self, prefix: str) -> np.ndarray:
+        """Positions of all names with a word starting with `prefix`."""
+        return self.match(prefix)[0]
+
+
+class NGramIndex:
+    """Inverted index from character trigrams to the positions containing them.
+
+    Posting lists are stored back to back in one int32 array (CSR layout),
+    in the order of the sorted n-gram keys in `vocabulary`.
+    """
+
+    def __init__(self, texts: Iterable[str], n: int = 3) -> None:
+        # Keys of n code points of 21 bits fit an int64
+        assert n <= 3
+        self.n = n
+        texts = list(texts)
+        keys, positions = gram_keys(texts, n)
+        self.vocabulary, codes = np.unique(keys, return_inverse=True)
+
+        # Every (n-gram, position) pair once, grouped by n-gram
+        pairs = np.unique(codes.astype(np.int64) * max(len(texts), 1) + positions)
+        codes = pairs // max(len(texts), 1)
+        self.postings = (pairs % max(len(texts), 1)).astype(np.int32)
+        self.offsets = np.concatenate(
+            [[0], np.cumsum(np.bincount(codes, minlength=len(self.vocabulary)))]
+        )
+
+    def posting(self, gram: str) -> np.ndarray:
+        key, _ = gram_keys([gram], self.n)
+        code = np.searchsorted(self.vocabulary, key[0])
+        if code == len(self.vocabulary) or self.vocabulary[code] != key[0]:
+            return np.empty(0, dtype=np.int32)
+        return self.postings[self.offsets[code] : self.offsets[code + 1]]
+
+    def candidates(self, text: str) -> np.ndarray:
+        """Positions containing every n-gram of `text` (a superset of matches)."""
+        postings = sorted(
+            (self.posting(gram) for gram in set(ngrams(text, self.n))), key=len
+        )
+        result = postings[0]
+        for posting in postings[1:]:
+            if len(result) == 0:
+                break
+            result = np.intersect1d(result, posting, assume_unique=True)
+        return result
+
+
+class TitleIndex:
+    """Search-as-you-type over titles, ranked by match quality then weight.
+
+    Exact, prefix and word prefix matches are ranges of the sorted keys.
+    Substring matches rank below them and are only looked up to fill the
+    limit: trigram candidates, at most `max_candidates` of the heaviest,
+    are checked in one vectorized `str.contains`.
+    """
+
+    max_candidates = 5000
+
+    def __init__(self, titles: Iterable[str], weights: Iterable[float]) -> None:
+        self.titles = normalize_texts(titles)
+        weights = np.nan_to_num(np.asarray(weights, dtype=float))
+        # Scaled into [0, 1) so it only breaks ties within a tier
+        self.tie_breaker = weights / (np.abs(weights).max(initial=0) + 1)
+        self.prefixes = PrefixIndex(self.titles, normalized=True)
+        self.ngrams = NGramIndex(self.titles)
+
+    @classmethod
+    def shared(cls, data: pd.DataFrame) -> "TitleIndex":
+        """The index of `data`'s titles by popularity, built once per dataset."""
+        key = frame_fingerprint(data, ["title", "popularity"])
+        return _title_indexes.get_or_compute(
+            key, lambda: cls(data["title"], data["popularity"])
+        )
+
+    def search(self, query: str, limit: int = 20) -> np.ndarray:
+        """Row positions of the best matches for `query`, best first."""
+        query = normalize_text(query)
+        if not query:
+            return np.empty(0, dtype=np.int32)
+
+        positions, tiers = self.prefixes.match(query)
+
+        # Short queries cannot use trigrams, they only match word prefixes
+        if len(positions) < limit and len(query) >= self.ngrams.n:
+            candidates = np.setdiff1d(
+                self.ngrams.candidates(query), positions, assume_unique=True
+            )
+            if len(candidates) > self.max_candidates:
+                heaviest = np.argpartition(
+                    -self.tie_breaker[candidates], self.max_candidates
+                )[: self.max_candidates]
+                candidates = candidates[heaviest]
+            found = candidates[
+                self.titles.iloc[candidates].str.contains(query, regex=False).to_numpy()
+            ]
+            positions = np.concatenate([positions, found])
+            tiers = np.concatenate([tiers, np.full(len(found), SUBSTRING)])
+
+        scores = tiers - self.tie_breaker[positions]
+        if len(positions) > limit:
+            head = np.argpartition(scores, limit)[:limit]
+            positions, scores = positions[head], scores[head]
+        return positions[np.argsort(scores, kind="stable")]
+
+
+class NameIndex:
+    """Prefix search over entity names (companies, countries) ranked by weight.
+
+    Exact matches come first, all other matches by descending weight, e.g.
+    the number of movies of a company. An exact match wins even when other
+    names contain it as a word:
+
+    >>> names = ["20th Century Fox", "Fox", "Fox Searchlight"]
+    >>> [names[p] for p in NameIndex(names, [100, 1, 50]).search("fox")]
+    ['Fox', '20th Century Fox', 'Fox Searchlight']
+    """
+
+    def __init__(self, names: Iterable[str], weights: Iterable[float]) -> None:
+        self.prefixes = PrefixIndex(names)
+        self.weights = np.nan_to_num(np.asarray(weights, dtype=float))
+
+    def search(self, prefix: str, limit: int = 20) -> np.ndarray:
+        """Positions of the best names with a word starting with `prefix`."""
+        positions, tiers = self.prefixes.match(prefix)
+        order = np.lexsort((-self.weights[positions], tiers != EXACT))
+        return positions[order[:limit]]
+
+    def top(self, limit: int = 20) -> np.ndarray:
+        """Positions of the `limit` heaviest names."""
+        return np.argsort(-self.weights, kind="stable")[:limit]
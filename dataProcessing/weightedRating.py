@@ -0,0 +1,99 @@
+import numpy as np
+
+from dataProcessing.categoricalEncoding import EncodedRelation
+from dataProcessing.lruCache import LRUCache
+
+
+def bayesian_ratings(
+    votes: np.ndarray, points: np.ndarray, prior_mean, prior_votes: float
+) -> np.ndarray:
+    """IMDb weighted rating `v / (v + m) * R + m / (v + m) * C` of every group.
+
+    `votes` are the groups' total vote counts (v) and `points` their sums of
+    vote_count * vote_average, so `R = points / votes` is the vote-weighted
+    mean rating. Groups without votes get the prior mean C.
+    """
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return (points + prior_votes * prior_mean) / (votes + prior_votes)
+
+
+class WeightedRating:
+    """Bayesian weighted ratings of groups of movies, shrunk toward a prior.
+
+    Every movie's vote_average counts with its vote_count, and every group
+    gets `prior_votes` (m) extra votes at the prior mean (C), so a few
+    well-rated movies with little votes can no longer top a ranking. m is
+    given explicitly or taken as the `prior_quantile` of the groups' vote
+    totals; C is the vote-weighted mean of the rated movies. Results are
+    cached per filter state key, so ranking by the weighted rating costs
+    the same as ranking by a plain mean.
+    """
+
+    def __init__(
+        self,
+        prior_votes: float | None = None,
+        prior_quantile: float = 0.5,
+        max_entries: int = 32,
+    ) -> None:
+        self.prior_votes = prior_votes
+        self.prior_quantile = prior_quantile
+        self._ratings = LRUCache(max_entries)
+
+    def prior(self, votes: np.ndarray) -> float:
+        """m: the configured prior votes, or the quantile of the vote totals."""
+        if self.prior_votes is not None:
+            return float(self.prior_votes)
+        voted = votes[votes > 0]
+        return float(np.quantile(voted, self.prior_quantile)) if len(voted) else 0.0
+
+    def from_totals(
+        self, key, votes: np.ndarray, points: np.ndarray, prior_mean=None
+    ) -> np.ndarray:
+        """Weighted ratings of groups given their vote and point totals.
+
+        `prior_mean` may be an array broadcasting against the totals (e.g.
+        one prior per period); by default it is the overall weighted mean.
+        """
+
+        def compute() -> np.ndarray:
+            mean = prior_mean
+            if mean is None:
+                mean = points.sum() / votes.sum() if votes.sum() else np.nan
+            return bayesian_ratings(votes, points, mean, self.prior(votes))
+
+        return self._ratings.get_or_compute(
+            (key, self.prior_votes, self.prior_quantile), compute
+        )
+
+    def for_relation(
+        self,
+        key,
+        relation: EncodedRelation,
+        ratings: np.ndarray,
+        vote_counts: np.ndarray,
+    ) -> np.ndarray:
+        """Weighted rating of every name of `relation`, indexed by code.
+
+        The prior mean is taken over the distinct movies of the relation, so
+        movies with several names are not counted more than once.
+        """
+
+        def compute() -> tuple:
+            finite = np.isfinite(ratings) & np.isfinite(vote_counts)
+            votes = np.where(finite, vote_counts, 0)
+            points = np.where(finite, votes * ratings, 0)
+            n = len(relation.dictionary)
+            movies = np.unique(relation.rows)
+            total_votes = votes[movies].sum()
+            return (
+                np.bincount(relation.codes, weights=votes[relation.rows], minlength=n),
+                np.bincount(relation.codes, weights=points[relation.rows], minlength=n),
+                points[movies].sum() / total_votes if total_votes else np.nan,
+            )
+
+        group_votes, group_points, prior_mean = self._ratings.get_or_compute(
+            ("totals", key), compute
+        )
+        ratings_by_code = self.from_totals(key, group_votes, group_points, prior_mean)
+        # Names without movies in the relation have no rating
+        return np.where(relation.counts > 0, ratings_by_code, np.nan)
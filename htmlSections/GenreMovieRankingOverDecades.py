@@ -1,53 +1,44 @@
+import numpy as np
 import pandas as pd
 import dash
 from dash import dcc, html
 from dash.dependencies import Input, Output
 import plotly.express as px
+from dataProcessing.groupStatistics import GroupStatistics, describe_comparison
+from dataProcessing.genreCube import GenreCube
+from dataProcessing.timeRollups import TimeRollup
+from dataProcessing.weightedRating import WeightedRating
 
 
 class GenreVoteAverageOverDecades:
+    # Built once per dataset before the sections that use it
+    shared_artifacts = (GenreCube.shared,)
+
     def __init__(self, app: dash.Dash, data: pd.DataFrame) -> None:
         self.app = app
 
-        # Make a copy to avoid modifying the original dataset
-        self.data = data.copy()
-
-        # Convert release_date to datetime and filter out future dates
-        self.data["release_date"] = pd.to_datetime(
-            self.data["release_date"], errors="coerce"
-        )
-        self.data = self.data[self.data["release_date"].dt.year < 2025]
-
-        # Create a decade column
-        self.data["decade"] = (self.data["release_date"].dt.year // 10) * 10
+        self.data = data
 
-        # Ensure genres are properly formatted
-        self.data["genres"] = (
-            self.data["genres"]
-            .astype(str)
-            .str.replace(r"[\[\]']", "", regex=True)  # Remove brackets and quotes
-            .str.split(", ")  # Convert to lists
-        )
-
-        # Explode genres into separate rows
-        self.exploded_data = self.data.explode("genres")
+        # Average vote score per genre and period, read from the shared genre
+        # cube. Movies released from 2025 on are left out
+        self.cube = GenreCube.shared(self.data)
+        self.genre_vote_average = {
+            granularity: self.cube.table(granularity, before_year=2025).rename(
+                columns={"vote_average_mean": "average_vote"}
+            )
+            for granularity in GenreCube.granularities
+        }
 
-        # Clean genre names (remove extra spaces)
-        self.exploded_data["genres"] = self.exploded_data["genres"].str.strip()
+        # Bootstrap confidence intervals are cached per genre and period
+        self.vote_values = self.data["vote_average"].to_numpy()
+        self.statistics = GroupStatistics()
 
-        # Drop empty or NaN genre entries
-        self.exploded_data = self.exploded_data.dropna(subset=["genres"])
-        self.exploded_data = self.exploded_data[self.exploded_data["genres"] != ""]
-
-        # Compute average vote score per genre per decade
-        self.genre_vote_average = (
-            self.exploded_data.groupby(["decade", "genres"])["vote_average"]
-            .mean()
-            .reset_index(name="average_vote")
-        )
+        # Bayesian weighted ratings per genre and period, shrunk toward the
+        # period's mean over all genres
+        self.weighted_rating = WeightedRating()
 
         # Ensure at least one genre is available to avoid IndexError
-        available_genres = sorted(self.genre_vote_average["genres"].unique())
+        available_genres = sorted(self.cube.genre_names)
         default_genre = (
             available_genres[0] if available_genres else None
         )  # Prevent errors
@@ -68,7 +59,30 @@ class GenreVoteAverageOverDecades:
                     value=default_genre,
                     placeholder="Select a genre" if not available_genres else None,
                 ),
+                dcc.RadioItems(
+                    id="genre-vote-granularity",
+                    options=[
+                        {"label": granularity.title(), "value": granularity}
+                        for granularity in GenreCube.granularities
+                    ],
+                    value="decade",
+                    inline=True,
+                ),
+                dcc.RadioItems(
+                    id="genre-vote-rating",
+                    options=[
+                        {"label": "Average Vote", "value": "mean"},
+                        {"label": "Weighted Rating", "value": "weighted"},
+                    ],
+                    value="mean",
+                    inline=True,
+                ),
                 dcc.Graph(id="genre-vote-trend-chart"),
+                # Significance of the genre's vote averages between two periods
+                html.Label("Compare periods"),
+                dcc.Dropdown(id="genre-vote-period-a", clearable=False),
+                dcc.Dropdown(id="genre-vote-period-b", clearable=False),
+                html.P(id="genre-vote-significance"),
             ]
         )
 
@@ -81,31 +95,132 @@ class GenreVoteAverageOverDecades:
 
         @self.app.callback(
             Output("genre-vote-trend-chart", "figure"),
-            Input("genre-dropdown-vote-average", "value"),
+            [
+                Input("genre-dropdown-vote-average", "value"),
+                Input("genre-vote-granularity", "value"),
+                Input("genre-vote-rating", "value"),
+            ],
         )
-        def update_genre_vote_trend_chart(selected_genre):
+        def update_genre_vote_trend_chart(selected_genre, granularity, rating):
             if selected_genre is None:
                 return px.bar(title="No Data Available")
 
             # Filter data for the selected genre
-            filtered_votes = self.genre_vote_average[
-                self.genre_vote_average["genres"] == selected_genre
+            genre_vote_average = self.genre_vote_average[granularity]
+            filtered_votes = genre_vote_average[
+                genre_vote_average["genres"] == selected_genre
             ]
 
+            period = granularity.title()
+            if rating == "weighted":
+                y, title = "weighted_rating", "Weighted Rating"
+                filtered_votes = filtered_votes.assign(
+                    weighted_rating=self.weighted_ratings(
+                        granularity, selected_genre, filtered_votes["bucket"]
+                    )
+                )
+                error_bars = {}
+            else:
+                y, title = "average_vote", "Average Vote Score"
+                # 95% bootstrap confidence interval of every period's average
+                _, upper, lower = self.statistics.error_bars(
+                    [
+                        (
+                            (selected_genre, granularity, bucket),
+                            lambda bucket=bucket: self.cell_votes(
+                                granularity, selected_genre, bucket
+                            ),
+                        )
+                        for bucket in filtered_votes["bucket"]
+                    ]
+                )
+                filtered_votes = filtered_votes.assign(
+                    error_upper=upper, error_lower=lower
+                )
+                error_bars = {"error_y": "error_upper", "error_y_minus": "error_lower"}
+
             fig = px.bar(
                 filtered_votes,
-                x="decade",
-                y="average_vote",
-                color="average_vote",
-                title=f"Average Vote Score for {selected_genre} Over Decades",
-                labels={"decade": "Decade", "average_vote": "Average Vote Score"},
-                text="average_vote",
+                x="label",
+                y=y,
+                color=y,
+                **error_bars,
+                title=f"{title} for {selected_genre} per {period}",
+                labels={"label": period, y: title},
+                text=y if len(filtered_votes) <= 50 else None,
             )
             fig.update_traces(texttemplate="%{text:.2f}")
             fig.update_layout(
-                xaxis_title="Decade",
-                yaxis_title="Average Vote Score",
+                xaxis_title=period,
+                yaxis_title=title,
                 xaxis=dict(type="category"),
-                coloraxis_colorbar=dict(title="Average Vote Score"),
+                coloraxis_colorbar=dict(title=title),
             )
             return fig
+
+        # The periods of the selected genre, first and last compared by default
+        @self.app.callback(
+            [
+                Output("genre-vote-period-a", "options"),
+                Output("genre-vote-period-a", "value"),
+                Output("genre-vote-period-b", "options"),
+                Output("genre-vote-period-b", "value"),
+            ],
+            [
+                Input("genre-dropdown-vote-average", "value"),
+                Input("genre-vote-granularity", "value"),
+            ],
+        )
+        def update_period_options(selected_genre, granularity):
+            genre_vote_average = self.genre_vote_average[granularity]
+            periods = genre_vote_average[genre_vote_average["genres"] == selected_genre]
+            options = [
+                {"label": str(label), "value": int(bucket)}
+                for label, bucket in zip(periods["label"], periods["bucket"])
+            ]
+            if not options:
+                return [], None, [], None
+            return options, options[0]["value"], options, options[-1]["value"]
+
+        # Movies have one release date, so two periods never share a movie
+        @self.app.callback(
+            Output("genre-vote-significance", "children"),
+            [
+                Input("genre-dropdown-vote-average", "value"),
+                Input("genre-vote-granularity", "value"),
+                Input("genre-vote-period-a", "value"),
+                Input("genre-vote-period-b", "value"),
+            ],
+        )
+        def update_period_significance(selected_genre, granularity, bucket_a, bucket_b):
+            if selected_genre is None or bucket_a is None or bucket_b is None:
+                return ""
+            if bucket_a == bucket_b:
+                return "Select two different periods to compare."
+            comparison = self.statistics.compare(
+                (selected_genre, granularity, bucket_a),
+                lambda: self.cell_votes(granularity, selected_genre, bucket_a),
+                (selected_genre, granularity, bucket_b),
+                lambda: self.cell_votes(granularity, selected_genre, bucket_b),
+            )
+            labels = TimeRollup.labels(granularity, [bucket_a, bucket_b])
+            return describe_comparison(comparison, *labels)
+
+    def cell_votes(self, granularity: str, genre: str, bucket: int) -> np.ndarray:
+        """Vote averages of the movies of one genre in one period."""
+        return self.vote_values[
+            self.cube.cell_rows(granularity, genre, bucket, before_year=2025)
+        ]
+
+    def weighted_ratings(self, granularity: str, genre: str, buckets) -> np.ndarray:
+        """Weighted ratings of `genre` in the periods `buckets`."""
+        rollup = self.cube.rollup(granularity, before_year=2025)
+        votes = rollup["sums"]["vote_count"]
+        points = rollup["sums"]["vote_points"]
+        with np.errstate(invalid="ignore", divide="ignore"):
+            period_means = points.sum(axis=0) / votes.sum(axis=0)
+        ratings = self.weighted_rating.from_totals(
+            (granularity, 2025), votes, points, period_means
+        )
+        periods = np.searchsorted(rollup["buckets"], np.asarray(buckets))
+        return ratings[self.cube.genres.code(genre), periods]
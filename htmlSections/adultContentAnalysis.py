@@ -4,6 +4,7 @@ from dash import html, dcc
 import plotly.express as px
 from dash.dependencies import Input, Output
 from htmlSections.section import Section
+from dataProcessing.groupStatistics import GroupStatistics, describe_comparison
 
 
 class AdultContentAnalysis(Section):
@@ -14,6 +15,12 @@ class AdultContentAnalysis(Section):
         # Ensure 'adult' column is treated as a boolean
         self.data["adult"] = self.data["adult"].astype(bool)
 
+        # Groups present in the data (Non-Adult first)
+        self.groups = sorted(self.data["adult"].unique())
+
+        # Bootstrap intervals and tests are cached per metric and group
+        self.statistics = GroupStatistics()
+
         # Layout with dropdown and toggle filter
         self.div = html.Div(
             [
@@ -30,6 +37,8 @@ class AdultContentAnalysis(Section):
                 ),
                 # Graph
                 dcc.Graph(id="adult-content-bar-chart"),
+                # Significance of the difference between both groups
+                html.P(id="adult-content-significance"),
             ]
         )
 
@@ -40,21 +49,35 @@ class AdultContentAnalysis(Section):
 
     def register_callbacks(self):
         @self.app.callback(
-            Output("adult-content-bar-chart", "figure"),
+            [
+                Output("adult-content-bar-chart", "figure"),
+                Output("adult-content-significance", "children"),
+            ],
             [
                 Input("metric-dropdown-adult", "value"),
             ],
         )
         def update_chart(selected_metric):
             """Update the bar chart based on the selected metric and filtering option."""
-            data = self.data.copy()
-
-            # Group by 'adult' column and calculate mean for the selected metric
-            grouped_data = data.groupby("adult")[selected_metric].mean().reset_index()
+            groups = self.groups
 
-            # Convert boolean values to labels
-            grouped_data["adult"] = grouped_data["adult"].replace(
-                {True: "Adult", False: "Non-Adult"}
+            # Mean and 95% bootstrap confidence interval per group
+            means, upper, lower = self.statistics.error_bars(
+                [
+                    (
+                        (selected_metric, flag),
+                        lambda flag=flag: self.group_values(flag, selected_metric),
+                    )
+                    for flag in groups
+                ]
+            )
+            grouped_data = pd.DataFrame(
+                {
+                    "adult": ["Adult" if flag else "Non-Adult" for flag in groups],
+                    selected_metric: means,
+                    "error_upper": upper,
+                    "error_lower": lower,
+                }
             )
 
             # Create bar chart
@@ -63,6 +86,8 @@ class AdultContentAnalysis(Section):
                 x="adult",
                 y=selected_metric,
                 color="adult",
+                error_y="error_upper",
+                error_y_minus="error_lower",
                 title=f"Comparison of Adult and Non-Adult Movies by average {selected_metric.capitalize()}",
                 labels={
                     "adult": "Movie Type",
@@ -75,4 +100,16 @@ class AdultContentAnalysis(Section):
                 yaxis_title=selected_metric.capitalize(),
             )
 
-            return fig
+            if len(groups) < 2:
+                return fig, "Only one group present, no significance test possible."
+
+            comparison = self.statistics.compare(
+                (selected_metric, True),
+                lambda: self.group_values(True, selected_metric),
+                (selected_metric, False),
+                lambda: self.group_values(False, selected_metric),
+            )
+            return fig, describe_comparison(comparison, "Adult", "Non-Adult")
+
+    def group_values(self, adult: bool, metric: str):
+        return self.data.loc[self.data["adult"] == adult, metric].to_numpy()
@@ -1,26 +1,37 @@
+import numpy as np
 import pandas as pd
 import dash
 from dash import dcc, html
 from dash.dependencies import Input, Output
 import plotly.express as px
+from dataProcessing.genreCube import GenreCube
 
 
 class BiggestGenreChart:
+    # Built once per dataset before the sections that use it
+    shared_artifacts = (GenreCube.shared,)
+
     def __init__(self, app: dash.Dash, data: pd.DataFrame) -> None:
         self.app = app
         self.data = data
 
-        self.data["genres"] = self.data["genres"].str.split(", ")
-        self.exploded_data = self.data.explode("genres").dropna(subset=["genres"])
+        # Film counts per genre and decade from the shared genre cube
+        self.cube = GenreCube.shared(self.data)
+        self.genre_counts = self.cube.table("decade")[
+            ["bucket", "genres", "count"]
+        ].rename(columns={"bucket": "decade", "count": "film_count"})
 
-        self.most_popular_genres = (
-            self.exploded_data.groupby(["decade", "genres"])
-            .size()
-            .reset_index(name="film_count")
-            .sort_values(["decade", "film_count"], ascending=[True, False])
-            .groupby("decade")
-            .first()
-            .reset_index()
+        # Genre with the most films in every decade (ties: alphabetical)
+        decades = self.cube.rollup("decade")
+        counts = decades["count"]
+        biggest = counts.argmax(axis=0)
+        occupied = counts.sum(axis=0) > 0
+        self.most_popular_genres = pd.DataFrame(
+            {
+                "decade": decades["buckets"][occupied],
+                "genres": self.cube.genre_names[biggest[occupied]],
+                "film_count": counts[biggest, np.arange(counts.shape[1])][occupied],
+            }
         )
 
         self.div = html.Div(
@@ -71,16 +82,9 @@ class BiggestGenreChart:
             Input("decade-dropdown", "value"),
         )
         def update_genre_distribution_chart(selected_decade):
-            decade_data = self.exploded_data[
-                self.exploded_data["decade"] == selected_decade
-            ]
-
-            genre_counts = (
-                decade_data.groupby("genres")
-                .size()
-                .reset_index(name="film_count")
-                .sort_values(by="film_count", ascending=False)
-            )
+            genre_counts = self.genre_counts[
+                self.genre_counts["decade"] == selected_decade
+            ].sort_values(by="film_count", ascending=False)
 
             fig = px.bar(
                 genre_counts,
@@ -0,0 +1,185 @@
+import dash
+import numpy as np
+import pandas as pd
+from dash import html, dcc
+from dash.dependencies import Input, Output, State
+import plotly.express as px
+from scipy.stats import rankdata
+from htmlSections.section import Section
+from htmlSections.itemAnalysis import ItemAnalysis
+from dataProcessing.dataCache import frame_fingerprint
+from dataProcessing.lruCache import LRUCache
+
+
+class CorrelationMatrix(Section):
+    def __init__(self, app: dash.Dash, data: pd.DataFrame) -> None:
+        self.app: dash.Dash = app
+        self.data: pd.DataFrame = data
+
+        # Same attributes as the Overview page
+        self.numeric_columns = ItemAnalysis.detect_numeric_columns(self.data)
+        self.log_columns = [
+            col for col in ["budget", "revenue"] if col in self.numeric_columns
+        ]
+
+        # One float matrix for all attributes, every correlation is computed on it
+        self.values = self.data[self.numeric_columns].to_numpy(dtype=float)
+        self.dataset_version = frame_fingerprint(self.data, self.numeric_columns)
+        self.matrix_cache = LRUCache(max_entries=64)
+
+        self.div = html.Div(
+            [
+                html.H1("Correlation Matrix"),
+                dcc.RadioItems(
+                    id="correlation-method-selector",
+                    options=[
+                        {"label": "Pearson", "value": "pearson"},
+                        {"label": "Spearman", "value": "spearman"},
+                    ],
+                    value="pearson",
+                    inline=True,
+                ),
+                dcc.Checklist(
+                    id="correlation-log-toggle",
+                    options=[
+                        {"label": "Log transform budget and revenue", "value": "log"}
+                    ],
+                    value=[],
+                    inline=True,
+                ),
+                html.Label("Budget Threshold:"),
+                dcc.Input(
+                    id="correlation-budget-threshold",
+                    type="number",
+                    value=0,
+                    debounce=True,
+                ),
+                html.Label("Revenue Threshold:"),
+                dcc.Input(
+                    id="correlation-revenue-threshold",
+                    type="number",
+                    value=0,
+                    debounce=True,
+                ),
+                dcc.Graph(id="correlation-heatmap"),
+                html.P("Click a cell to see the matching scatter plot."),
+                dcc.Graph(id="correlation-pair-scatter"),
+            ]
+        )
+
+        self.register_callbacks()
+
+    def get_html(self) -> html.Div:
+        return self.div
+
+    def register_callbacks(self):
+        @self.app.callback(
+            Output("correlation-heatmap", "figure"),
+            [
+                Input("correlation-method-selector", "value"),
+                Input("correlation-log-toggle", "value"),
+                Input("correlation-budget-threshold", "value"),
+                Input("correlation-revenue-threshold", "value"),
+            ],
+        )
+        def update_heatmap(method, log_toggle, budget_threshold, revenue_threshold):
+            corr = self.correlation_matrix(
+                method, "log" in (log_toggle or []), budget_threshold, revenue_threshold
+            )
+            fig = px.imshow(
+                corr,
+                x=self.numeric_columns,
+                y=self.numeric_columns,
+                text_auto=".2f",
+                zmin=-1,
+                zmax=1,
+                color_continuous_scale="RdBu_r",
+                title=f"{method.capitalize()} Correlation of Numeric Attributes",
+            )
+            fig.update_layout(height=600)
+            return fig
+
+        @self.app.callback(
+            Output("correlation-pair-scatter", "figure"),
+            Input("correlation-heatmap", "clickData"),
+            [
+                State("correlation-log-toggle", "value"),
+                State("correlation-budget-threshold", "value"),
+                State("correlation-revenue-threshold", "value"),
+            ],
+        )
+        def update_pair_scatter(
+            click_data, log_toggle, budget_threshold, revenue_threshold
+        ):
+            if not click_data:
+                x_attribute, y_attribute = self.log_columns or self.numeric_columns[:2]
+            else:
+                point = click_data["points"][0]
+                x_attribute, y_attribute = point["x"], point["y"]
+
+            filtered = self.data[
+                self.threshold_mask(budget_threshold, revenue_threshold)
+            ]
+            fig = px.scatter(
+                filtered,
+                x=x_attribute,
+                y=y_attribute,
+                hover_data=["title", "vote_average", "popularity"],
+                labels={
+                    x_attribute: x_attribute.replace("_", " ").title(),
+                    y_attribute: y_attribute.replace("_", " ").title(),
+                },
+                title=f"{x_attribute.replace('_', ' ').title()} vs. {y_attribute.replace('_', ' ').title()}",
+            )
+            fig.update_traces(marker=dict(size=6, opacity=0.6))
+            if "log" in (log_toggle or []):
+                fig.update_layout(
+                    xaxis_type="log" if x_attribute in self.log_columns else "linear",
+                    yaxis_type="log" if y_attribute in self.log_columns else "linear",
+                )
+            return fig
+
+    def threshold_mask(self, budget_threshold, revenue_threshold) -> np.ndarray:
+        mask = np.ones(len(self.data), dtype=bool)
+        if budget_threshold:
+            mask &= self.data["budget"].to_numpy() >= budget_threshold
+        if revenue_threshold:
+            mask &= self.data["revenue"].to_numpy() >= revenue_threshold
+        return mask
+
+    def correlation_matrix(
+        self, method: str, log: bool, budget_threshold, revenue_threshold
+    ) -> np.ndarray:
+        """Correlation of all attributes at once, cached per version and filter."""
+        key = (
+            self.dataset_version,
+            method,
+            log,
+            budget_threshold or 0,
+            revenue_threshold or 0,
+        )
+        return self.matrix_cache.get_or_compute(
+            key,
+            lambda: self.compute_correlation_matrix(
+                method, log, budget_threshold, revenue_threshold
+            ),
+        )
+
+    def compute_correlation_matrix(
+        self, method: str, log: bool, budget_threshold, revenue_threshold
+    ) -> np.ndarray:
+        values = self.values[self.threshold_mask(budget_threshold, revenue_threshold)]
+        # Complete cases only, so every cell is computed over the same rows
+        values = values[~np.isnan(values).any(axis=1)]
+
+        if log:
+            log_indices = [self.numeric_columns.index(col) for col in self.log_columns]
+            values[:, log_indices] = np.log1p(np.clip(values[:, log_indices], 0, None))
+
+        if method == "spearman":
+            # Spearman is Pearson on the ranks
+            values = rankdata(values, axis=0)
+
+        if len(values) < 2:
+            return np.full((len(self.numeric_columns),) * 2, np.nan)
+        return np.corrcoef(values, rowvar=False)
@@ -1,41 +1,61 @@
 import dash
+import numpy as np
 import pandas as pd
 from dash import html, dcc
-from dash.dependencies import Input, Output
+from dash.dependencies import Input, Output, State
+from dash.exceptions import PreventUpdate
 import plotly.express as px
+import plotly.graph_objects as go
+from plotly.subplots import make_subplots
+from dataProcessing.categoricalEncoding import EncodedRelation
+from dataProcessing.entitySeries import EntitySeries
+from dataProcessing.groupStatistics import GroupStatistics, describe_comparison
+from dataProcessing.textIndex import NameIndex
+from dataProcessing.weightedRating import WeightedRating
+from server.exportEndpoint import export_url
+from server.snapshotRouter import SNAPSHOT_STORE
 
 
 class CountryPerformanceAnalysis:
+    # Number of dropdown options shipped with the layout and per search
+    default_options = 20
+    # Metrics side by side in the comparison chart and the selection limit
+    comparison_metrics = ["revenue", "popularity", "vote_average"]
+    max_compared = 50
+
     def __init__(self, app: dash.Dash, data: pd.DataFrame) -> None:
         self.app = app
-        self.data = data.copy()
-
-        # Ensure production_countries is treated as a list
-        self.data["production_countries"] = self.data["production_countries"].str.split(
-            ", "
-        )
+        self.data = data
 
-        # Explode so each country is treated individually
-        self.exploded_data = self.data.explode("production_countries").dropna(
-            subset=["production_countries"]
-        )
+        # (movie row, country) pairs as int32 codes into one shared dictionary
+        relation = EncodedRelation.shared(self.data, "production_countries")
 
-        # Remove leading/trailing whitespace from country names
-        self.exploded_data["production_countries"] = self.exploded_data[
-            "production_countries"
-        ].str.strip()
+        # Filter countries with at least 5 movies
+        self.countries = relation.select(relation.counts >= 5)
 
-        # Count movies per country
-        country_counts = self.exploded_data["production_countries"].value_counts()
+        # Per-movie metric values; per-country aggregates are computed on first use
+        self.metric_values = {
+            metric: self.data[metric].to_numpy(dtype=float)
+            for metric in ["revenue", "vote_average", "popularity"]
+        }
+        # Weighted ratings shrink the vote averages of little-voted groups
+        # toward the overall mean; significance tests use the vote averages
+        self.metric_values["weighted_rating"] = self.metric_values["vote_average"]
+        self.vote_counts = self.data["vote_count"].to_numpy(dtype=float)
+        self.weighted_rating = WeightedRating()
+        self.aggregates = {}
+        self.statistics = GroupStatistics()
 
-        # Filter countries with at least 5 movies
-        valid_countries = country_counts[country_counts >= 5].index.tolist()
-        self.filtered_data = self.exploded_data[
-            self.exploded_data["production_countries"].isin(valid_countries)
-        ]
+        # Per-country x year/decade series, the timeline chart slices it
+        self.series = EntitySeries(self.countries, self.data)
 
-        # Sorted list for dropdown
-        unique_countries = sorted(valid_countries)
+        # Dropdown options are searched server-side by name, ranked by movie count
+        codes = self.countries.present_codes()
+        self.country_names = self.countries.names(codes)
+        self.name_index = NameIndex(self.country_names, self.countries.counts[codes])
+        default_country = self.country_names[0] if len(codes) else None
+        # The significance test compares against a second country
+        default_against = self.country_names[1] if len(codes) > 1 else None
 
         # Layout
         self.div = html.Div(
@@ -44,11 +64,10 @@ class CountryPerformanceAnalysis:
                 # Dropdown to select a country
                 dcc.Dropdown(
                     id="production-country-dropdown",
-                    options=[
-                        {"label": country, "value": country}
-                        for country in unique_countries
-                    ],
-                    value=unique_countries[0] if unique_countries else None,
+                    options=self.country_options(
+                        self.name_index.top(self.default_options), default_country
+                    ),
+                    value=default_country,
                     placeholder="Select a production country",
                 ),
                 # Radio buttons for selecting metric (Revenue, Popularity, or Vote Average)
@@ -58,6 +77,7 @@ class CountryPerformanceAnalysis:
                         {"label": "Revenue", "value": "revenue"},
                         {"label": "Popularity", "value": "popularity"},
                         {"label": "Vote Average", "value": "vote_average"},
+                        {"label": "Weighted Rating", "value": "weighted_rating"},
                     ],
                     value="revenue",
                     inline=True,
@@ -91,8 +111,57 @@ class CountryPerformanceAnalysis:
                 ),
                 # Graph to display the selected production country's data
                 dcc.Graph(id="production-country-chart"),
+                # Significance of the selected country against a second one
+                html.Label("Test against"),
+                dcc.Dropdown(
+                    id="production-country-against-dropdown",
+                    options=self.country_options(
+                        self.name_index.top(self.default_options), default_against
+                    ),
+                    value=default_against,
+                    placeholder="Select a country to test against",
+                ),
+                html.P(id="production-country-significance"),
+                # How the selected country evolves over time
+                html.Div(
+                    [
+                        dcc.Dropdown(
+                            id="country-timeline-measure",
+                            options=[
+                                {"label": label, "value": measure}
+                                for measure, label in EntitySeries.measures.items()
+                            ],
+                            value="count",
+                            clearable=False,
+                        ),
+                        dcc.RadioItems(
+                            id="country-timeline-granularity",
+                            options=[
+                                {"label": "Year", "value": "year"},
+                                {"label": "Decade", "value": "decade"},
+                            ],
+                            value="decade",
+                            inline=True,
+                        ),
+                        dcc.Graph(id="country-timeline-chart"),
+                    ]
+                ),
                 # Graph to display the top countries based on the selected metric
                 dcc.Graph(id="top-countries-chart"),
+                # Download of the movies behind the clicked bar
+                html.A(id="country-export-link", download=""),
+                # Several countries compared side by side
+                html.Label("Compare countries"),
+                dcc.Dropdown(
+                    id="country-comparison-dropdown",
+                    options=self.country_options(
+                        self.name_index.top(self.default_options)
+                    ),
+                    value=list(self.country_names[self.name_index.top(5)]),
+                    multi=True,
+                    placeholder="Select countries to compare",
+                ),
+                dcc.Graph(id="country-comparison-chart"),
             ]
         )
 
@@ -102,6 +171,33 @@ class CountryPerformanceAnalysis:
         return self.div
 
     def register_callbacks(self):
+        # Only the matches of the typed text are sent to the browser
+        @self.app.callback(
+            Output("production-country-dropdown", "options"),
+            Input("production-country-dropdown", "search_value"),
+            State("production-country-dropdown", "value"),
+        )
+        def update_country_options(search_value, selected_country):
+            if not search_value:
+                raise PreventUpdate
+            return self.country_options(
+                self.name_index.search(search_value, limit=self.default_options),
+                selected_country,
+            )
+
+        @self.app.callback(
+            Output("production-country-against-dropdown", "options"),
+            Input("production-country-against-dropdown", "search_value"),
+            State("production-country-against-dropdown", "value"),
+        )
+        def update_against_options(search_value, against):
+            if not search_value:
+                raise PreventUpdate
+            return self.country_options(
+                self.name_index.search(search_value, limit=self.default_options),
+                against,
+            )
+
         @self.app.callback(
             Output("aggregation-selector-countries", "style"),
             [Input("metric-selector-countries", "value")],
@@ -115,46 +211,43 @@ class CountryPerformanceAnalysis:
                 }  # Hide when vote_average or popularity is selected
 
         @self.app.callback(
-            Output("production-country-chart", "figure"),
+            [
+                Output("production-country-chart", "figure"),
+                Output("production-country-significance", "children"),
+            ],
             [
                 Input("production-country-dropdown", "value"),
                 Input("metric-selector-countries", "value"),
                 Input("aggregation-selector-countries", "value"),
+                Input("production-country-against-dropdown", "value"),
             ],
         )
-        def update_chart(selected_country, selected_metric, aggregation_method):
+        def update_chart(
+            selected_country, selected_metric, aggregation_method, against
+        ):
             if not selected_country:
-                return px.bar(title="No data available")
+                return px.bar(title="No data available"), ""
 
-            # Filter data for the selected country
-            country_data = self.filtered_data[
-                self.filtered_data["production_countries"] == selected_country
-            ]
+            # Names missing from this dataset (e.g. after a snapshot switch)
+            # have no code, or no movies in the relation
+            code = self.countries.code(selected_country)
+            if code < 0 or self.countries.counts[code] == 0:
+                return px.bar(title=f"No data available for {selected_country}"), ""
 
-            # For vote_average, no need for aggregation (it's a single value per movie)
-            if selected_metric == "vote_average":
-                country_stats = (
-                    country_data.groupby("production_countries")[selected_metric]
-                    .mean()
-                    .reset_index()
-                )
-                title_suffix = "Average"
-            else:
-                # Aggregate data based on user selection (SUM or MEAN)
-                if aggregation_method == "sum":
-                    country_stats = (
-                        country_data.groupby("production_countries")[selected_metric]
-                        .sum()
-                        .reset_index()
-                    )
-                    title_suffix = "Total"
-                else:
-                    country_stats = (
-                        country_data.groupby("production_countries")[selected_metric]
-                        .mean()
-                        .reset_index()
-                    )
-                    title_suffix = "Average"
+            # Look up the selected country's precomputed aggregate by code
+            values, title_suffix = self.aggregate(selected_metric, aggregation_method)
+            country_stats = pd.DataFrame(
+                {
+                    "production_countries": [selected_country],
+                    selected_metric: [values[code]],
+                }
+            )
+
+            # 95% bootstrap confidence interval for averages
+            error_bars = {}
+            if title_suffix == "Average":
+                country_stats = self.add_error_bars(country_stats, selected_metric)
+                error_bars = {"error_y": "error_upper", "error_y_minus": "error_lower"}
 
             # Create bar chart
             fig = px.bar(
@@ -162,6 +255,7 @@ class CountryPerformanceAnalysis:
                 x="production_countries",
                 y=selected_metric,
                 text=selected_metric,
+                **error_bars,
                 labels={
                     "production_countries": "Production Country",
                     selected_metric: selected_metric.capitalize(),
@@ -172,7 +266,31 @@ class CountryPerformanceAnalysis:
             fig.update_traces(texttemplate="%{text:.2s}")
             fig.update_layout(xaxis={"categoryorder": "total descending"})
 
-            return fig
+            return fig, self.significance(selected_country, against, selected_metric)
+
+        # The selected country's timeline is a slice of the series store
+        @self.app.callback(
+            Output("country-timeline-chart", "figure"),
+            [
+                Input("production-country-dropdown", "value"),
+                Input("country-timeline-measure", "value"),
+                Input("country-timeline-granularity", "value"),
+            ],
+        )
+        def update_timeline_chart(selected_country, measure, granularity):
+            if not selected_country:
+                return px.line(title="No data available")
+
+            timeline = self.series.frame([selected_country], granularity, measure)
+            label = EntitySeries.measures[measure]
+            return px.line(
+                timeline,
+                x="period",
+                y=measure,
+                markers=True,
+                labels={"period": granularity.capitalize(), measure: label},
+                title=f"{selected_country}: {label} per {granularity.capitalize()}",
+            )
 
         @self.app.callback(
             Output("top-countries-chart", "figure"),
@@ -183,38 +301,26 @@ class CountryPerformanceAnalysis:
             ],
         )
         def update_top_countries_chart(selected_metric, aggregation_method, top_n):
-            # Aggregate the data for the selected metric and aggregation method
-            if selected_metric == "vote_average":
-                country_stats = (
-                    self.filtered_data.groupby("production_countries")[selected_metric]
-                    .mean()
-                    .reset_index()
-                )
-                title_suffix = "Average"
-            else:
-                if aggregation_method == "sum":
-                    country_stats = (
-                        self.filtered_data.groupby("production_countries")[
-                            selected_metric
-                        ]
-                        .sum()
-                        .reset_index()
-                    )
-                    title_suffix = "Total"
-                else:
-                    country_stats = (
-                        self.filtered_data.groupby("production_countries")[
-                            selected_metric
-                        ]
-                        .mean()
-                        .reset_index()
-                    )
-                    title_suffix = "Average"
+            # Aggregates of all countries at once, indexed by code
+            values, title_suffix = self.aggregate(selected_metric, aggregation_method)
 
             # Sort by the selected metric and get the top N countries
-            country_stats_sorted = country_stats.sort_values(
-                by=selected_metric, ascending=False
-            ).head(top_n)
+            codes = self.countries.present_codes()
+            top_codes = codes[np.argsort(-values[codes], kind="stable")[:top_n]]
+            country_stats_sorted = pd.DataFrame(
+                {
+                    "production_countries": self.countries.names(top_codes),
+                    selected_metric: values[top_codes],
+                }
+            )
+
+            # 95% bootstrap confidence intervals for averages
+            error_bars = {}
+            if title_suffix == "Average":
+                country_stats_sorted = self.add_error_bars(
+                    country_stats_sorted, selected_metric
+                )
+                error_bars = {"error_y": "error_upper", "error_y_minus": "error_lower"}
 
             # Create bar chart for top countries
             fig = px.bar(
@@ -222,6 +328,7 @@ class CountryPerformanceAnalysis:
                 x="production_countries",
                 y=selected_metric,
                 text=selected_metric,
+                **error_bars,
                 labels={
                     "production_countries": "Production Country",
                     selected_metric: selected_metric.capitalize(),
@@ -233,3 +340,155 @@ class CountryPerformanceAnalysis:
             fig.update_layout(xaxis={"categoryorder": "total descending"})
 
             return fig
+
+        # Export link of the clicked bar, or of the selected country
+        @self.app.callback(
+            [
+                Output("country-export-link", "href"),
+                Output("country-export-link", "children"),
+            ],
+            [
+                Input("top-countries-chart", "clickData"),
+                Input("production-country-dropdown", "value"),
+            ],
+            # The tab's snapshot, the link names it
+            State(SNAPSHOT_STORE, "data"),
+        )
+        def update_export_link(click_data, selected_country, snapshot):
+            country = selected_country
+            if dash.ctx.triggered_id == "top-countries-chart" and click_data:
+                country = click_data["points"][0]["x"]
+            if not country:
+                return None, ""
+            return (
+                export_url(snapshot=snapshot, country=country),
+                f"Download the movies of {country} (CSV)",
+            )
+
+        @self.app.callback(
+            Output("country-comparison-dropdown", "options"),
+            Input("country-comparison-dropdown", "search_value"),
+            State("country-comparison-dropdown", "value"),
+        )
+        def update_comparison_options(search_value, selected_countries):
+            if not search_value:
+                raise PreventUpdate
+            return self.country_options(
+                self.name_index.search(search_value, limit=self.default_options),
+                selected_countries,
+            )
+
+        # One lookup of all selected codes in the (code, metric) matrix
+        @self.app.callback(
+            Output("country-comparison-chart", "figure"),
+            [
+                Input("country-comparison-dropdown", "value"),
+                Input("aggregation-selector-countries", "value"),
+            ],
+        )
+        def update_comparison_chart(selected_countries, aggregation_method):
+            names = np.asarray(
+                (selected_countries or [])[: self.max_compared], dtype=object
+            )
+            if len(names) == 0:
+                return px.bar(title="No countries selected")
+
+            codes = self.countries.codes_of(names)
+            known = codes >= 0
+            names, codes = names[known], codes[known]
+            values, title_suffixes = self.comparison_matrix(aggregation_method)
+            block = values[codes]
+
+            # One bar trace per metric, however many country names are selected
+            fig = make_subplots(
+                rows=1,
+                cols=len(self.comparison_metrics),
+                subplot_titles=[
+                    f"{suffix} {metric.replace('_', ' ').capitalize()}"
+                    for metric, suffix in zip(self.comparison_metrics, title_suffixes)
+                ],
+            )
+            for column in range(len(self.comparison_metrics)):
+                fig.add_trace(
+                    go.Bar(x=names, y=block[:, column], showlegend=False),
+                    row=1,
+                    col=column + 1,
+                )
+            fig.update_layout(title=f"{len(names)} Countries Compared")
+            return fig
+
+    def country_options(self, positions, selected=None) -> list:
+        # Keep the current selection (one name or several) in the options so
+        # it stays visible
+        if isinstance(selected, str):
+            selected = [selected]
+        names = [*(selected or []), *self.country_names[positions]]
+        return [{"label": name, "value": name} for name in dict.fromkeys(names)]
+
+    def aggregate(self, metric: str, aggregation_method: str) -> tuple:
+        """Per-country aggregate of `metric` (indexed by code) and its title suffix."""
+        if metric == "weighted_rating":
+            return (
+                self.weighted_rating.for_relation(
+                    "countries",
+                    self.countries,
+                    self.metric_values["vote_average"],
+                    self.vote_counts,
+                ),
+                "Bayesian",
+            )
+
+        # Vote average does not use sum/mean aggregation options
+        if metric != "vote_average" and aggregation_method == "sum":
+            how, title_suffix = "sum", "Total"
+        else:
+            how, title_suffix = "mean", "Average"
+
+        if (metric, how) not in self.aggregates:
+            self.aggregates[(metric, how)] = self.countries.aggregate(
+                self.metric_values[metric], how
+            )
+        return self.aggregates[(metric, how)], title_suffix
+
+    def comparison_matrix(self, aggregation_method: str) -> tuple:
+        """(code, metric) matrix of the comparison metrics and their title suffixes."""
+        key = ("comparison", aggregation_method)
+        if key not in self.aggregates:
+            columns, title_suffixes = zip(
+                *(
+                    self.aggregate(metric, aggregation_method)
+                    for metric in self.comparison_metrics
+                )
+            )
+            self.aggregates[key] = np.column_stack(columns), list(title_suffixes)
+        return self.aggregates[key]
+
+    def significance(self, selected: str, against: str | None, metric: str) -> str:
+        """Test of `selected` against a second country, on the movies only one has."""
+        if not against or against == selected:
+            return "Select a second country to test against."
+        code_a, code_b = self.countries.code(selected), self.countries.code(against)
+        if code_b < 0 or self.countries.counts[code_b] == 0:
+            return f"No data available for {against}"
+        rows = self.countries.exclusive_rows(code_a, code_b)
+        comparison = self.statistics.compare(
+            ("exclusive", selected, against, metric),
+            lambda: self.metric_values[metric][rows[0]],
+            ("exclusive", against, selected, metric),
+            lambda: self.metric_values[metric][rows[1]],
+        )
+        return describe_comparison(comparison, selected, against)
+
+    def group_values(self, country: str, metric: str):
+        rows = self.countries.group_rows(self.countries.code(country))
+        return self.metric_values[metric][rows]
+
+    def add_error_bars(self, stats: pd.DataFrame, metric: str) -> pd.DataFrame:
+        """Add bootstrap error bar lengths around the means in `stats`."""
+        _, upper, lower = self.statistics.error_bars(
+            [
+                ((name, metric), lambda name=name: self.group_values(name, metric))
+                for name in stats["production_countries"]
+            ]
+        )
+        return stats.assign(error_upper=upper, error_lower=lower)
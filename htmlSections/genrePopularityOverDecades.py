@@ -1,54 +1,36 @@
 import pandas as pd
 import dash
 from dash import dcc, html
-from dash.dependencies import Input, Output
+from dash.dependencies import Input, Output, State
 import plotly.express as px
+from dataProcessing.genreCube import GenreCube
+from dataProcessing.timeRollups import TimeRollup
+from server.exportEndpoint import export_url
+from server.snapshotRouter import SNAPSHOT_STORE
 
 
 class GenrePopularityOverDecades:
+    # Built once per dataset before the sections that use it
+    shared_artifacts = (GenreCube.shared,)
+
     def __init__(self, app: dash.Dash, data: pd.DataFrame) -> None:
         self.app = app
 
-        # Make a copy of the data to prevent modification issues
-        self.data = data.copy()
-
-        # Convert release_date to datetime and filter out future movies
-        self.data["release_date"] = pd.to_datetime(
-            self.data["release_date"], errors="coerce"
-        )
-        self.data = self.data[self.data["release_date"].dt.year < 2025]
-
-        # Create a decade column
-        self.data["decade"] = (self.data["release_date"].dt.year // 10) * 10
-
-        # Ensure genres column is properly formatted
-        self.data["genres"] = (
-            self.data["genres"]
-            .astype(str)
-            .str.replace(r"[\[\]']", "", regex=True)  # Remove brackets and quotes
-            .str.split(", ")  # Split into lists
-        )
-
-        # Explode genres into separate rows
-        self.exploded_data = self.data.explode("genres")
-
-        # Clean genre names (remove extra spaces)
-        self.exploded_data["genres"] = self.exploded_data["genres"].str.strip()
+        self.data = data
 
-        # Drop rows where genres are empty or NaN
-        self.exploded_data = self.exploded_data.dropna(subset=["genres"])
-        self.exploded_data = self.exploded_data[self.exploded_data["genres"] != ""]
-
-        # Compute average (or total) popularity per genre per decade
-        self.genre_popularity = self.exploded_data.groupby(
-            ["decade", "genres"], as_index=False
-        )[
-            "popularity"
-        ].mean()  # Use .sum() if you want total popularity
+        # Average popularity per genre and period, read from the shared genre
+        # cube. Movies released from 2025 on are left out
+        self.cube = GenreCube.shared(self.data)
+        self.genre_popularity = {
+            granularity: self.cube.table(granularity, before_year=2025).rename(
+                columns={"popularity_mean": "popularity"}
+            )
+            for granularity in GenreCube.granularities
+        }
 
         # Get available decades and prevent IndexError
-        decades = sorted(self.genre_popularity["decade"].unique())
-        default_decade = decades[0] if decades else None  # Avoid IndexError
+        decade_options = self.period_options("decade")
+        default_decade = decade_options[0]["value"] if decade_options else None
 
         # Create the HTML layout
         self.div = html.Div(
@@ -56,16 +38,25 @@ class GenrePopularityOverDecades:
                 html.H1(
                     "Genre Popularity Across Decades", style={"textAlign": "center"}
                 ),
-                html.H3("Select a Decade to View Genre Ranking"),
-                dcc.Dropdown(
-                    id="decade-dropdown-genre-popularity",
+                dcc.RadioItems(
+                    id="genre-popularity-granularity",
                     options=[
-                        {"label": str(decade), "value": decade} for decade in decades
+                        {"label": granularity.title(), "value": granularity}
+                        for granularity in GenreCube.granularities
                     ],
+                    value="decade",
+                    inline=True,
+                ),
+                html.H3("Select a Period to View Genre Ranking"),
+                dcc.Dropdown(
+                    id="decade-dropdown-genre-popularity",
+                    options=decade_options,
                     value=default_decade,  # Prevent IndexError
-                    placeholder="Select a decade" if not decades else None,
+                    placeholder="Select a period" if not decade_options else None,
                 ),
                 dcc.Graph(id="decade-genre-ranking-chart"),
+                # Download of the movies behind the clicked genre bar
+                html.A(id="genre-popularity-export-link", download=""),
             ]
         )
 
@@ -74,25 +65,53 @@ class GenrePopularityOverDecades:
     def get_html(self) -> html.Div:
         return self.div
 
+    def period_options(self, granularity: str) -> list:
+        periods = (
+            self.genre_popularity[granularity][["bucket", "label"]]
+            .drop_duplicates()
+            .sort_values("bucket")
+        )
+        return [
+            {"label": label, "value": int(bucket)}
+            for bucket, label in zip(periods["bucket"], periods["label"])
+        ]
+
     def register_callbacks(self):
+        @self.app.callback(
+            [
+                Output("decade-dropdown-genre-popularity", "options"),
+                Output("decade-dropdown-genre-popularity", "value"),
+            ],
+            Input("genre-popularity-granularity", "value"),
+        )
+        def update_period_options(granularity):
+            options = self.period_options(granularity)
+            return options, options[0]["value"] if options else None
+
         @self.app.callback(
             Output("decade-genre-ranking-chart", "figure"),
-            Input("decade-dropdown-genre-popularity", "value"),
+            [
+                Input("decade-dropdown-genre-popularity", "value"),
+                Input("genre-popularity-granularity", "value"),
+            ],
         )
-        def update_decade_genre_ranking_chart(selected_decade):
+        def update_decade_genre_ranking_chart(selected_decade, granularity):
             if selected_decade is None:
                 return px.bar(title="No Data Available")
 
-            filtered_popularity = self.genre_popularity[
-                self.genre_popularity["decade"] == selected_decade
+            genre_popularity = self.genre_popularity[granularity]
+            filtered_popularity = genre_popularity[
+                genre_popularity["bucket"] == selected_decade
             ]
+            if filtered_popularity.empty:
+                return px.bar(title="No Data Available")
 
             fig = px.bar(
                 filtered_popularity,
                 x="genres",
                 y="popularity",
                 color="popularity",
-                title=f"Genre Ranking in {selected_decade}",
+                title=f"Genre Ranking in {filtered_popularity['label'].iloc[0]}",
                 labels={"genres": "Genre", "popularity": "Average Popularity"},
                 text="popularity",
             )
@@ -104,3 +123,35 @@ class GenrePopularityOverDecades:
                 coloraxis_colorbar=dict(title="Average Popularity"),
             )
             return fig
+
+        # Export link of the clicked genre in the period, or the whole period
+        @self.app.callback(
+            [
+                Output("genre-popularity-export-link", "href"),
+                Output("genre-popularity-export-link", "children"),
+            ],
+            [
+                Input("decade-genre-ranking-chart", "clickData"),
+                Input("decade-dropdown-genre-popularity", "value"),
+                Input("genre-popularity-granularity", "value"),
+            ],
+            # The tab's snapshot, the link names it
+            State(SNAPSHOT_STORE, "data"),
+        )
+        def update_export_link(click_data, selected_decade, granularity, snapshot):
+            if selected_decade is None:
+                return None, ""
+            genre = None
+            if dash.ctx.triggered_id == "decade-genre-ranking-chart" and click_data:
+                genre = click_data["points"][0]["x"]
+            label = TimeRollup.labels(granularity, [selected_decade])[0]
+            href = export_url(
+                snapshot=snapshot,
+                genre=genre,
+                granularity=granularity,
+                period=selected_decade,
+                before_year=2025,
+            )
+            if genre is None:
+                return href, f"Download all movies of {label} (CSV)"
+            return href, f"Download the {genre} movies of {label} (CSV)"
@@ -1,10 +1,14 @@
 import dash
+import numpy as np
 import pandas as pd
 import plotly.express as px
+import plotly.graph_objects as go
 from dash import dcc, html
 from dash.dependencies import Input, Output
 import dash_bootstrap_components as dbc
 from pandas.api.types import is_numeric_dtype
+from dataProcessing.densityEstimate import density_curve
+from dataProcessing.lruCache import LRUCache
 
 
 class ItemAnalysis:
@@ -13,13 +17,10 @@ class ItemAnalysis:
         self.data: pd.DataFrame = data.copy()
 
         # Filtering numeric columns
-        self.numeric_columns = [
-            col for col in self.data.columns if is_numeric_dtype(self.data[col])
-        ]
-        columns_to_exclude = ["id", "decade", "adult"]
-        self.numeric_columns = [
-            col for col in self.numeric_columns if col not in columns_to_exclude
-        ]
+        self.numeric_columns = self.detect_numeric_columns(self.data)
+
+        # Density curves per (attribute, thresholds, space), a fixed-size grid each
+        self.densities = LRUCache(max_entries=64)
 
         self.div = html.Div(
             [
@@ -72,6 +73,17 @@ class ItemAnalysis:
                     ]
                 ),
                 html.Div(id="statistical-summary2", style={"margin-bottom": "30px"}),
+                # Optional kernel density overlay, in linear or log10 space
+                dcc.RadioItems(
+                    id="histogram-density",
+                    options=[
+                        {"label": "Histogram only", "value": "none"},
+                        {"label": "Density", "value": "linear"},
+                        {"label": "Density (log scale)", "value": "log"},
+                    ],
+                    value="none",
+                    inline=True,
+                ),
                 dcc.Graph(id="histogram"),
             ],
             style={"padding": "20px"},
@@ -92,9 +104,10 @@ class ItemAnalysis:
                 Input("attribute-dropdown", "value"),
                 Input("budget-threshold-input", "value"),
                 Input("revenue-threshold-input", "value"),
+                Input("histogram-density", "value"),
             ],
         )
-        def update_analysis(attribute, budget_threshold, revenue_threshold):
+        def update_analysis(attribute, budget_threshold, revenue_threshold, density):
             if not attribute:
                 return (
                     html.P("Please select an attribute for analysis."),
@@ -129,6 +142,12 @@ class ItemAnalysis:
                 },
             )
 
+            if density in ("linear", "log"):
+                return stats_div, self.density_histogram(
+                    filtered_data[attribute],
+                    (attribute, budget_threshold, revenue_threshold, density),
+                )
+
             # Create histogram
             histogram = px.histogram(
                 filtered_data,
@@ -141,6 +160,52 @@ class ItemAnalysis:
 
             return stats_div, histogram
 
+    def density_histogram(self, column: pd.Series, key: tuple):
+        """Density histogram and KDE curve, both binned server-side.
+
+        Only the bin heights and the KDE grid are sent, so the figure has the
+        same size however many movies pass the thresholds.
+        """
+        attribute, space = key[0], key[-1]
+
+        def compute() -> tuple:
+            grid, density, values = density_curve(column.to_numpy(dtype=float), space)
+            heights, edges = (
+                np.histogram(values, bins=50, density=True)
+                if len(values)
+                else (np.array([]), np.array([0.0]))
+            )
+            return grid, density, heights, edges
+
+        grid, density, heights, edges = self.densities.get_or_compute(key, compute)
+        label = f"log10({attribute})" if space == "log" else attribute
+
+        histogram = go.Figure(
+            [
+                go.Bar(
+                    x=(edges[:-1] + edges[1:]) / 2,
+                    y=heights,
+                    width=np.diff(edges),
+                    name="Histogram",
+                ),
+                go.Scatter(x=grid, y=density, mode="lines", name="Density"),
+            ]
+        )
+        histogram.update_layout(
+            title=f"Distribution of {label}",
+            xaxis_title=label,
+            yaxis_title="Density",
+            bargap=0,
+            template="plotly_dark",
+        )
+        return histogram
+
+    @staticmethod
+    def detect_numeric_columns(data: pd.DataFrame) -> list:
+        numeric_columns = [col for col in data.columns if is_numeric_dtype(data[col])]
+        columns_to_exclude = ["id", "decade", "adult"]
+        return [col for col in numeric_columns if col not in columns_to_exclude]
+
     def filter_budget_revenue(
         self, data: pd.DataFrame, budget_threshold: float, revenue_threshold: float
     ) -> pd.DataFrame:
@@ -0,0 +1,130 @@
+import dash
+import numpy as np
+import pandas as pd
+from dash import dash_table, html
+from dash.dependencies import Input, Output
+from htmlSections.section import Section
+from dataProcessing.tableIndex import TableIndex
+from dataProcessing.textIndex import TitleIndex
+
+
+class MovieTable(Section):
+    # Built once per dataset before the sections that use it
+    shared_artifacts = (TitleIndex.shared,)
+
+    # Rows per page
+    page_size = 25
+
+    def __init__(self, app: dash.Dash, data: pd.DataFrame) -> None:
+        self.app: dash.Dash = app
+        self.data: pd.DataFrame = data
+
+        self.columns = [
+            "title",
+            "release_date",
+            "genres",
+            "vote_average",
+            "vote_count",
+            "popularity",
+            "revenue",
+            "budget",
+            "runtime",
+            "production_companies",
+            "production_countries",
+        ]
+        # DataTable column types, the filter row offers operators per type
+        column_types = {
+            "release_date": "datetime",
+            "vote_average": "numeric",
+            "vote_count": "numeric",
+            "popularity": "numeric",
+            "revenue": "numeric",
+            "budget": "numeric",
+            "runtime": "numeric",
+        }
+
+        titles = TitleIndex.shared(self.data)
+        # Sort permutations and filter indexes, built once; requests only
+        # slice them and serialize the visible page
+        self.index = TableIndex(
+            self.data,
+            self.columns,
+            text_columns=("title",),
+            list_columns=("genres", "production_companies", "production_countries"),
+            # The title search's index, built once per dataset
+            text_indexes={"title": (titles.titles, titles.ngrams)},
+        )
+
+        self.div = html.Div(
+            [
+                html.H1("Movie Table"),
+                html.P(id="movie-table-count", style={"color": "#888"}),
+                dash_table.DataTable(
+                    id="movie-table",
+                    columns=[
+                        {
+                            "name": column.replace("_", " ").title(),
+                            "id": column,
+                            "type": column_types.get(column, "text"),
+                        }
+                        for column in self.columns
+                    ],
+                    page_current=0,
+                    page_size=self.page_size,
+                    page_action="custom",
+                    sort_action="custom",
+                    sort_mode="single",
+                    sort_by=[],
+                    filter_action="custom",
+                    filter_query="",
+                    style_table={"overflowX": "auto"},
+                    style_cell={
+                        "maxWidth": "240px",
+                        "overflow": "hidden",
+                        "textOverflow": "ellipsis",
+                    },
+                ),
+            ]
+        )
+
+        self.register_callbacks()
+
+    def get_html(self) -> html.Div:
+        return self.div
+
+    def register_callbacks(self):
+        # Paging, sorting and filtering run on the server
+        @self.app.callback(
+            [
+                Output("movie-table", "data"),
+                Output("movie-table", "page_count"),
+                Output("movie-table-count", "children"),
+            ],
+            [
+                Input("movie-table", "page_current"),
+                Input("movie-table", "page_size"),
+                Input("movie-table", "sort_by"),
+                Input("movie-table", "filter_query"),
+            ],
+        )
+        def update_table(page_current, page_size, sort_by, filter_query):
+            page_size = page_size or self.page_size
+            sort_column, descending = None, False
+            if sort_by:
+                sort_column = sort_by[0]["column_id"]
+                descending = sort_by[0]["direction"] == "desc"
+
+            rows = self.index.query(filter_query, sort_column, descending)
+            page_count = max(1, int(np.ceil(len(rows) / page_size)))
+            page = min(page_current or 0, page_count - 1)
+            return (
+                self.page_records(rows[page * page_size : (page + 1) * page_size]),
+                page_count,
+                f"{len(rows):,} of {len(self.data):,} movies",
+            )
+
+    def page_records(self, rows: np.ndarray) -> list:
+        """The visible rows as DataTable records."""
+        page = self.data.iloc[rows][self.columns]
+        page = page.assign(release_date=page["release_date"].dt.strftime("%Y-%m-%d"))
+        return page.astype(object).where(page.notna(), None).to_dict("records")
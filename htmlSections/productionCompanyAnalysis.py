@@ -1,41 +1,61 @@
 import dash
+import numpy as np
 import pandas as pd
 from dash import html, dcc
-from dash.dependencies import Input, Output
+from dash.dependencies import Input, Output, State
+from dash.exceptions import PreventUpdate
 import plotly.express as px
+import plotly.graph_objects as go
+from plotly.subplots import make_subplots
+from dataProcessing.categoricalEncoding import EncodedRelation
+from dataProcessing.entitySeries import EntitySeries
+from dataProcessing.groupStatistics import GroupStatistics, describe_comparison
+from dataProcessing.textIndex import NameIndex
+from dataProcessing.weightedRating import WeightedRating
+from server.exportEndpoint import export_url
+from server.snapshotRouter import SNAPSHOT_STORE
 
 
 class ProductionCompanyAnalysis:
+    # Number of dropdown options shipped with the layout and per search
+    default_options = 20
+    # Metrics side by side in the comparison chart and the selection limit
+    comparison_metrics = ["revenue", "popularity", "vote_average"]
+    max_compared = 50
+
     def __init__(self, app: dash.Dash, data: pd.DataFrame) -> None:
         self.app = app
-        self.data = data.copy()
-
-        # Ensure production_companies is treated as a list
-        self.data["production_companies"] = self.data["production_companies"].str.split(
-            ", "
-        )
+        self.data = data
 
-        # Explode so each company is treated individually
-        self.exploded_data = self.data.explode("production_companies").dropna(
-            subset=["production_companies"]
-        )
+        # (movie row, company) pairs as int32 codes into one shared dictionary
+        relation = EncodedRelation.shared(self.data, "production_companies")
 
-        # Remove leading/trailing whitespace from company names
-        self.exploded_data["production_companies"] = self.exploded_data[
-            "production_companies"
-        ].str.strip()
+        # Filter companies with at least 5 movies
+        self.companies = relation.select(relation.counts >= 5)
 
-        # Count movies per production company
-        company_counts = self.exploded_data["production_companies"].value_counts()
+        # Per-movie metric values; per-company aggregates are computed on first use
+        self.metric_values = {
+            metric: self.data[metric].to_numpy(dtype=float)
+            for metric in ["revenue", "vote_average", "popularity"]
+        }
+        # Weighted ratings shrink the vote averages of little-voted groups
+        # toward the overall mean; significance tests use the vote averages
+        self.metric_values["weighted_rating"] = self.metric_values["vote_average"]
+        self.vote_counts = self.data["vote_count"].to_numpy(dtype=float)
+        self.weighted_rating = WeightedRating()
+        self.aggregates = {}
+        self.statistics = GroupStatistics()
 
-        # Filter companies with at least 5 movies
-        valid_companies = company_counts[company_counts >= 5].index.tolist()
-        self.filtered_data = self.exploded_data[
-            self.exploded_data["production_companies"].isin(valid_companies)
-        ]
+        # Per-company x year/decade series, the timeline chart slices it
+        self.series = EntitySeries(self.companies, self.data)
 
-        # Sorted list for dropdown
-        unique_companies = sorted(valid_companies)
+        # Dropdown options are searched server-side by name, ranked by movie count
+        codes = self.companies.present_codes()
+        self.company_names = self.companies.names(codes)
+        self.name_index = NameIndex(self.company_names, self.companies.counts[codes])
+        default_company = self.company_names[0] if len(codes) else None
+        # The significance test compares against a second company
+        default_against = self.company_names[1] if len(codes) > 1 else None
 
         # Layout
         self.div = html.Div(
@@ -44,11 +64,10 @@ class ProductionCompanyAnalysis:
                 # Dropdown to select a production company
                 dcc.Dropdown(
                     id="production-company-dropdown",
-                    options=[
-                        {"label": company, "value": company}
-                        for company in unique_companies
-                    ],
-                    value=unique_companies[0] if unique_companies else None,
+                    options=self.company_options(
+                        self.name_index.top(self.default_options), default_company
+                    ),
+                    value=default_company,
                     placeholder="Select a production company",
                 ),
                 # Radio buttons for selecting metric (Revenue, Vote Average, Popularity)
@@ -57,6 +76,7 @@ class ProductionCompanyAnalysis:
                     options=[
                         {"label": "Revenue", "value": "revenue"},
                         {"label": "Vote Average", "value": "vote_average"},
+                        {"label": "Weighted Rating", "value": "weighted_rating"},
                         {"label": "Popularity", "value": "popularity"},
                     ],
                     value="revenue",
@@ -91,8 +111,57 @@ class ProductionCompanyAnalysis:
                 ),
                 # Graph to display the selected production company's data
                 dcc.Graph(id="production-company-chart"),
+                # Significance of the selected company against a second one
+                html.Label("Test against"),
+                dcc.Dropdown(
+                    id="production-company-against-dropdown",
+                    options=self.company_options(
+                        self.name_index.top(self.default_options), default_against
+                    ),
+                    value=default_against,
+                    placeholder="Select a company to test against",
+                ),
+                html.P(id="production-company-significance"),
+                # How the selected company evolves over time
+                html.Div(
+                    [
+                        dcc.Dropdown(
+                            id="company-timeline-measure",
+                            options=[
+                                {"label": label, "value": measure}
+                                for measure, label in EntitySeries.measures.items()
+                            ],
+                            value="count",
+                            clearable=False,
+                        ),
+                        dcc.RadioItems(
+                            id="company-timeline-granularity",
+                            options=[
+                                {"label": "Year", "value": "year"},
+                                {"label": "Decade", "value": "decade"},
+                            ],
+                            value="decade",
+                            inline=True,
+                        ),
+                        dcc.Graph(id="company-timeline-chart"),
+                    ]
+                ),
                 # Graph to display the top companies based on the selected metric
                 dcc.Graph(id="top-companies-chart"),
+                # Download of the movies behind the clicked bar
+                html.A(id="company-export-link", download=""),
+                # Several companies compared side by side
+                html.Label("Compare companies"),
+                dcc.Dropdown(
+                    id="company-comparison-dropdown",
+                    options=self.company_options(
+                        self.name_index.top(self.default_options)
+                    ),
+                    value=list(self.company_names[self.name_index.top(5)]),
+                    multi=True,
+                    placeholder="Select companies to compare",
+                ),
+                dcc.Graph(id="company-comparison-chart"),
             ]
         )
 
@@ -102,6 +171,33 @@ class ProductionCompanyAnalysis:
         return self.div
 
     def register_callbacks(self):
+        # Only the matches of the typed text are sent to the browser
+        @self.app.callback(
+            Output("production-company-dropdown", "options"),
+            Input("production-company-dropdown", "search_value"),
+            State("production-company-dropdown", "value"),
+        )
+        def update_company_options(search_value, selected_company):
+            if not search_value:
+                raise PreventUpdate
+            return self.company_options(
+                self.name_index.search(search_value, limit=self.default_options),
+                selected_company,
+            )
+
+        @self.app.callback(
+            Output("production-company-against-dropdown", "options"),
+            Input("production-company-against-dropdown", "search_value"),
+            State("production-company-against-dropdown", "value"),
+        )
+        def update_against_options(search_value, against):
+            if not search_value:
+                raise PreventUpdate
+            return self.company_options(
+                self.name_index.search(search_value, limit=self.default_options),
+                against,
+            )
+
         # Callback for controlling the visibility of the aggregation radio buttons
         @self.app.callback(
             Output("aggregation-selector", "style"),
@@ -115,46 +211,43 @@ class ProductionCompanyAnalysis:
 
         # Callback for updating the selected production company chart
         @self.app.callback(
-            Output("production-company-chart", "figure"),
+            [
+                Output("production-company-chart", "figure"),
+                Output("production-company-significance", "children"),
+            ],
             [
                 Input("production-company-dropdown", "value"),
                 Input("metric-selector", "value"),
                 Input("aggregation-selector", "value"),
+                Input("production-company-against-dropdown", "value"),
             ],
         )
-        def update_chart(selected_company, selected_metric, aggregation_method):
+        def update_chart(
+            selected_company, selected_metric, aggregation_method, against
+        ):
             if not selected_company:
-                return px.bar(title="No data available")
+                return px.bar(title="No data available"), ""
 
-            # Filter data for the selected company
-            company_data = self.filtered_data[
-                self.filtered_data["production_companies"] == selected_company
-            ]
+            # Names missing from this dataset (e.g. after a snapshot switch)
+            # have no code, or no movies in the relation
+            code = self.companies.code(selected_company)
+            if code < 0 or self.companies.counts[code] == 0:
+                return px.bar(title=f"No data available for {selected_company}"), ""
 
-            # Handle different metrics and aggregation methods
-            if selected_metric in ["revenue", "popularity"]:
-                if aggregation_method == "sum":
-                    company_stats = (
-                        company_data.groupby("production_companies")[selected_metric]
-                        .sum()
-                        .reset_index()
-                    )
-                    title_suffix = "Total"
-                else:
-                    company_stats = (
-                        company_data.groupby("production_companies")[selected_metric]
-                        .mean()
-                        .reset_index()
-                    )
-                    title_suffix = "Average"
-            elif selected_metric == "vote_average":
-                # Vote average does not use sum/mean aggregation options
-                company_stats = (
-                    company_data.groupby("production_companies")[selected_metric]
-                    .mean()
-                    .reset_index()
-                )
-                title_suffix = "Average"
+            # Look up the selected company's precomputed aggregate by code
+            values, title_suffix = self.aggregate(selected_metric, aggregation_method)
+            company_stats = pd.DataFrame(
+                {
+                    "production_companies": [selected_company],
+                    selected_metric: [values[code]],
+                }
+            )
+
+            # 95% bootstrap confidence interval for averages
+            error_bars = {}
+            if title_suffix == "Average":
+                company_stats = self.add_error_bars(company_stats, selected_metric)
+                error_bars = {"error_y": "error_upper", "error_y_minus": "error_lower"}
 
             # Create bar chart
             fig = px.bar(
@@ -162,6 +255,7 @@ class ProductionCompanyAnalysis:
                 x="production_companies",
                 y=selected_metric,
                 text=selected_metric,
+                **error_bars,
                 labels={
                     "production_companies": "Production Company",
                     selected_metric: selected_metric.capitalize(),
@@ -172,7 +266,31 @@ class ProductionCompanyAnalysis:
             fig.update_traces(texttemplate="%{text:.2s}")
             fig.update_layout(xaxis={"categoryorder": "total descending"})
 
-            return fig
+            return fig, self.significance(selected_company, against, selected_metric)
+
+        # Callback for the selected company's timeline, a slice of the series store
+        @self.app.callback(
+            Output("company-timeline-chart", "figure"),
+            [
+                Input("production-company-dropdown", "value"),
+                Input("company-timeline-measure", "value"),
+                Input("company-timeline-granularity", "value"),
+            ],
+        )
+        def update_timeline_chart(selected_company, measure, granularity):
+            if not selected_company:
+                return px.line(title="No data available")
+
+            timeline = self.series.frame([selected_company], granularity, measure)
+            label = EntitySeries.measures[measure]
+            return px.line(
+                timeline,
+                x="period",
+                y=measure,
+                markers=True,
+                labels={"period": granularity.capitalize(), measure: label},
+                title=f"{selected_company}: {label} per {granularity.capitalize()}",
+            )
 
         # Callback for updating the top companies chart
         @self.app.callback(
@@ -184,38 +302,26 @@ class ProductionCompanyAnalysis:
             ],
         )
         def update_top_companies_chart(selected_metric, aggregation_method, top_n):
-            # Aggregate the data for the selected metric and aggregation method
-            if selected_metric in ["revenue", "popularity"]:
-                if aggregation_method == "sum":
-                    company_stats = (
-                        self.filtered_data.groupby("production_companies")[
-                            selected_metric
-                        ]
-                        .sum()
-                        .reset_index()
-                    )
-                    title_suffix = "Total"
-                else:
-                    company_stats = (
-                        self.filtered_data.groupby("production_companies")[
-                            selected_metric
-                        ]
-                        .mean()
-                        .reset_index()
-                    )
-                    title_suffix = "Average"
-            elif selected_metric == "vote_average":
-                company_stats = (
-                    self.filtered_data.groupby("production_companies")[selected_metric]
-                    .mean()
-                    .reset_index()
-                )
-                title_suffix = "Average"
+            # Aggregates of all companies at once, indexed by code
+            values, title_suffix = self.aggregate(selected_metric, aggregation_method)
 
             # Sort by the selected metric and get the top N companies
-            company_stats_sorted = company_stats.sort_values(
-                by=selected_metric, ascending=False
-            ).head(top_n)
+            codes = self.companies.present_codes()
+            top_codes = codes[np.argsort(-values[codes], kind="stable")[:top_n]]
+            company_stats_sorted = pd.DataFrame(
+                {
+                    "production_companies": self.companies.names(top_codes),
+                    selected_metric: values[top_codes],
+                }
+            )
+
+            # 95% bootstrap confidence intervals for averages
+            error_bars = {}
+            if title_suffix == "Average":
+                company_stats_sorted = self.add_error_bars(
+                    company_stats_sorted, selected_metric
+                )
+                error_bars = {"error_y": "error_upper", "error_y_minus": "error_lower"}
 
             # Create bar chart for top companies
             fig = px.bar(
@@ -223,6 +329,7 @@ class ProductionCompanyAnalysis:
                 x="production_companies",
                 y=selected_metric,
                 text=selected_metric,
+                **error_bars,
                 labels={
                     "production_companies": "Production Company",
                     selected_metric: selected_metric.capitalize(),
@@ -234,3 +341,155 @@ class ProductionCompanyAnalysis:
             fig.update_layout(xaxis={"categoryorder": "total descending"})
 
             return fig
+
+        # Export link of the clicked bar, or of the selected company
+        @self.app.callback(
+            [
+                Output("company-export-link", "href"),
+                Output("company-export-link", "children"),
+            ],
+            [
+                Input("top-companies-chart", "clickData"),
+                Input("production-company-dropdown", "value"),
+            ],
+            # The tab's snapshot, the link names it
+            State(SNAPSHOT_STORE, "data"),
+        )
+        def update_export_link(click_data, selected_company, snapshot):
+            company = selected_company
+            if dash.ctx.triggered_id == "top-companies-chart" and click_data:
+                company = click_data["points"][0]["x"]
+            if not company:
+                return None, ""
+            return (
+                export_url(snapshot=snapshot, company=company),
+                f"Download the movies of {company} (CSV)",
+            )
+
+        @self.app.callback(
+            Output("company-comparison-dropdown", "options"),
+            Input("company-comparison-dropdown", "search_value"),
+            State("company-comparison-dropdown", "value"),
+        )
+        def update_comparison_options(search_value, selected_companies):
+            if not search_value:
+                raise PreventUpdate
+            return self.company_options(
+                self.name_index.search(search_value, limit=self.default_options),
+                selected_companies,
+            )
+
+        # One lookup of all selected codes in the (code, metric) matrix
+        @self.app.callback(
+            Output("company-comparison-chart", "figure"),
+            [
+                Input("company-comparison-dropdown", "value"),
+                Input("aggregation-selector", "value"),
+            ],
+        )
+        def update_comparison_chart(selected_companies, aggregation_method):
+            names = np.asarray(
+                (selected_companies or [])[: self.max_compared], dtype=object
+            )
+            if len(names) == 0:
+                return px.bar(title="No companies selected")
+
+            codes = self.companies.codes_of(names)
+            known = codes >= 0
+            names, codes = names[known], codes[known]
+            values, title_suffixes = self.comparison_matrix(aggregation_method)
+            block = values[codes]
+
+            # One bar trace per metric, however many company names are selected
+            fig = make_subplots(
+                rows=1,
+                cols=len(self.comparison_metrics),
+                subplot_titles=[
+                    f"{suffix} {metric.replace('_', ' ').capitalize()}"
+                    for metric, suffix in zip(self.comparison_metrics, title_suffixes)
+                ],
+            )
+            for column in range(len(self.comparison_metrics)):
+                fig.add_trace(
+                    go.Bar(x=names, y=block[:, column], showlegend=False),
+                    row=1,
+                    col=column + 1,
+                )
+            fig.update_layout(title=f"{len(names)} Companies Compared")
+            return fig
+
+    def company_options(self, positions, selected=None) -> list:
+        # Keep the current selection (one name or several) in the options so
+        # it stays visible
+        if isinstance(selected, str):
+            selected = [selected]
+        names = [*(selected or []), *self.company_names[positions]]
+        return [{"label": name, "value": name} for name in dict.fromkeys(names)]
+
+    def aggregate(self, metric: str, aggregation_method: str) -> tuple:
+        """Per-company aggregate of `metric` (indexed by code) and its title suffix."""
+        if metric == "weighted_rating":
+            return (
+                self.weighted_rating.for_relation(
+                    "companies",
+                    self.companies,
+                    self.metric_values["vote_average"],
+                    self.vote_counts,
+                ),
+                "Bayesian",
+            )
+
+        # Vote average does not use sum/mean aggregation options
+        if metric != "vote_average" and aggregation_method == "sum":
+            how, title_suffix = "sum", "Total"
+        else:
+            how, title_suffix = "mean", "Average"
+
+        if (metric, how) not in self.aggregates:
+            self.aggregates[(metric, how)] = self.companies.aggregate(
+                self.metric_values[metric], how
+            )
+        return self.aggregates[(metric, how)], title_suffix
+
+    def comparison_matrix(self, aggregation_method: str) -> tuple:
+        """(code, metric) matrix of the comparison metrics and their title suffixes."""
+        key = ("comparison", aggregation_method)
+        if key not in self.aggregates:
+            columns, title_suffixes = zip(
+                *(
+                    self.aggregate(metric, aggregation_method)
+                    for metric in self.comparison_metrics
+                )
+            )
+            self.aggregates[key] = np.column_stack(columns), list(title_suffixes)
+        return self.aggregates[key]
+
+    def significance(self, selected: str, against: str | None, metric: str) -> str:
+        """Test of `selected` against a second company, on the movies only one has."""
+        if not against or against == selected:
+            return "Select a second company to test against."
+        code_a, code_b = self.companies.code(selected), self.companies.code(against)
+        if code_b < 0 or self.companies.counts[code_b] == 0:
+            return f"No data available for {against}"
+        rows = self.companies.exclusive_rows(code_a, code_b)
+        comparison = self.statistics.compare(
+            ("exclusive", selected, against, metric),
+            lambda: self.metric_values[metric][rows[0]],
+            ("exclusive", against, selected, metric),
+            lambda: self.metric_values[metric][rows[1]],
+        )
+        return describe_comparison(comparison, selected, against)
+
+    def group_values(self, company: str, metric: str):
+        rows = self.companies.group_rows(self.companies.code(company))
+        return self.metric_values[metric][rows]
+
+    def add_error_bars(self, stats: pd.DataFrame, metric: str) -> pd.DataFrame:
+        """Add bootstrap error bar lengths around the means in `stats`."""
+        _, upper, lower = self.statistics.error_bars(
+            [
+                ((name, metric), lambda name=name: self.group_values(name, metric))
+                for name in stats["production_companies"]
+            ]
+        )
+        return stats.assign(error_upper=upper, error_lower=lower)
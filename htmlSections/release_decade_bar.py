@@ -1,8 +1,10 @@
 import pandas as pd
 import dash
 from dash import dcc, html
+from dash.dependencies import Input, Output
 import plotly.express as px
 from htmlSections.section import Section
+from dataProcessing.timeRollups import TimeRollup
 
 
 class ReleaseDecadeBar(Section):
@@ -12,27 +14,24 @@ class ReleaseDecadeBar(Section):
         self.app: dash.Dash = app
         self.data: pd.DataFrame = data
 
-        self.decade_counts = (
-            self.data["decade"].value_counts().sort_index().reset_index()
-        )
-        self.decade_counts.columns = ["decade", "film_count"]
-
-        self.bar_chart = px.bar(
-            self.decade_counts,
-            x="decade",
-            y="film_count",
-            labels={"decade": "Decade", "film_count": "Number of Films"},
-            text="film_count",
-        )
-        self.bar_chart.update_traces(textposition="outside")
-        self.bar_chart.update_layout(
-            xaxis_title="Decade", yaxis_title="Number of Films"
-        )
+        # Film counts for every granularity are materialized once
+        self.rollup = TimeRollup(self.data, metrics=())
+
+        self.bar_chart = self.create_figure("decade")
 
         self.div = dash.html.Div(
             [
                 dash.html.H1("Veröffentlichte Filme per Decade"),
-                dash.dcc.Graph(figure=self.bar_chart),
+                dcc.RadioItems(
+                    id="release-granularity-selector",
+                    options=[
+                        {"label": granularity.title(), "value": granularity}
+                        for granularity in TimeRollup.granularities
+                    ],
+                    value="decade",
+                    inline=True,
+                ),
+                dash.dcc.Graph(id="release-count-chart", figure=self.bar_chart),
             ]
         )
 
@@ -43,4 +42,27 @@ class ReleaseDecadeBar(Section):
         return self.div
 
     def register_callbacks(self):
-        return super().register_callbacks()
+        @self.app.callback(
+            Output("release-count-chart", "figure"),
+            Input("release-granularity-selector", "value"),
+        )
+        def update_release_chart(granularity):
+            return self.create_figure(granularity)
+
+    def create_figure(self, granularity: str):
+        counts = self.rollup.totals(granularity)
+        period = granularity.title()
+
+        bar_chart = px.bar(
+            counts,
+            x="label",
+            y="count",
+            labels={"label": period, "count": "Number of Films"},
+            # Labels only stay readable for the coarse granularities
+            text="count" if len(counts) <= 50 else None,
+        )
+        bar_chart.update_traces(textposition="outside")
+        bar_chart.update_layout(
+            xaxis_title=period, yaxis_title="Number of Films", xaxis_type="category"
+        )
+        return bar_chart
@@ -0,0 +1,131 @@
+import dash
+import dash_bootstrap_components as dbc
+import pandas as pd
+from dash import html, dcc
+from dash.dependencies import Input, Output, State
+from dash.exceptions import PreventUpdate
+from htmlSections.section import Section
+from dataProcessing.similarityIndex import SimilarityIndex
+from dataProcessing.textIndex import TitleIndex
+
+
+class SimilarMovies(Section):
+    # Built once per dataset before the sections that use it
+    shared_artifacts = (TitleIndex.shared,)
+
+    def __init__(self, app: dash.Dash, data: pd.DataFrame) -> None:
+        self.app: dash.Dash = app
+        self.data: pd.DataFrame = data
+
+        # Movies are selected by id, the indexes work on row positions
+        self.positions_by_id = pd.Series(range(len(self.data)), index=self.data["id"])
+        self.positions_by_id = self.positions_by_id[
+            ~self.positions_by_id.index.duplicated()
+        ]
+
+        self.similarity_index = SimilarityIndex(self.data)
+        self.title_index = TitleIndex.shared(self.data)
+
+        # Preselect the most popular movie
+        default_position = int(self.data["popularity"].to_numpy().argmax())
+
+        self.div = html.Div(
+            [
+                html.H1("Similar Movies"),
+                html.Label("Select one or more movies:"),
+                dcc.Dropdown(
+                    id="similar-movies-dropdown",
+                    options=self.movie_options([default_position]),
+                    value=[int(self.data["id"].iloc[default_position])],
+                    multi=True,
+                    placeholder="Search a movie title",
+                ),
+                html.Div(
+                    [
+                        html.Label("Number of Similar Movies"),
+                        dcc.Slider(
+                            id="similar-movies-k-slider",
+                            min=5,
+                            max=20,
+                            step=5,
+                            marks={5: "5", 10: "10", 15: "15", 20: "20"},
+                            value=10,
+                        ),
+                    ]
+                ),
+                html.Div(id="similar-movies-results"),
+            ]
+        )
+
+        self.register_callbacks()
+
+    def get_html(self) -> html.Div:
+        return self.div
+
+    def register_callbacks(self):
+        # Options are searched server-side instead of shipping every title
+        @self.app.callback(
+            Output("similar-movies-dropdown", "options"),
+            Input("similar-movies-dropdown", "search_value"),
+            State("similar-movies-dropdown", "value"),
+        )
+        def update_options(search_value, selected_ids):
+            if not search_value:
+                raise PreventUpdate
+
+            # Keep the current selection in the options so it stays visible
+            selected = self.positions_by_id.reindex(selected_ids or []).dropna()
+            matches = self.title_index.search(search_value, limit=20)
+            positions = list(dict.fromkeys([*selected.astype(int), *matches]))
+            return self.movie_options(positions)
+
+        @self.app.callback(
+            Output("similar-movies-results", "children"),
+            Input("similar-movies-dropdown", "value"),
+            Input("similar-movies-k-slider", "value"),
+        )
+        def update_results(selected_ids, k):
+            if not selected_ids:
+                return html.P("Select a movie to find similar ones.")
+
+            positions = self.positions_by_id.reindex(selected_ids).dropna().astype(int)
+            # Ids of another snapshot, or unknown ones, have no row here
+            if len(positions) == 0:
+                return html.P("No data available for the selected movies.")
+            # One vectorized tree query for all selected movies
+            distances, neighbours = self.similarity_index.query(positions, k=k)
+
+            results = []
+            for position, row_distances, row_neighbours in zip(
+                positions, distances, neighbours
+            ):
+                similar = self.data.iloc[row_neighbours][
+                    ["title", "release_date", "vote_average", "popularity"]
+                ].copy()
+                similar["release_date"] = similar["release_date"].dt.year
+                similar["popularity"] = similar["popularity"].round(1)
+                similar["distance"] = row_distances.round(3)
+                similar.columns = [
+                    "Title",
+                    "Year",
+                    "Vote Average",
+                    "Popularity",
+                    "Distance",
+                ]
+
+                results += [
+                    html.H3(f"Similar to {self.data['title'].iloc[position]}"),
+                    dbc.Table.from_dataframe(
+                        similar, striped=True, hover=True, size="sm"
+                    ),
+                ]
+            return results
+
+    def movie_options(self, positions) -> list:
+        rows = self.data.iloc[list(positions)]
+        return [
+            {"label": f"{title} ({date.year})", "value": int(movie_id)}
+            for title, date, movie_id in zip(
+                rows["title"], rows["release_date"], rows["id"]
+            )
+        ]
@@ -0,0 +1,90 @@
+import time
+
+import dash
+import dash_bootstrap_components as dbc
+import pandas as pd
+from dash import html, dcc
+from dash.dependencies import Input, Output
+from htmlSections.section import Section
+from dataProcessing.textIndex import TitleIndex
+
+
+class TitleSearch(Section):
+    # Built once per dataset before the sections that use it
+    shared_artifacts = (TitleIndex.shared,)
+
+    def __init__(self, app: dash.Dash, data: pd.DataFrame) -> None:
+        self.app: dash.Dash = app
+        self.data: pd.DataFrame = data
+
+        # Columns shown for every match
+        self.result_columns = [
+            "title",
+            "release_date",
+            "genres",
+            "vote_average",
+            "vote_count",
+            "popularity",
+            "revenue",
+        ]
+
+        # Build the prefix/trigram index once, popular titles rank first on ties
+        self.index = TitleIndex.shared(self.data)
+
+        self.div = html.Div(
+            [
+                html.H1("Title Search"),
+                dcc.Input(
+                    id="title-search-input",
+                    type="text",
+                    placeholder="Start typing a movie title...",
+                    debounce=False,
+                    style={"width": "100%", "margin-bottom": "15px"},
+                ),
+                html.Div(id="title-search-timing", style={"color": "#888"}),
+                html.Div(id="title-search-results"),
+            ]
+        )
+
+        self.register_callbacks()
+
+    def get_html(self) -> html.Div:
+        return self.div
+
+    def register_callbacks(self):
+        @self.app.callback(
+            [
+                Output("title-search-results", "children"),
+                Output("title-search-timing", "children"),
+            ],
+            Input("title-search-input", "value"),
+        )
+        def update_results(query):
+            if not query:
+                return html.P("Type a title to search."), ""
+
+            start = time.perf_counter()
+            positions = self.index.search(query, limit=20)
+            elapsed_ms = (time.perf_counter() - start) * 1000
+
+            if len(positions) == 0:
+                return html.P(f"No titles match '{query}'."), ""
+
+            matches = self.format_matches(self.data.iloc[positions])
+            return (
+                dbc.Table.from_dataframe(matches, striped=True, hover=True, size="sm"),
+                f"{len(matches)} matches in {elapsed_ms:.2f} ms",
+            )
+
+    def format_matches(self, matches: pd.DataFrame) -> pd.DataFrame:
+        """Select and prettify the columns of the matched rows."""
+        matches = matches[self.result_columns].copy()
+        matches["release_date"] = matches["release_date"].dt.year
+        # Genres may already have been split into lists by another section
+        matches["genres"] = matches["genres"].apply(
+            lambda genres: ", ".join(genres) if isinstance(genres, list) else genres
+        )
+        matches["popularity"] = matches["popularity"].round(1)
+        matches["revenue"] = matches["revenue"].map("{:,.0f}".format)
+        matches = matches.rename(columns={"release_date": "year"})
+        return matches.rename(columns=lambda column: column.replace("_", " ").title())
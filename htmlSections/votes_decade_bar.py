@@ -1,8 +1,10 @@
 import dash
 import pandas as pd
 from dash import dcc, html
+from dash.dependencies import Input, Output
 import plotly.express as px
 from htmlSections.section import Section
+from dataProcessing.timeRollups import TimeRollup
 
 
 class VotesDecadeBar(Section):
@@ -12,31 +14,26 @@ class VotesDecadeBar(Section):
         self.app: dash.Dash = app
         self.data: pd.DataFrame = data
 
-        self.decade_counts = (
-            self.data["decade"].value_counts().sort_index().reset_index()
-        )
-        self.decade_counts.columns = ["decade", "film_count"]
+        # Film counts and vote sums for every granularity are materialized once
+        self.rollup = TimeRollup(self.data, metrics=("vote_count",))
 
-        self.vote_counts_by_decade = (
-            self.data.groupby("decade")["vote_count"].sum().reset_index()
-        )
-
-        self.vote_chart = px.bar(
-            self.vote_counts_by_decade,
-            x="decade",
-            y="vote_count",
-            labels={"decade": "Decade", "vote_count": "Total Votes"},
-            text="vote_count",
-        )
-        self.vote_chart.update_traces(textposition="outside")
-        self.vote_chart.update_layout(xaxis_title="Decade", yaxis_title="Total Votes")
+        self.vote_chart = self.create_figure("decade")
 
         self.div = dash.html.Div(
             [
                 dash.html.H1(
                     "Anzahl der Votes die insgesamt in einer Decade abgegeben wurden"
                 ),
-                dash.dcc.Graph(figure=self.vote_chart),
+                dcc.RadioItems(
+                    id="votes-granularity-selector",
+                    options=[
+                        {"label": granularity.title(), "value": granularity}
+                        for granularity in TimeRollup.granularities
+                    ],
+                    value="decade",
+                    inline=True,
+                ),
+                dash.dcc.Graph(id="votes-sum-chart", figure=self.vote_chart),
             ]
         )
 
@@ -47,4 +44,26 @@ class VotesDecadeBar(Section):
         return self.div
 
     def register_callbacks(self):
-        return super().register_callbacks()
+        @self.app.callback(
+            Output("votes-sum-chart", "figure"),
+            Input("votes-granularity-selector", "value"),
+        )
+        def update_votes_chart(granularity):
+            return self.create_figure(granularity)
+
+    def create_figure(self, granularity: str):
+        votes = self.rollup.totals(granularity)
+        period = granularity.title()
+
+        vote_chart = px.bar(
+            votes,
+            x="label",
+            y="vote_count_sum",
+            labels={"label": period, "vote_count_sum": "Total Votes"},
+            text="vote_count_sum" if len(votes) <= 50 else None,
+        )
+        vote_chart.update_traces(textposition="outside")
+        vote_chart.update_layout(
+            xaxis_title=period, yaxis_title="Total Votes", xaxis_type="category"
+        )
+        return vote_chart
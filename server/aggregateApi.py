@@ -0,0 +1,157 @@
+import hashlib
+import json
+import time
+
+import dash
+import flask
+
+from dataProcessing.aggregateQuery import AggregateQuery
+from dataProcessing.datasetRegistry import DatasetRegistry
+from dataProcessing.lruCache import LRUCache
+
+
+class AggregateApi:
+    """Read-only JSON API over the aggregates the dashboard charts show.
+
+    `/api/aggregate?dimension=company&metric=revenue&agg=mean&min_count=5&top=10`
+    groups the movies of a snapshot (`snapshot`, else the client's cookie
+    through `current()`) by a dimension. Any other dimension given as a
+    parameter filters, e.g. `&decade=1990&genre=Drama`; repeated values are
+    alternatives. `GET /api/aggregate/schema` lists the choices.
+
+    Bodies are cached per snapshot version and query, with an ETag for
+    conditional requests. Every response carries a Server-Timing header
+    with the time spent per phase.
+    """
+
+    def __init__(
+        self,
+        app: dash.Dash,
+        registry: DatasetRegistry,
+        current,
+        route: str = "/api/aggregate",
+        max_entries: int = 1024,
+    ) -> None:
+        self.registry = registry
+        self.current = current
+        # Query engines of loaded snapshot versions, and serialized answers
+        self.engines = LRUCache(max_entries=registry.max_snapshots)
+        self.responses = LRUCache(max_entries=max_entries)
+
+        app.server.add_url_rule(route, "aggregate_api", self.answer)
+        app.server.add_url_rule(f"{route}/schema", "aggregate_schema", self.schema)
+
+    def release(self, name: str, version: str) -> None:
+        """Registry retire hook: drop the engine of an evicted or replaced version."""
+        self.engines.discard(lambda key: key == (name, version))
+
+    def schema(self):
+        return flask.jsonify(
+            {
+                "snapshots": self.registry.names(),
+                "dimensions": list(AggregateQuery.dimensions),
+                "metrics": list(AggregateQuery.metrics),
+                "aggregations": list(AggregateQuery.aggregations),
+            }
+        )
+
+    def parse(self, args) -> dict:
+        """Validated query parameters; raises ValueError with the reason."""
+        dimension = args.get("dimension")
+        metric = args.get("metric")
+        how = args.get("agg", "mean")
+        if dimension not in AggregateQuery.dimensions:
+            raise ValueError(
+                f"dimension must be one of {list(AggregateQuery.dimensions)}"
+            )
+        if how not in AggregateQuery.aggregations:
+            raise ValueError(f"agg must be one of {list(AggregateQuery.aggregations)}")
+        if how != "count" and metric not in AggregateQuery.metrics:
+            raise ValueError(f"metric must be one of {list(AggregateQuery.metrics)}")
+        order = args.get("order", "desc")
+        if order not in ("asc", "desc"):
+            raise ValueError("order must be asc or desc")
+        try:
+            min_count = int(args.get("min_count", 1))
+            top = int(args["top"]) if "top" in args else None
+        except ValueError:
+            raise ValueError("min_count and top must be integers")
+        return {
+            "dimension": dimension,
+            "metric": metric if how != "count" else None,
+            "how": how,
+            "filters": tuple(
+                (name, tuple(sorted(args.getlist(name))))
+                for name in AggregateQuery.dimensions
+                if name in args and name != dimension
+            ),
+            "min_count": min_count,
+            "top": top,
+            "descending": order == "desc",
+        }
+
+    def answer(self):
+        timings = []
+        started = time.perf_counter()
+
+        def phase(name: str, since: float) -> float:
+            now = time.perf_counter()
+            timings.append(f"{name};dur={(now - since) * 1000:.2f}")
+            return now
+
+        args = flask.request.args
+        name = args.get("snapshot") or self.current()
+        if name not in self.registry.paths:
+            return self.error(404, f"Unknown snapshot: {name}")
+        try:
+            query = self.parse(args)
+        except ValueError as error:
+            return self.error(400, str(error))
+
+        version = self.registry.version(name)
+        etag = hashlib.sha1(
+            json.dumps([name, version, query], sort_keys=True).encode()
+        ).hexdigest()
+        if etag in flask.request.if_none_match:
+            response = flask.Response(status=304)
+        else:
+            body = self.responses.get(etag)
+            cache = "hit"
+            if body is None:
+                cache = "miss"
+                since = time.perf_counter()
+                engine = self.engines.get_or_compute(
+                    (name, version),
+                    lambda: AggregateQuery(self.registry.get(name)[1]),
+                )
+                since = phase("snapshot", since)
+                rows = engine.query(**query)
+                since = phase("query", since)
+                body = json.dumps(
+                    {
+                        "snapshot": name,
+                        "version": version,
+                        "dimension": query["dimension"],
+                        "metric": query["metric"],
+                        "agg": query["how"],
+                        "filters": {
+                            key: list(names) for key, names in query["filters"]
+                        },
+                        "rows": rows,
+                    }
+                ).encode()
+                phase("serialize", since)
+                self.responses.put(etag, body)
+            timings.append(f'cache;desc="{cache}"')
+            response = flask.Response(body, mimetype="application/json")
+
+        response.set_etag(etag)
+        phase("total", started)
+        response.headers["Server-Timing"] = ", ".join(timings)
+        return response
+
+    @staticmethod
+    def error(status: int, message: str):
+        response = flask.jsonify({"error": message})
+        response.status_code = status
+        return response
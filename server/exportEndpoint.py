@@ -0,0 +1,194 @@
+from urllib.parse import urlencode
+
+import dash
+import flask
+import numpy as np
+import pandas as pd
+
+from dataProcessing.categoricalEncoding import EncodedRelation
+from dataProcessing.genreCube import GenreCube, bucket_of
+
+# Parquet export is optional, CSV works without pyarrow
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = pq = None
+
+EXPORT_ROUTE = "/export/movies"
+
+# Name columns a selection can filter on
+RELATION_COLUMNS = {
+    "company": "production_companies",
+    "country": "production_countries",
+}
+
+
+def export_url(format: str = "csv", snapshot: str | None = None, **selection) -> str:
+    """Link to the export of a selection, e.g. `export_url(company="Pixar")`.
+
+    `snapshot` names the dataset snapshot the link is for, the page's own
+    rather than whichever one the shared cookie names.
+    """
+    selection = {"snapshot": snapshot, **selection}
+    query = urlencode({key: value for key, value in selection.items() if value})
+    return f"{EXPORT_ROUTE}.{format}" + (f"?{query}" if query else "")
+
+
+class ChunkSink:
+    """Write-only file that hands out what was written since the last `take`.
+
+    Tracks the absolute position itself, so a writer that records offsets
+    (the Parquet footer) stays correct while the bytes are streamed away.
+    """
+
+    def __init__(self) -> None:
+        self.parts = []
+        self.position = 0
+        self.closed = False
+
+    def write(self, data) -> int:
+        data = bytes(data)
+        self.parts.append(data)
+        self.position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self.position
+
+    def writable(self) -> bool:
+        return True
+
+    def flush(self) -> None:
+        pass
+
+    def close(self) -> None:
+        self.closed = True
+
+    def take(self) -> bytes:
+        data, self.parts = b"".join(self.parts), []
+        return data
+
+
+class ExportEndpoint:
+    """Streams the movies of a selection as CSV or Parquet.
+
+    `GET /export/movies.csv?company=Pixar&columns=title,revenue` answers with
+    the selected rows of the current request's dataset (`dataset()`, the
+    `snapshot` parameter when given), one
+    chunk of `chunk_rows` rows at a time: only the selected row positions
+    and one projected chunk are in memory, however large the export. A
+    selection combines `company`, `country`, `genre` and a `period` of a
+    `granularity` (decade by default), optionally cut off at `before_year`.
+    """
+
+    formats = {"csv": "text/csv", "parquet": "application/vnd.apache.parquet"}
+
+    def __init__(
+        self,
+        app: dash.Dash,
+        dataset,
+        route: str = EXPORT_ROUTE,
+        chunk_rows: int = 50_000,
+    ) -> None:
+        self.dataset = dataset
+        self.chunk_rows = chunk_rows
+        app.server.add_url_rule(f"{route}.<format>", "export_movies", self.export)
+
+    def export(self, format: str):
+        if format not in self.formats:
+            flask.abort(404)
+        if format == "parquet" and pq is None:
+            flask.abort(501, "Parquet export needs pyarrow to be installed")
+
+        data = self.dataset()
+        args = flask.request.args
+        columns = [column for column in args.get("columns", "").split(",") if column]
+        positions = data.columns.get_indexer(columns or data.columns)
+        if (positions < 0).any():
+            unknown = [column for column in columns if column not in data.columns]
+            flask.abort(400, f"Unknown columns: {unknown}")
+
+        rows = self.select(data, args)
+        chunks = self.csv_chunks if format == "csv" else self.parquet_chunks
+        return flask.Response(
+            chunks(data, rows, positions),
+            mimetype=self.formats[format],
+            headers={"Content-Disposition": f"attachment; filename=movies.{format}"},
+        )
+
+    def select(self, data: pd.DataFrame, args) -> np.ndarray | None:
+        """Ascending row positions of the selection, None for all rows."""
+        selected = []
+        for parameter, column in RELATION_COLUMNS.items():
+            if parameter in args:
+                relation = EncodedRelation.shared(data, column)
+                selected.append(relation.group_rows(relation.code(args[parameter])))
+
+        granularity = args.get("granularity", "decade")
+        if granularity not in GenreCube.granularities:
+            flask.abort(400, f"Unknown granularity: {granularity}")
+        try:
+            period = int(args["period"]) if "period" in args else None
+            before_year = int(args["before_year"]) if "before_year" in args else None
+        except ValueError:
+            flask.abort(400, "period and before_year must be integers")
+
+        if "genre" in args:
+            # The genre cube holds the movies of every (genre, period) cell
+            cube = GenreCube.shared(data)
+            if period is None:
+                rows = cube.genres.group_rows(cube.genres.code(args["genre"]))
+            else:
+                rows = np.sort(
+                    cube.cell_rows(granularity, args["genre"], period, before_year)
+                )
+            selected.append(rows)
+        elif period is not None or before_year is not None:
+            release_date = data["release_date"]
+            months = release_date.dt.year * 12 + release_date.dt.month - 1
+            months = months.fillna(-1).to_numpy(dtype=np.int64)
+            keep = months >= 0
+            if period is not None:
+                keep &= bucket_of(granularity, months) == period
+            if before_year is not None:
+                keep &= months < before_year * 12
+            selected.append(np.flatnonzero(keep))
+
+        if not selected:
+            return None
+        rows = selected[0]
+        for other in selected[1:]:
+            rows = np.intersect1d(rows, other, assume_unique=True)
+        return rows
+
+    def chunks(self, data: pd.DataFrame, rows: np.ndarray | None, positions):
+        """The projected selection in chunks of `chunk_rows`, at least one."""
+        size = len(data) if rows is None else len(rows)
+        for start in range(0, max(size, 1), self.chunk_rows):
+            stop = start + self.chunk_rows
+            selection = slice(start, stop) if rows is None else rows[start:stop]
+            yield data.iloc[selection, positions]
+
+    def csv_chunks(self, data: pd.DataFrame, rows, positions):
+        for number, chunk in enumerate(self.chunks(data, rows, positions)):
+            yield chunk.to_csv(index=False, header=number == 0)
+
+    def parquet_chunks(self, data: pd.DataFrame, rows, positions):
+        """One Parquet row group per chunk, streamed as it is written."""
+        sink = ChunkSink()
+        writer = None
+        for chunk in self.chunks(data, rows, positions):
+            if writer is None:
+                # Text columns without a value in the first chunk are still text
+                schema = pa.Schema.from_pandas(chunk, preserve_index=False)
+                for index, field in enumerate(schema):
+                    if pa.types.is_null(field.type):
+                        schema = schema.set(index, field.with_type(pa.string()))
+                writer = pq.ParquetWriter(sink, schema)
+            writer.write_table(
+                pa.Table.from_pandas(chunk, schema=writer.schema, preserve_index=False)
+            )
+            yield sink.take()
+        writer.close()
+        yield sink.take()
@@ -0,0 +1,108 @@
+import html
+import threading
+import time
+
+import dash
+import flask
+import pandas as pd
+
+from dataProcessing.memoryUsage import memory_report
+
+
+def megabytes(nbytes: int) -> str:
+    return f"{nbytes / 2**20:.2f} MB"
+
+
+class MemoryPage:
+    """Debug page and JSON endpoint with the deep memory usage of the app.
+
+    `collect()` returns {snapshot name: (shared dataset, {section name:
+    section})} of everything currently loaded. The walk over it is cached
+    while `version()` (e.g. the loaded snapshot versions) stays the same,
+    for at most `max_age` seconds so the process RSS stays current.
+    """
+
+    def __init__(
+        self,
+        app: dash.Dash,
+        collect,
+        version=lambda: None,
+        max_age: float = 60.0,
+        route: str = "/debug/memory",
+    ) -> None:
+        self.collect = collect
+        self.version = version
+        self.max_age = max_age
+        # (version, time, report) of the last walk; one walk at a time
+        self._cached = None
+        self._lock = threading.Lock()
+        app.server.add_url_rule(f"{route}.json", "memory_json", self.json)
+        app.server.add_url_rule(route, "memory_page", self.page)
+
+    def report(self) -> dict:
+        with self._lock:
+            version = self.version()
+            cached = self._cached
+            if (
+                cached is None
+                or cached[0] != version
+                or time.monotonic() - cached[1] > self.max_age
+            ):
+                cached = self._cached = (
+                    version,
+                    time.monotonic(),
+                    memory_report(self.collect()),
+                )
+            return cached[2]
+
+    def json(self):
+        return flask.jsonify(self.report())
+
+    def page(self):
+        report = self.report()
+        parts = [
+            "<h1>Memory usage</h1>",
+            f"<p>Process RSS: {megabytes(report['rss_bytes'])}</p>",
+        ]
+        for snapshot in report["snapshots"]:
+            parts.append(f"<h2>{html.escape(snapshot['name'])}</h2>")
+            parts.append(
+                f"<p>Shared dataset: {megabytes(snapshot['dataset_bytes'])}</p>"
+            )
+            rows = [
+                (section["name"], attribute["name"], megabytes(attribute["bytes"]))
+                for section in snapshot["sections"]
+                for attribute in section["attributes"]
+            ]
+            totals = [
+                (section["name"], megabytes(section["bytes"]))
+                for section in snapshot["sections"]
+            ]
+            parts.append(self.table(totals, ["Section", "Own memory"]))
+            parts.append(self.table(rows, ["Section", "Attribute", "Own memory"]))
+
+        parts.append("<h2>Duplicated buffers (equal content, separate memory)</h2>")
+        parts.append(
+            self.table(
+                [
+                    (megabytes(buffer["bytes"]), buffer["copies"], buffer["owners"])
+                    for buffer in report["duplicated_buffers"]
+                ],
+                ["Size", "Copies", "Owners"],
+            )
+        )
+        parts.append("<h2>Shared buffers</h2>")
+        parts.append(
+            self.table(
+                [
+                    (megabytes(buffer["bytes"]), buffer["buffers"], buffer["owners"])
+                    for buffer in report["shared_buffers"]
+                ],
+                ["Size", "Buffers", "Owners"],
+            )
+        )
+        return "\n".join(parts)
+
+    @staticmethod
+    def table(rows: list, columns: list) -> str:
+        return pd.DataFrame(rows, columns=columns).to_html(index=False)
@@ -0,0 +1,73 @@
+import dash
+import flask
+from plotly.io.json import to_json_plotly
+
+from dataProcessing.lruCache import LRUCache
+
+
+class PageCache:
+    """Serialized page layouts, built once per page key.
+
+    `resolve(*input values)` maps a navigation to a hashable page key that
+    includes the dataset version, `build(page key)` returns its component.
+    Navigation requests (the callback writing `output`) are answered from
+    the cached JSON before Dash dispatches the callback, so the component
+    tree of a page is only serialized once. Callback requests are fetch
+    POSTs that the Dash renderer never revalidates, so there is no ETag:
+    a 304 would be treated as an error. The cache is bounded by the size of
+    the JSON bodies too, pages of retired snapshot versions are dropped.
+    """
+
+    def __init__(
+        self,
+        app: dash.Dash,
+        resolve,
+        build,
+        output: str = "page-content.children",
+        max_entries: int = 64,
+        max_bytes: int = 64 * 2**20,
+    ) -> None:
+        self.resolve = resolve
+        self.build = build
+        self.output = output
+        self.output_id, self.output_property = output.rsplit(".", 1)
+        self.pages = LRUCache(max_entries=max_entries, max_bytes=max_bytes, sizeof=len)
+
+        app.server.before_request(self.serve)
+
+    def release(self, name: str, version: str) -> None:
+        """Registry retire hook: drop the pages of an evicted or replaced version."""
+        self.pages.discard(lambda key: key[:2] == (name, version))
+
+    def serialized(self, page_key) -> bytes:
+        """JSON callback response of a page."""
+
+        def serialize() -> bytes:
+            return to_json_plotly(
+                {
+                    "multi": True,
+                    "response": {
+                        self.output_id: {self.output_property: self.build(page_key)}
+                    },
+                }
+            ).encode()
+
+        return self.pages.get_or_compute(page_key, serialize)
+
+    def serve(self):
+        request = flask.request
+        if request.method != "POST" or not request.path.endswith(
+            "_dash-update-component"
+        ):
+            return None
+
+        body = request.get_json(silent=True)
+        if not body or body.get("output") != self.output:
+            return None
+        values = [item.get("value") for item in body["inputs"]]
+        if None in values:
+            return None
+
+        return flask.Response(
+            self.serialized(self.resolve(*values)), mimetype="application/json"
+        )
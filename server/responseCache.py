@@ -0,0 +1,109 @@
+import gzip
+import hashlib
+import json
+
+import dash
+import flask
+
+from dataProcessing.lruCache import LRUCache
+
+
+class ResponseCache:
+    """Response caching for callbacks that are pure functions of their inputs.
+
+    For every enabled callback the cache key is a hash of the callback id,
+    the input and state values and the dataset version. A body cached by an
+    earlier request is returned (gzip compressed when the client accepts it)
+    without running the callback. Callback requests are fetch POSTs the Dash
+    renderer never revalidates, so there is no ETag/304 handling. The cache
+    is bounded by the total size of the stored bodies, since some figures
+    carry whole-dataset scatters. `version()` returns the dataset version of
+    the current request.
+    """
+
+    def __init__(
+        self,
+        app: dash.Dash,
+        version,
+        max_entries: int = 1024,
+        max_bytes: int = 64 * 2**20,
+        compress_min_size: int = 1024,
+    ) -> None:
+        self.app = app
+        self.version = version
+        self.compress_min_size = compress_min_size
+        self.callbacks = set()
+        # (body, gzip compressed body or None) per key
+        self.responses = LRUCache(
+            max_entries=max_entries,
+            max_bytes=max_bytes,
+            sizeof=lambda cached: len(cached[0]) + len(cached[1] or b""),
+        )
+
+        app.server.before_request(self.serve)
+        app.server.after_request(self.store)
+
+    def enable(self, *callback_ids: str) -> "ResponseCache":
+        """Cache the callbacks with these ids (the request body's `output`)."""
+        unknown = [id_ for id_ in callback_ids if id_ not in self.app.callback_map]
+        if unknown:
+            raise KeyError(f"Unknown callbacks: {unknown}")
+        self.callbacks.update(callback_ids)
+        return self
+
+    def key(self, body: dict) -> str:
+        key = json.dumps(
+            [
+                self.version(),
+                body["output"],
+                [item.get("value") for item in body.get("inputs", [])],
+                [item.get("value") for item in body.get("state", [])],
+            ],
+            sort_keys=True,
+            default=str,
+        )
+        return hashlib.sha1(key.encode()).hexdigest()
+
+    def serve(self):
+        request = flask.request
+        if request.method != "POST" or not request.path.endswith(
+            "_dash-update-component"
+        ):
+            return None
+
+        body = request.get_json(silent=True)
+        if not body or body.get("output") not in self.callbacks:
+            return None
+
+        key = self.key(body)
+        cached = self.responses.get(key)
+        if cached is None:
+            # Not cached yet: let Dash run the callback, store() keeps the body
+            flask.g.response_cache_key = key
+            return None
+
+        data, compressed = cached
+        if compressed is not None and "gzip" in request.accept_encodings:
+            response = flask.Response(compressed, mimetype="application/json")
+            response.headers["Content-Encoding"] = "gzip"
+        else:
+            response = flask.Response(data, mimetype="application/json")
+        return self.respond(response)
+
+    def store(self, response: flask.Response) -> flask.Response:
+        key = flask.g.pop("response_cache_key", None)
+        # 204 means PreventUpdate, errors are never cached
+        if key is None or response.status_code != 200:
+            return response
+
+        data = response.get_data()
+        compressed = None
+        if len(data) >= self.compress_min_size:
+            compressed = gzip.compress(data, compresslevel=6)
+        self.responses.put(key, (data, compressed))
+        return self.respond(response)
+
+    @staticmethod
+    def respond(response: flask.Response) -> flask.Response:
+        response.headers["Vary"] = "Accept-Encoding"
+        return response
@@ -0,0 +1,116 @@
+import functools
+import os
+from contextlib import nullcontext
+from concurrent.futures import ThreadPoolExecutor
+
+import dash
+import pandas as pd
+from dash.dependencies import State
+
+
+class DeferredCallbacks:
+    """Stands in for the Dash app while a section is built on a worker thread.
+
+    `callback` only records the registration; `replay` performs them on the
+    real app from the main thread. Everything else is read from the app.
+    A `state` is appended to every callback on replay; its value only
+    reaches the server (e.g. the SnapshotRouter), not the section's function.
+    Callbacks that list the state themselves get it as a normal argument.
+    """
+
+    def __init__(self, app: dash.Dash, state: State | None = None) -> None:
+        self.app = app
+        self.state = state
+        self.registrations = []
+
+    def callback(self, *args, **kwargs):
+        def record(function):
+            self.registrations.append((args, kwargs, function))
+            return function
+
+        return record
+
+    def replay(self) -> None:
+        for args, kwargs, function in self.registrations:
+            if self.state is not None and self.state not in flatten(args):
+                args, function = (*args, self.state), without_last_argument(function)
+            self.app.callback(*args, **kwargs)(function)
+
+    def __getattr__(self, name):
+        return getattr(self.app, name)
+
+
+def flatten(args) -> list:
+    return [
+        item
+        for arg in args
+        for item in (arg if isinstance(arg, (list, tuple)) else [arg])
+    ]
+
+
+def without_last_argument(function):
+    @functools.wraps(function)
+    def call(*args):
+        return function(*args[:-1])
+
+    return call
+
+
+def build_sections(
+    app: dash.Dash,
+    data: pd.DataFrame,
+    section_classes: dict,
+    build,
+    max_workers: int | None = None,
+    phase=None,
+    state: State | None = None,
+) -> dict:
+    """Construct all sections on a thread pool: {section name: section}.
+
+    `build(app, data, name, section_class)` constructs one section. Shared
+    artifacts a class lists in `shared_artifacts` (callables of the dataset
+    that cache their result, like GenreCube.shared) are built once, first,
+    and the sections needing them wait for them. Callbacks are registered
+    on the main thread afterwards, in section order, so the app ends up
+    exactly as after a sequential build. `max_workers=1` builds in order
+    on the calling thread. `phase(label)`, a context manager like
+    StartupProfiler.phase, times the registration of every section.
+    `state` is added to every section callback (see DeferredCallbacks).
+    """
+    max_workers = max_workers or min(len(section_classes), os.cpu_count() or 1)
+    deferred = {name: DeferredCallbacks(app, state) for name in section_classes}
+
+    if max_workers == 1:
+        sections = {
+            name: build(deferred[name], data, name, section_class)
+            for name, section_class in section_classes.items()
+        }
+    else:
+        with ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="section"
+        ) as pool:
+            # Artifacts are queued first, so no section blocks a worker on an
+            # artifact that has not started yet
+            artifacts = {}
+            for section_class in section_classes.values():
+                for artifact in getattr(section_class, "shared_artifacts", ()):
+                    if artifact not in artifacts:
+                        artifacts[artifact] = pool.submit(artifact, data)
+
+            def construct(name: str, section_class):
+                for artifact in getattr(section_class, "shared_artifacts", ()):
+                    artifacts[artifact].result()
+                return build(deferred[name], data, name, section_class)
+
+            futures = {
+                name: pool.submit(construct, name, section_class)
+                for name, section_class in section_classes.items()
+            }
+            sections = {name: future.result() for name, future in futures.items()}
+
+    for name, section in sections.items():
+        with phase(f"{name}: register_callbacks") if phase else nullcontext():
+            deferred[name].replay()
+        if getattr(section, "app", None) is deferred[name]:
+            section.app = app
+    return sections
@@ -0,0 +1,94 @@
+import dash
+import flask
+
+from dataProcessing.datasetRegistry import DatasetRegistry
+
+# Per-tab (in-memory) store of the snapshot a page shows; section callbacks
+# send it as State, see build_sections
+SNAPSHOT_STORE = "dataset-snapshot-store"
+
+
+class SnapshotRouter:
+    """Runs section callbacks against the dataset snapshot chosen by the client.
+
+    The default snapshot's sections are first built on the app itself. Every
+    other snapshot, and every rebuilt one, gets its own Dash instance; when
+    the snapshot of a request lives on one of them, its `dispatch` answers
+    the callback inside the current request.
+    """
+
+    def __init__(
+        self,
+        app: dash.Dash,
+        registry: DatasetRegistry,
+        default: str,
+        cookie: str = "dataset-snapshot",
+    ) -> None:
+        self.app = app
+        self.registry = registry
+        self.default = default
+        self.cookie = cookie
+
+        app.server.before_request(self.route)
+
+    def current(self) -> str:
+        """Snapshot of the current request, the default for unknown names.
+
+        Callbacks carry the snapshot store of their tab, links built by them
+        (exports) a `snapshot` query parameter. The cookie, which all tabs
+        of a browser share, is only the fallback for other requests.
+        """
+        name = (
+            self.requested()
+            or flask.request.args.get("snapshot")
+            or flask.request.cookies.get(self.cookie)
+        )
+        return name if name in self.registry.paths else self.default
+
+    def requested(self) -> str | None:
+        """Value of the snapshot store in a callback request body, if sent."""
+        request = flask.request
+        if request.method != "POST" or not request.is_json:
+            return None
+        body = request.get_json(silent=True) or {}
+        for item in body.get("state", []) + body.get("inputs", []):
+            if isinstance(item, dict) and item.get("id") == SNAPSHOT_STORE:
+                return item.get("value")
+        return None
+
+    def current_version(self) -> str:
+        return self.registry.version(self.current())
+
+    def route(self):
+        request = flask.request
+        if request.method != "POST" or not request.path.endswith(
+            "_dash-update-component"
+        ):
+            return None
+
+        # The snapshot is looked up once, the request finishes on it even if
+        # a reload swaps in a new one meanwhile
+        snapshot_app, _, _ = self.registry.get(self.current())
+        if snapshot_app is self.app:
+            return None
+
+        body = request.get_json(silent=True)
+        # Navigation and the snapshot picker stay on the main app
+        if not body or body.get("output") not in snapshot_app.callback_map:
+            return None
+        return snapshot_app.dispatch()
+
+    def release(self, name: str, old, new) -> None:
+        """Registry swap hook: drop the main app's references to old sections.
+
+        Once the default snapshot is rebuilt its callbacks are dispatched to
+        the new instance, the main app's entries for them are only kept for
+        the callback definitions. Pointing them at the new functions on
+        every swap lets each old generation of sections be freed.
+        """
+        if name != self.default:
+            return
+        new_app, _, _ = new
+        for callback_id, entry in new_app.callback_map.items():
+            if callback_id in self.app.callback_map:
+                self.app.callback_map[callback_id]["callback"] = entry["callback"]
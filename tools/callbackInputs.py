@@ -0,0 +1,194 @@
+import itertools
+import json
+import math
+import random
+from typing import Iterator
+
+import dash
+from dash import dcc
+from dash.development.base_component import Component
+from dash.exceptions import PreventUpdate
+
+from server.snapshotRouter import SNAPSHOT_STORE
+
+
+class CallbackCase:
+    """One concrete invocation of a registered Dash callback."""
+
+    def __init__(
+        self, callback_id: str, inputs: list, state: list, outputs: list | dict
+    ) -> None:
+        self.callback_id = callback_id
+        self.inputs = inputs  # [{"id", "property", "value"}, ...]
+        self.state = state
+        self.outputs = outputs  # outputs_list exactly as the renderer sends it
+
+    @property
+    def values(self) -> list:
+        return [item["value"] for item in self.inputs + self.state]
+
+    def request_body(self) -> dict:
+        """Body of the matching `_dash-update-component` POST."""
+        return {
+            "output": self.callback_id,
+            "outputs": self.outputs,
+            "inputs": self.inputs,
+            "changedPropIds": [
+                f"{item['id']}.{item['property']}" for item in self.inputs
+            ],
+            "state": self.state,
+        }
+
+
+def layout_components(layout: Component) -> dict:
+    """Map component id -> component for every component with an id."""
+    components = {}
+    nodes = [layout] if isinstance(layout, Component) else list(layout or [])
+    for node in nodes:
+        for component in itertools.chain([node], node._traverse()):
+            component_id = getattr(component, "id", None)
+            if isinstance(component_id, str):
+                components[component_id] = component
+    return components
+
+
+def candidate_values(component: Component, prop: str) -> list:
+    """Values a user can pick for `component.prop`, or just its current value."""
+    current = getattr(component, prop, None)
+
+    # Multi-select dropdowns keep their preselected value, everything with
+    # options is enumerated option by option
+    if prop == "value" and not getattr(component, "multi", False):
+        options = getattr(component, "options", None)
+        if options:
+            values = [
+                option["value"] if isinstance(option, dict) else option
+                for option in options
+            ]
+            # A checklist value is the list of ticked options, none ticked
+            # is a choice as well
+            if isinstance(component, dcc.Checklist):
+                return [[]] + [[value] for value in values]
+            return values
+
+        # Sliders expose their choices through the marks
+        marks = getattr(component, "marks", None)
+        if marks:
+            return [_mark_value(mark) for mark in marks]
+
+    return [current]
+
+
+def _mark_value(mark):
+    if isinstance(mark, str):
+        try:
+            return int(mark)
+        except ValueError:
+            return float(mark)
+    return mark
+
+
+def outputs_list(callback: dict) -> list | dict:
+    output = callback["output"]
+    if isinstance(output, (list, tuple)):
+        return [item.to_dict() for item in output]
+    return output.to_dict()
+
+
+def section_callbacks(app: dash.Dash, layout: Component) -> Iterator[tuple]:
+    """Yield (callback_id, callback) for callbacks fully driven by `layout`.
+
+    The snapshot store every section callback carries counts as part of
+    the layout; it is sent empty, so the snapshot comes from the cookie.
+    """
+    components = layout_components(layout)
+    for callback_id, callback in app.callback_map.items():
+        dependencies = callback["inputs"] + callback["state"]
+        if dependencies and all(
+            isinstance(dep["id"], str)
+            and (dep["id"] in components or dep["id"] == SNAPSHOT_STORE)
+            for dep in dependencies
+        ):
+            yield callback_id, callback
+
+
+def sample_product(choices: list, max_combinations: int, seed: int = 0) -> list:
+    """Up to `max_combinations` tuples of the product of `choices`.
+
+    Small products are returned whole. Larger ones start with one tuple per
+    position that steps every input through its values together, so each
+    value appears at least once, and are filled up with a seeded sample of
+    the rest. The result is the same on every call, the export workers rely
+    on that to pick cases by index.
+
+    >>> sample_product([[1, 2], ["a", "b"]], 10)
+    [(1, 'a'), (1, 'b'), (2, 'a'), (2, 'b')]
+    >>> cases = sample_product([list(range(5)), list(range(8))], 10)
+    >>> len(cases), sorted({a for a, _ in cases}), sorted({b for _, b in cases})
+    (10, [0, 1, 2, 3, 4], [0, 1, 2, 3, 4, 5, 6, 7])
+    """
+    sizes = [len(values) for values in choices]
+    total = math.prod(sizes)
+    if total <= max_combinations:
+        return list(itertools.product(*choices))
+
+    def index_of(positions):
+        index = 0
+        for position, size in zip(positions, sizes):
+            index = index * size + position
+        return index
+
+    picked = dict.fromkeys(
+        index_of([step % size for size in sizes]) for step in range(max(sizes))
+    )
+    rest = random.Random(seed).sample(range(total), min(total, 2 * max_combinations))
+    for index in rest:
+        if len(picked) >= max_combinations:
+            break
+        picked.setdefault(index)
+
+    cases = []
+    for index in list(picked)[:max_combinations]:
+        positions = []
+        for size in reversed(sizes):
+            index, position = divmod(index, size)
+            positions.append(position)
+        cases.append(
+            tuple(values[p] for values, p in zip(choices, reversed(positions)))
+        )
+    return cases
+
+
+def enumerate_cases(
+    app: dash.Dash, layout: Component, max_combinations: int = 50
+) -> Iterator[CallbackCase]:
+    """Yield the input combinations of every callback belonging to `layout`."""
+    components = layout_components(layout)
+    for callback_id, callback in section_callbacks(app, layout):
+        choices = [
+            (
+                [None]
+                if dep["id"] == SNAPSHOT_STORE
+                else candidate_values(components[dep["id"]], dep["property"])
+            )
+            for dep in callback["inputs"] + callback["state"]
+        ]
+        n_inputs = len(callback["inputs"])
+        for values in sample_product(choices, max_combinations):
+            items = [
+                {"id": dep["id"], "property": dep["property"], "value": value}
+                for dep, value in zip(callback["inputs"] + callback["state"], values)
+            ]
+            yield CallbackCase(
+                callback_id, items[:n_inputs], items[n_inputs:], outputs_list(callback)
+            )
+
+
+def invoke(app: dash.Dash, case: CallbackCase) -> dict:
+    """Run a callback in-process and return {component_id: {prop: value}}."""
+    callback = app.callback_map[case.callback_id]
+    try:
+        response = callback["callback"](*case.values, outputs_list=case.outputs)
+    except PreventUpdate:
+        return {}
+    return json.loads(response).get("response", {})
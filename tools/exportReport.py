@@ -0,0 +1,166 @@
+"""Render every dashboard section to standalone files without a browser.
+
+Usage: python -m tools.exportReport --out reports --workers 8 --formats html json png
+"""
+
+import argparse
+import importlib.util
+import itertools
+import multiprocessing
+import os
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import plotly.graph_objects as go
+from dash import dcc
+
+from tools.callbackInputs import enumerate_cases, invoke
+
+# The dashboard module is imported once in the parent; forked workers inherit it
+_dashboard = None
+
+
+def _load_dashboard():
+    global _dashboard
+    if _dashboard is None:
+        import app as dashboard
+
+        _dashboard = dashboard
+    return _dashboard
+
+
+def slugify(text) -> str:
+    return re.sub(r"[^A-Za-z0-9]+", "_", str(text)).strip("_") or "none"
+
+
+def png_available() -> bool:
+    return importlib.util.find_spec("kaleido") is not None
+
+
+def write_figure(figure: dict, path: str, formats: list) -> list:
+    fig = go.Figure(figure)
+    written = []
+    if "html" in formats:
+        fig.write_html(f"{path}.html", include_plotlyjs="cdn")
+        written.append(f"{path}.html")
+    if "json" in formats:
+        fig.write_json(f"{path}.json")
+        written.append(f"{path}.json")
+    if "png" in formats and png_available():
+        fig.write_image(f"{path}.png")
+        written.append(f"{path}.png")
+    return written
+
+
+def static_figures(section) -> list:
+    """Figures baked into a section's layout rather than produced by callbacks."""
+    layout = section.get_html()
+    graphs = [
+        component
+        for component in itertools.chain([layout], layout._traverse())
+        if isinstance(component, dcc.Graph) and getattr(component, "figure", None)
+    ]
+    return [
+        (getattr(graph, "id", None) or f"figure_{index}", graph.figure)
+        for index, graph in enumerate(graphs)
+    ]
+
+
+def render_case(
+    section_name: str,
+    case_index: int,
+    out_dir: str,
+    formats: list,
+    max_combinations: int,
+) -> list:
+    """Worker entry point: rebuild one callback case and write its figures."""
+    dashboard = _load_dashboard()
+    _, _, sections = dashboard.registry.get(dashboard.DEFAULT_SNAPSHOT)
+    section = sections[section_name]
+    cases = enumerate_cases(dashboard.app, section.get_html(), max_combinations)
+    case = next(c for i, c in enumerate(cases) if i == case_index)
+
+    written = []
+    suffix = "_".join(slugify(item["value"]) for item in case.inputs)
+    for component_id, props in invoke(dashboard.app, case).items():
+        if "figure" in props:
+            path = os.path.join(
+                out_dir, slugify(section_name), f"{component_id}__{suffix}"
+            )
+            written += write_figure(props["figure"], path, formats)
+    return written
+
+
+def export_report(
+    out_dir: str, formats: list, workers: int, max_combinations: int
+) -> int:
+    dashboard = _load_dashboard()
+
+    if "png" in formats and not png_available():
+        print("kaleido is not installed, skipping PNG output")
+
+    # Static figures are cheap to collect in the parent; callback cases are fanned out
+    written = []
+    tasks = []
+    _, _, sections = dashboard.registry.get(dashboard.DEFAULT_SNAPSHOT)
+    for section_name, section in sections.items():
+        section_dir = os.path.join(out_dir, slugify(section_name))
+        os.makedirs(section_dir, exist_ok=True)
+        for component_id, figure in static_figures(section):
+            written += write_figure(
+                figure, os.path.join(section_dir, component_id), formats
+            )
+
+        n_cases = sum(
+            1
+            for _ in enumerate_cases(
+                dashboard.app, section.get_html(), max_combinations
+            )
+        )
+        tasks += [(section_name, index) for index in range(n_cases)]
+
+    # Fork keeps the already loaded dataset and sections in the workers
+    methods = multiprocessing.get_all_start_methods()
+    context = multiprocessing.get_context("fork" if "fork" in methods else None)
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context) as pool:
+        futures = {
+            pool.submit(
+                render_case, section_name, index, out_dir, formats, max_combinations
+            ): section_name
+            for section_name, index in tasks
+        }
+        for future in as_completed(futures):
+            try:
+                written += future.result()
+            except Exception as error:  # keep going, report what failed
+                print(f"[{futures[future]}] failed: {error}")
+
+    return len(written)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Export all dashboard sections")
+    parser.add_argument("--out", default="reports", help="output directory")
+    parser.add_argument(
+        "--formats",
+        nargs="+",
+        default=["html", "json"],
+        choices=["html", "json", "png"],
+    )
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument(
+        "--max-combinations",
+        type=int,
+        default=50,
+        help="upper bound of input combinations rendered per callback",
+    )
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    n_files = export_report(args.out, args.formats, args.workers, args.max_combinations)
+    print(f"Wrote {n_files} files to {args.out} in {time.perf_counter() - start:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
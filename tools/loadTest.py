@@ -0,0 +1,261 @@
+"""Replay callback traffic against a local dashboard server and report latencies.
+
+Usage: python -m tools.loadTest --concurrency 16 --rounds 5
+       python -m tools.loadTest --requests traffic.jsonl --url http://127.0.0.1:8050
+
+Without --requests, request bodies are synthesized from every section's
+callbacks (metric switches, slider moves, dropdown and threshold changes)
+plus one navigation per page. Recorded traffic comes from starting the app
+with DASH_RECORD_TRAFFIC=traffic.jsonl.
+"""
+
+import argparse
+import http.client
+import json
+import logging
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse
+
+import flask
+import numpy as np
+from plotly.io.json import to_json_plotly
+
+from server.snapshotRouter import SNAPSHOT_STORE
+from tools.callbackInputs import enumerate_cases
+
+DISPATCH_PATH = "/_dash-update-component"
+
+
+def record_traffic(app, path: str) -> None:
+    """Append the body of every callback request the app receives to `path`."""
+    lock = threading.Lock()
+
+    def record():
+        request = flask.request
+        if request.method == "POST" and request.path.endswith(DISPATCH_PATH):
+            body = request.get_json(silent=True)
+            if body:
+                with lock, open(path, "a") as traffic:
+                    traffic.write(json.dumps(body) + "\n")
+
+    app.server.before_request(record)
+
+
+def read_requests(path: str) -> list:
+    with open(path) as traffic:
+        return [json.loads(line) for line in traffic if line.strip()]
+
+
+def synthesize_requests(dashboard, max_combinations: int) -> list:
+    """Request bodies for every callback case and every page navigation."""
+    bodies = []
+    _, _, sections = dashboard.registry.get(dashboard.DEFAULT_SNAPSHOT)
+    for section_name, section in sections.items():
+        bodies.append(
+            {
+                "output": "page-content.children",
+                "outputs": {"id": "page-content", "property": "children"},
+                "inputs": [
+                    {
+                        "id": "url",
+                        "property": "pathname",
+                        "value": f"/{section_name.replace(' ', '_')}",
+                    },
+                    {
+                        "id": SNAPSHOT_STORE,
+                        "property": "data",
+                        "value": dashboard.DEFAULT_SNAPSHOT,
+                    },
+                ],
+                "changedPropIds": ["url.pathname"],
+            }
+        )
+        bodies += [
+            case.request_body()
+            for case in enumerate_cases(
+                dashboard.app, section.get_html(), max_combinations
+            )
+        ]
+    return bodies
+
+
+def start_server(dashboard) -> tuple:
+    """Serve the dashboard on a free local port in a background thread."""
+    from werkzeug.serving import make_server
+
+    # One log line per request would dominate the output
+    logging.getLogger("werkzeug").setLevel(logging.WARNING)
+    server = make_server("127.0.0.1", 0, dashboard.app.server, threaded=True)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server, f"http://127.0.0.1:{server.server_port}"
+
+
+def send(url: str, body: dict, cookie: str | None, timeout: float) -> tuple:
+    """POST one callback body: (status, seconds), status 0 on connection errors."""
+    target = urlparse(url)
+    headers = {"Content-Type": "application/json"}
+    if cookie:
+        headers["Cookie"] = cookie
+    # Layout values can be numpy scalars, encode them the way Dash does
+    payload = to_json_plotly(body)
+
+    start = time.perf_counter()
+    connection = http.client.HTTPConnection(
+        target.hostname, target.port, timeout=timeout
+    )
+    try:
+        connection.request(
+            "POST", target.path.rstrip("/") + DISPATCH_PATH, payload, headers
+        )
+        response = connection.getresponse()
+        response.read()
+        status = response.status
+    except (OSError, http.client.HTTPException):
+        status = 0
+    finally:
+        connection.close()
+    return status, time.perf_counter() - start
+
+
+def run_load(
+    url: str,
+    bodies: list,
+    concurrency: int,
+    rounds: int,
+    cookie: str | None = None,
+    timeout: float = 60.0,
+    seed: int = 0,
+) -> tuple:
+    """Replay `bodies` `rounds` times in random order: (results, wall seconds)."""
+    schedule = [body for _ in range(rounds) for body in bodies]
+    random.Random(seed).shuffle(schedule)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        outcomes = list(
+            pool.map(lambda body: send(url, body, cookie, timeout), schedule)
+        )
+    wall = time.perf_counter() - start
+    return [
+        (body["output"], status, seconds)
+        for body, (status, seconds) in zip(schedule, outcomes)
+    ], wall
+
+
+def summarize(results: list, wall: float) -> dict:
+    """Throughput plus latency percentiles and error rate per callback.
+
+    200 and 204 (PreventUpdate) are successes, everything else an error.
+    """
+    per_callback = {}
+    for callback_id, status, seconds in results:
+        per_callback.setdefault(callback_id, []).append((status, seconds))
+
+    callbacks = []
+    for callback_id, outcomes in per_callback.items():
+        statuses = np.array([status for status, _ in outcomes])
+        latencies = np.array([seconds for _, seconds in outcomes]) * 1000
+        p50, p90, p99 = np.percentile(latencies, [50, 90, 99])
+        errors = int(np.sum(~np.isin(statuses, [200, 204])))
+        callbacks.append(
+            {
+                "callback": callback_id,
+                "requests": len(outcomes),
+                "errors": errors,
+                "error_rate": errors / len(outcomes),
+                "mean_ms": float(latencies.mean()),
+                "p50_ms": float(p50),
+                "p90_ms": float(p90),
+                "p99_ms": float(p99),
+            }
+        )
+    callbacks.sort(key=lambda callback: callback["p99_ms"], reverse=True)
+
+    latencies = np.array([seconds for _, _, seconds in results]) * 1000
+    errors = sum(callback["errors"] for callback in callbacks)
+    return {
+        "requests": len(results),
+        "seconds": wall,
+        "throughput": len(results) / wall if wall else 0.0,
+        "errors": errors,
+        "error_rate": errors / len(results) if results else 0.0,
+        "p50_ms": float(np.percentile(latencies, 50)) if len(latencies) else 0.0,
+        "p99_ms": float(np.percentile(latencies, 99)) if len(latencies) else 0.0,
+        "callbacks": callbacks,
+    }
+
+
+def format_summary(summary: dict) -> str:
+    lines = [
+        f"{summary['requests']} requests in {summary['seconds']:.1f}s: "
+        f"{summary['throughput']:.1f} req/s, {summary['errors']} errors "
+        f"({summary['error_rate']:.1%}), p50 {summary['p50_ms']:.1f} ms, "
+        f"p99 {summary['p99_ms']:.1f} ms",
+        f"{'callback':<70} {'n':>6} {'err %':>6} {'mean':>8} {'p50':>8} "
+        f"{'p90':>8} {'p99':>8}",
+    ]
+    for callback in summary["callbacks"]:
+        lines.append(
+            f"{callback['callback'][:70]:<70} {callback['requests']:>6} "
+            f"{callback['error_rate'] * 100:>6.1f} {callback['mean_ms']:>8.1f} "
+            f"{callback['p50_ms']:>8.1f} {callback['p90_ms']:>8.1f} "
+            f"{callback['p99_ms']:>8.1f}"
+        )
+    return "\n".join(lines)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Load test the dashboard callbacks")
+    parser.add_argument(
+        "--url", help="running server to test, default: start one in-process"
+    )
+    parser.add_argument("--requests", help="recorded request bodies (JSON lines)")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--rounds", type=int, default=3)
+    parser.add_argument(
+        "--max-combinations",
+        type=int,
+        default=20,
+        help="upper bound of synthesized input combinations per callback",
+    )
+    parser.add_argument("--snapshot", help="dataset snapshot to test (cookie)")
+    parser.add_argument("--timeout", type=float, default=60.0)
+    parser.add_argument("--json", help="also write the summary to this file")
+    args = parser.parse_args()
+
+    dashboard = None
+    if args.url is None or args.requests is None:
+        import app as dashboard
+
+    bodies = (
+        read_requests(args.requests)
+        if args.requests
+        else synthesize_requests(dashboard, args.max_combinations)
+    )
+    cookie = f'dataset-snapshot="{args.snapshot}"' if args.snapshot else None
+
+    server = None
+    url = args.url
+    if url is None:
+        server, url = start_server(dashboard)
+    try:
+        results, wall = run_load(
+            url, bodies, args.concurrency, args.rounds, cookie, args.timeout
+        )
+    finally:
+        if server is not None:
+            server.shutdown()
+
+    summary = summarize(results, wall)
+    print(format_summary(summary))
+    if args.json:
+        with open(args.json, "w") as output:
+            json.dump(summary, output, indent=2)
+
+
+if __name__ == "__main__":
+    main()
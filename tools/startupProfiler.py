@@ -0,0 +1,137 @@
+import argparse
+import cProfile
+import os
+import sys
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+
+class StartupProfiler:
+    """Times and memory-profiles the phases of the dashboard startup.
+
+    Disabled profilers are no-ops, so the phases can stay in `app.py`.
+    """
+
+    def __init__(self, enabled: bool = False, output_path: str | None = None) -> None:
+        self.enabled = enabled
+        self.output_path = output_path
+        self.phases = []  # (name, seconds, self_seconds, allocated, peak)
+        self._stack = []
+        self._profile = cProfile.Profile() if enabled and output_path else None
+
+    @classmethod
+    def from_environment(cls, argv: list | None = None) -> "StartupProfiler":
+        """Enable via DASH_PROFILE=1 / --profile, dump via --profile-output PATH."""
+        parser = argparse.ArgumentParser(add_help=False)
+        parser.add_argument("--profile", action="store_true")
+        parser.add_argument("--profile-output")
+        args, _ = parser.parse_known_args(sys.argv[1:] if argv is None else argv)
+
+        enabled = args.profile or os.environ.get("DASH_PROFILE", "") not in ("", "0")
+        output_path = args.profile_output or os.environ.get("DASH_PROFILE_OUTPUT")
+        return cls(enabled=enabled, output_path=output_path)
+
+    def start(self) -> None:
+        if not self.enabled:
+            return
+        tracemalloc.start()
+        if self._profile:
+            self._profile.enable()
+
+    def begin(self, name: str) -> None:
+        if not self.enabled:
+            return
+        current, peak = tracemalloc.get_traced_memory()
+        if self._stack:
+            # Keep the enclosing phase's peak before resetting it for this one
+            self._stack[-1][4] = max(self._stack[-1][4], peak)
+        tracemalloc.reset_peak()
+        # [name, start, start memory, time in nested phases, peak so far]
+        self._stack.append([name, time.perf_counter(), current, 0.0, current])
+
+    def end(self) -> None:
+        if not self.enabled:
+            return
+        name, start, start_memory, nested, nested_peak = self._stack.pop()
+        seconds = time.perf_counter() - start
+        current, peak = tracemalloc.get_traced_memory()
+        peak = max(peak, nested_peak)
+        self.phases.append(
+            (
+                name,
+                seconds,
+                seconds - nested,
+                current - start_memory,
+                peak - start_memory,
+            )
+        )
+        if self._stack:
+            self._stack[-1][3] += seconds
+            self._stack[-1][4] = max(self._stack[-1][4], peak)
+
+    def record(self, name: str, seconds: float) -> None:
+        """Add a phase that was timed elsewhere, nested in the current phase."""
+        if not self.enabled:
+            return
+        self.phases.append((name, seconds, seconds, 0, 0))
+        if self._stack:
+            self._stack[-1][3] += seconds
+
+    @contextmanager
+    def phase(self, name: str):
+        self.begin(name)
+        try:
+            yield
+        finally:
+            self.end()
+
+    @contextmanager
+    def instrument(self, cls: type, method: str, name: str):
+        """Time every call of `cls.method` as its own nested phase."""
+        if not self.enabled:
+            yield
+            return
+
+        original = getattr(cls, method)
+
+        def timed(*args, **kwargs):
+            with self.phase(name):
+                return original(*args, **kwargs)
+
+        setattr(cls, method, timed)
+        try:
+            yield
+        finally:
+            setattr(cls, method, original)
+
+    def report(self) -> str:
+        lines = [
+            f"{'phase':<60} {'total s':>9} {'self s':>9} {'alloc MB':>9} {'peak MB':>9}"
+        ]
+        for name, seconds, self_seconds, allocated, peak in sorted(
+            self.phases, key=lambda phase: phase[2], reverse=True
+        ):
+            lines.append(
+                f"{name:<60} {seconds:>9.3f} {self_seconds:>9.3f} "
+                f"{allocated / 2**20:>9.1f} {peak / 2**20:>9.1f}"
+            )
+        return "\n".join(lines)
+
+    def finish(self) -> None:
+        """Print the sorted report and write the cProfile dump if requested."""
+        if not self.enabled:
+            return
+        if self._profile:
+            self._profile.disable()
+            # pstats format, readable by snakeviz, flameprof and gprof2dot
+            self._profile.dump_stats(self.output_path)
+        tracemalloc.stop()
+
+        print("Startup profile (sorted by self time)")
+        print(self.report())
+        if self._profile:
+            print(f"cProfile data written to {self.output_path}")
+
+        # Later loads (e.g. other dataset snapshots) are not profiled
+        self.enabled = False